@@ -0,0 +1,153 @@
+""" Checksums of large files: DIRAC fileAdler against the Checksum module
+
+    For each file size from 1 MB to 10 GB a file of random content is written in workDir, then
+    its adler32 is computed with:
+    - fileAdler
+    - fileAdler32 in one thread, reading with read, then through mmap
+    - fileAdler32 by chunks in a pool of threads
+    and adler32 with md5 by two passes (fileAdler, then hashlib) against one fileChecksums pass.
+    All the results have to agree. The sizes not fitting in the free space of workDir are skipped.
+
+    The files just written are partly in the page cache: the larger sizes measure the disk too.
+    No external service is needed.
+"""
+
+import os
+import zlib
+import random
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.Core.Utilities.Adler import fileAdler
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.Checksum import fileAdler32, fileChecksums, adler32Combine, hexAdler
+
+# directory of the test files, a new temporary directory when None
+workDir = None
+fileSizes = [10 ** 6, 10 ** 7, 10 ** 8, 10 ** 9, 10 ** 10]
+threadNumbers = [2, 4, 8]
+writeBlock = 8 * 1024 * 1024
+
+def writeFile( fileName, size ):
+  """ size bytes, repeating a block of random bytes with a different prefix each time
+  """
+  block = os.urandom( writeBlock )
+  out = open( fileName, 'wb' )
+  try:
+    written = 0
+    while written < size:
+      data = ( '%016d' % written + block )[:min( writeBlock, size - written )]
+      out.write( data )
+      written += len( data )
+  finally:
+    out.close()
+
+def md5Pass( fileName, blockSize = 8 * 1024 * 1024 ):
+  digest = hashlib.md5()
+  inFile = open( fileName, 'rb' )
+  try:
+    while True:
+      data = inFile.read( blockSize )
+      if not data:
+        break
+      digest.update( data )
+  finally:
+    inFile.close()
+  return digest.hexdigest()
+
+def freeSpace( path ):
+  stat = os.statvfs( path )
+  return stat.f_bavail * stat.f_frsize
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class ChecksumBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the checksum test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.workDir = tempfile.mkdtemp( prefix = 'checksum', dir = workDir )
+
+  def tearDown( self ):
+    shutil.rmtree( self.workDir, ignore_errors = True )
+
+class Combine( ChecksumBenchmarkTestCase ):
+
+  def test_combine( self ):
+    """ adler32Combine over random splits, chunked results equal to zlib.adler32
+    """
+    generator = random.Random( 1234 )
+    data = ''.join( [chr( generator.randrange( 256 ) ) for _i in xrange( 300000 )] )
+    for _i in range( 100 ):
+      split = generator.randrange( len( data ) + 1 )
+      self.assertEqual( adler32Combine( zlib.adler32( data[:split] ) & 0xffffffff,
+                                        zlib.adler32( data[split:] ) & 0xffffffff, len( data ) - split ),
+                        zlib.adler32( data ) & 0xffffffff )
+
+    fileName = os.path.join( self.workDir, 'combine' )
+    for size in ( 0, 1, 65536, 65537, 300000 ):
+      open( fileName, 'wb' ).write( data[:size] )
+      expected = hexAdler( zlib.adler32( data[:size] ) )
+      for useMmap in ( True, False ):
+        self.assertEqual( fileAdler32( fileName, threads = 4, chunkSize = 65536, blockSize = 10000, useMmap = useMmap ),
+                          expected )
+      checksums = fileChecksums( fileName, ( 'adler32', 'md5', 'sha1' ), chunkSize = 65536, blockSize = 7777 )
+      self.assertEqual( checksums['Value'], { 'adler32' : expected, 'md5' : hashlib.md5( data[:size] ).hexdigest(),
+                                              'sha1' : hashlib.sha1( data[:size] ).hexdigest() } )
+    self.assertEqual( fileAdler32( os.path.join( self.workDir, 'missing' ) ), False )
+    self.assertEqual( fileChecksums( fileName, ( 'crc64', ) )['OK'], False )
+
+class FileSizes( ChecksumBenchmarkTestCase ):
+
+  def test_fileSizes( self ):
+    """ fileAdler against fileAdler32 and fileChecksums, 1 MB to 10 GB
+    """
+    header = ( ( 'bytes', 'fileAdler', 'read', 'mmap' ) + tuple( ['%d threads' % threads for threads in threadNumbers] )
+               + ( '2 passes s', '1 pass s' ) )
+    rows = []
+    for size in fileSizes:
+      if size * 1.1 > freeSpace( self.workDir ):
+        rows.append( [size] + ['skipped'] * ( len( header ) - 1 ) )
+        continue
+      fileName = os.path.join( self.workDir, 'file-%d' % size )
+      writeFile( fileName, size )
+      try:
+        row = [size]
+        with Timer() as timer:
+          reference = fileAdler( fileName )
+        self.assert_( reference )
+        row.append( size / timer.wall / 1e6 )
+
+        for threads, useMmap in [( 1, False ), ( 1, True )] + [( threads, True ) for threads in threadNumbers]:
+          with Timer() as timer:
+            adler = fileAdler32( fileName, threads = threads, useMmap = useMmap )
+          self.assertEqual( int( adler, 16 ), int( reference, 16 ) )
+          row.append( size / timer.wall / 1e6 )
+
+        with Timer() as twoPasses:
+          md5 = md5Pass( fileName )
+          fileAdler( fileName )
+        with Timer() as onePass:
+          checksums = fileChecksums( fileName, ( 'adler32', 'md5' ) )
+        self.assertEqual( checksums['Value'], { 'adler32' : adler, 'md5' : md5 } )
+        row += [twoPasses.wall, onePass.wall]
+        rows.append( row )
+      finally:
+        os.unlink( fileName )
+    printReport( "adler32 throughput in MB/s, %d CPUs; adler32 + md5 in seconds" % os.sysconf( 'SC_NPROCESSORS_ONLN' ),
+                 header, rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( ChecksumBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Combine ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( FileSizes ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
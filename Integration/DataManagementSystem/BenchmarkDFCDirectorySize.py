@@ -0,0 +1,296 @@
+""" DFC getDirectorySize on deep trees: stored usage against the usage recalculated from the files
+
+    getDirectorySize( lfns, True, False ) answers from the usage stored per directory and SE,
+    getDirectorySize( lfns, True, True ) recalculates it from the files. The stored usage has to
+    be maintained by addFile, addReplica, removeReplica and removeFile so that both always agree,
+    TransactionalFileCatalogDB changes it in the same transaction as the files.
+    The DirectoryUsage model is maintained the same way, in memory, and is the reference.
+
+    - Model: DirectoryUsage alone up to 10^6 files: cost of an update, stored against
+      recalculated queries; no service needed
+    - Consistency: random addFile, addReplica, removeReplica and removeFile through the catalog,
+      stored, recalculated and model usages compared for the directories touched
+    - Transactions: the Consistency operations on a TransactionalFileCatalogDB, and an operation
+      whose usage update fails rolled back
+    - Scaling: a tree of depth levels of fanOut directories grown to 10^6 files by bulk calls,
+      stored and recalculated getDirectorySize timed on the top, a middle and a leaf directory
+
+    Consistency, Transactions and Scaling suppose that the DB is present, Consistency and Scaling
+    that the service is running
+"""
+
+import os
+import uuid
+import random
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.DirectoryUsage import DirectoryUsage
+from TestDIRAC.Utilities.TransactionalFileCatalogDB import TransactionalFileCatalogDB, catalogConfig
+
+baseDir = '/vo.formation.idgrilles.fr/user/a/atsareg/benchDirectorySize'
+ses = ['testSE', 'otherSE', 'thirdSE']
+depth = 8
+fanOut = 4
+fileNumbers = [10 ** 4, 10 ** 5, 10 ** 6]
+modelFileNumbers = [10 ** 4, 10 ** 5, 10 ** 6]
+consistencyFiles = 200
+consistencyOperations = 1000
+checkEvery = 50
+chunkSize = 1000
+queries = 10
+credDict = { 'username' : 'atsareg', 'group' : 'dirac_user', 'properties' : [] }
+
+def lfnFor( index, levels = depth, width = fanOut ):
+  """ file index in a tree of levels levels of width directories
+  """
+  path = baseDir
+  rest = index
+  for _level in range( levels ):
+    path += '/d%d' % ( rest % width )
+    rest //= width
+  return '%s/file%d' % ( path, index )
+
+def usageOf( size ):
+  """ the comparable part of a getDirectorySize result: logical files and size, files and size
+      per SE holding files, totals
+  """
+  physical = size.get( 'PhysicalSize', {} )
+  perSE = dict( [( se, ( counters['Files'], counters['Size'] ) ) for se, counters in physical.items()
+                 if isinstance( counters, dict ) and counters.get( 'Files' )] )
+  return ( size['LogicalFiles'], size['LogicalSize'], perSE, physical.get( 'TotalFiles', 0 ),
+           physical.get( 'TotalSize', 0 ) )
+
+class DirectCatalog( object ):
+  """ the FileCatalogClient calls of the tests, made on a FileCatalogDB
+  """
+
+  def __init__( self, db ):
+    self.db = db
+
+  def __getattr__( self, name ):
+    method = getattr( self.db, name )
+    def call( lfns, *args ):
+      if isinstance( lfns, basestring ):
+        lfns = [lfns]
+      if isinstance( lfns, list ):
+        lfns = dict.fromkeys( lfns, False )
+      return method( lfns, *( args + ( credDict, ) ) )
+    return call
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class DirectorySizeBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the directory usage test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.generator = random.Random( 1234 )
+    self.usage = DirectoryUsage()
+    self.dfc = None
+
+  def tearDown( self ):
+    """ remove the files, then the directories deepest first
+    """
+    if not self.dfc:
+      return
+    lfns = self.usage.files.keys()
+    for i in range( 0, len( lfns ), chunkSize ):
+      self.dfc.removeFile( lfns[i:i + chunkSize] )
+    directories = sorted( [directory for directory in self.usage.directories() if directory.startswith( baseDir )],
+                          key = lambda directory: -directory.count( '/' ) )
+    for i in range( 0, len( directories ), chunkSize ):
+      self.dfc.removeDirectory( directories[i:i + chunkSize] )
+
+  def addFiles( self, indexes, levels = depth, width = fanOut ):
+    """ add the files by chunks, a first replica on a random SE, a second for one file in three
+    """
+    replicas = {}
+    for i in range( 0, len( indexes ), chunkSize ):
+      files = {}
+      for index in indexes[i:i + chunkSize]:
+        lfn = lfnFor( index, levels, width )
+        se = ses[index % len( ses )]
+        files[lfn] = { 'PFN' : 'pfn:%s' % lfn, 'SE' : se, 'Size' : self.generator.randint( 1, 10 ** 9 ),
+                       'GUID' : str( uuid.uuid4() ), 'Checksum' : '0' }
+        if not index % 3:
+          otherSE = ses[( index + 1 ) % len( ses )]
+          replicas[lfn] = { 'PFN' : 'pfn:%s:%s' % ( otherSE, lfn ), 'SE' : otherSE }
+      result = self.dfc.addFile( files )
+      self.assert_( result['OK'], "addFile failed %s" % result.get( 'Message' ) )
+      self.assertFalse( result['Value']['Failed'], "addFile failed %s" % result['Value']['Failed'].items()[:3] )
+      for lfn, info in files.items():
+        self.usage.addFile( lfn, info['Size'], info['SE'] )
+    replicas = replicas.items()
+    for i in range( 0, len( replicas ), chunkSize ):
+      chunk = dict( replicas[i:i + chunkSize] )
+      result = self.dfc.addReplica( chunk )
+      self.assert_( result['OK'], "addReplica failed %s" % result.get( 'Message' ) )
+      for lfn in result['Value']['Successful']:
+        self.usage.addReplica( lfn, chunk[lfn]['SE'] )
+
+  def directorySizes( self, directories, recalculate ):
+    result = self.dfc.getDirectorySize( directories, True, recalculate )
+    self.assert_( result['OK'], "getDirectorySize failed %s" % result.get( 'Message' ) )
+    self.assertFalse( result['Value']['Failed'], "getDirectorySize failed %s" % result['Value']['Failed'] )
+    return result['Value']['Successful']
+
+  def checkDirectories( self, directories ):
+    """ stored, recalculated and model usages agree
+    """
+    stored = self.directorySizes( directories, False )
+    recalculated = self.directorySizes( directories, True )
+    for directory in directories:
+      expected = usageOf( self.usage.getDirectorySize( directory ) )
+      self.assertEqual( usageOf( recalculated[directory] ), expected,
+                        "recalculated usage of %s differs from the model" % directory )
+      self.assertEqual( usageOf( stored[directory] ), expected,
+                        "stored usage of %s differs from the recalculated one" % directory )
+
+class Model( DirectorySizeBenchmarkTestCase ):
+
+  def test_model( self ):
+    """ DirectoryUsage updates and queries up to 10^6 files
+    """
+    rows = []
+    added = 0
+    for fileNumber in modelFileNumbers:
+      lfns = [lfnFor( index ) for index in xrange( added, fileNumber )]
+      with Timer() as updates:
+        for index, lfn in enumerate( lfns ):
+          self.usage.addFile( lfn, index + 1, ses[index % len( ses )] )
+          if not index % 3:
+            self.usage.addReplica( lfn, ses[( index + 1 ) % len( ses )] )
+        for lfn in lfns[::10]:
+          self.usage.removeReplica( lfn, ses[0] )
+      operations = len( lfns ) + len( lfns[::3] ) + len( lfns[::10] )
+      added = fileNumber
+
+      directories = [baseDir, os.path.dirname( lfnFor( 0, depth // 2 ) ), os.path.dirname( lfns[-1] )]
+      with Timer() as stored:
+        for _i in range( queries ):
+          sizes = [self.usage.getDirectorySize( directory ) for directory in directories]
+      with Timer() as recalculated:
+        expected = [self.usage.recalculate( directory ) for directory in directories]
+      self.assertEqual( sizes, expected )
+      rows.append( ( fileNumber, updates.wall * 1e6 / operations, stored.wall * 1000. / queries,
+                     recalculated.wall * 1000. ) )
+    printReport( "DirectoryUsage: depth %d, fan-out %d, 3 directories per query" % ( depth, fanOut ),
+                 ( 'files', 'us/update', 'stored ms', 'recalculated ms' ), rows )
+
+class Consistency( DirectorySizeBenchmarkTestCase ):
+
+  def setUp( self ):
+    super( Consistency, self ).setUp()
+    self.dfc = FileCatalogClient( "DataManagement/FileCatalog" )
+
+  def test_consistency( self ):
+    """ stored usage equal to the recalculated one after each kind of change
+    """
+    levels, width = 4, 3
+    lfns = [lfnFor( index, levels, width ) for index in range( consistencyFiles )]
+    touched = set()
+    for step in range( 1, consistencyOperations + 1 ):
+      lfn = self.generator.choice( lfns )
+      se = self.generator.choice( ses )
+      operation = self.generator.choice( ( 'addFile', 'addFile', 'addReplica', 'removeReplica', 'removeFile' ) )
+      if operation == 'addFile':
+        size = self.generator.randint( 1, 10 ** 6 )
+        result = self.dfc.addFile( { lfn : { 'PFN' : 'pfn:%s' % lfn, 'SE' : se, 'Size' : size,
+                                             'GUID' : str( uuid.uuid4() ), 'Checksum' : '0' } } )
+        self.assert_( result['OK'], "addFile failed %s" % result )
+        self.assertEqual( lfn in result['Value']['Successful'], self.usage.addFile( lfn, size, se ) )
+      elif operation == 'addReplica':
+        result = self.dfc.addReplica( { lfn : { 'PFN' : 'pfn:%s:%s' % ( se, lfn ), 'SE' : se } } )
+        self.assert_( result['OK'], "addReplica failed %s" % result )
+        self.assertEqual( lfn in result['Value']['Successful'], self.usage.addReplica( lfn, se ) )
+      elif operation == 'removeReplica':
+        result = self.dfc.removeReplica( { lfn : { 'SE' : se } } )
+        self.assert_( result['OK'], "removeReplica failed %s" % result )
+        self.usage.removeReplica( lfn, se )
+      else:
+        result = self.dfc.removeFile( lfn )
+        self.assert_( result['OK'], "removeFile failed %s" % result )
+        self.usage.removeFile( lfn )
+      touched.update( [directory for directory in DirectoryUsage.ancestors( lfn )
+                       if directory.startswith( baseDir ) and self.usage.isDirectory( directory )] )
+      if not step % checkEvery:
+        self.checkDirectories( sorted( touched ) )
+        touched = set()
+
+class Transactions( Consistency ):
+
+  def setUp( self ):
+    super( Transactions, self ).setUp()
+    db = TransactionalFileCatalogDB()
+    result = db.setConfig( catalogConfig() )
+    self.assert_( result['OK'], "setConfig failed %s" % result.get( 'Message' ) )
+    self.dfc = DirectCatalog( db )
+
+  def test_rollback( self ):
+    """ an operation whose usage update fails changes nothing
+    """
+    self.addFiles( range( 30 ), 3, 2 )
+    directories = sorted( [directory for directory in self.usage.directories() if directory.startswith( baseDir )] )
+    self.checkDirectories( directories )
+
+    fileManager = self.dfc.db.fileManager
+    fileManager.usageTable = 'FC_NoDirectoryUsage'
+    try:
+      lfn = lfnFor( 0, 3, 2 )
+      self.assertFalse( self.dfc.addFile( { lfnFor( 30, 3, 2 ) : { 'PFN' : 'pfn:new', 'SE' : ses[0], 'Size' : 10,
+                                                                 'GUID' : str( uuid.uuid4() ), 'Checksum' : '0' } } )['OK'] )
+      self.assertFalse( self.dfc.addReplica( { lfn : { 'PFN' : 'pfn:%s' % ses[2], 'SE' : ses[2] } } )['OK'] )
+      self.assertFalse( self.dfc.removeReplica( { lfn : { 'SE' : ses[1] } } )['OK'] )
+      self.assertFalse( self.dfc.removeFile( lfn )['OK'] )
+    finally:
+      del fileManager.usageTable
+    self.checkDirectories( directories )
+
+class Scaling( DirectorySizeBenchmarkTestCase ):
+
+  def setUp( self ):
+    super( Scaling, self ).setUp()
+    self.dfc = FileCatalogClient( "DataManagement/FileCatalog" )
+
+  def test_scaling( self ):
+    """ stored against recalculated getDirectorySize as the tree grows to 10^6 files
+    """
+    rows = []
+    added = 0
+    for fileNumber in fileNumbers:
+      with Timer() as growth:
+        self.addFiles( range( added, fileNumber ) )
+      added = fileNumber
+
+      for name, directory in ( ( 'top', baseDir ), ( 'middle', os.path.dirname( lfnFor( 0, depth // 2 ) ) ),
+                               ( 'leaf', os.path.dirname( lfnFor( fileNumber - 1 ) ) ) ):
+        with Timer() as stored:
+          for _i in range( queries ):
+            storedSize = self.directorySizes( [directory], False )[directory]
+        with Timer() as recalculated:
+          recalculatedSize = self.directorySizes( [directory], True )[directory]
+        expected = usageOf( self.usage.getDirectorySize( directory ) )
+        self.assertEqual( usageOf( recalculatedSize ), expected )
+        self.assertEqual( usageOf( storedSize ), expected,
+                          "stored usage of %s differs from the recalculated one" % directory )
+        rows.append( ( fileNumber, name, expected[0], growth.wall, stored.wall * 1000. / queries,
+                       recalculated.wall * 1000. ) )
+    printReport( "getDirectorySize: depth %d, fan-out %d, %d SEs" % ( depth, fanOut, len( ses ) ),
+                 ( 'files', 'directory', 'files below', 'growth s', 'stored ms', 'recalculated ms' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( DirectorySizeBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Model ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Consistency ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Transactions ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Scaling ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
@@ -0,0 +1,156 @@
+""" Agent-side latency of the data logging: synchronous DataLoggingClient against BufferedDataLoggingClient
+
+    Each agent thread logs callsPerThread records, one addFileRecord per file as the agents do,
+    the time spent in the calls is what the transfer path pays:
+    - Simulated: against a client answering after roundTrip seconds, plus perRecord seconds
+      per record of a batch; no service needed
+    - Service: against DataManagement/DataLogging, which has to be running
+
+    Reported: mean and 95th percentile per call, calls per second, the time to drain the
+    buffer at close and the number of batches sent.
+"""
+
+import time
+import threading
+import unittest
+
+from DIRAC import S_OK
+from DIRAC.Core.Utilities import Time
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.Client.DataLoggingClient import DataLoggingClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.BufferedDataLoggingClient import BufferedDataLoggingClient
+
+agentThreads = [1, 8]
+callsPerThread = 500
+serviceCallsPerThread = 200
+maxRecords = 500
+flushPeriod = 1.
+roundTrip = 0.005
+perRecord = 0.00001
+
+def percentile( values, fraction ):
+  if not values:
+    return 0.
+  values = sorted( values )
+  return values[min( len( values ) - 1, int( fraction * len( values ) ) )]
+
+class SimulatedClient( object ):
+  """ DataLoggingClient taking roundTrip seconds per call and perRecord per record
+  """
+
+  def __init__( self ):
+    self.records = 0
+    self.lock = threading.Lock()
+
+  def __call( self, records ):
+    time.sleep( roundTrip + perRecord * records )
+    self.lock.acquire()
+    try:
+      self.records += records
+    finally:
+      self.lock.release()
+    return S_OK( records )
+
+  def addFileRecord( self, lfns, status, minor, date, source ):
+    return self.__call( 1 if isinstance( lfns, basestring ) else len( lfns ) )
+
+  def addFileRecords( self, fileTuples ):
+    return self.__call( len( fileTuples ) )
+
+def logRecords( client, threads, calls ):
+  """ threads agents logging calls records each
+
+  :return: [ call latencies ], Timer of the whole logging
+  """
+  latencies = []
+  lock = threading.Lock()
+
+  def agent( thread ):
+    own = []
+    for i in range( calls ):
+      start = time.time()
+      result = client.addFileRecord( '/bench/logging/%d/%d' % ( thread, i ), 'Replicate', 'Bench',
+                                     Time.toString(), 'BenchmarkDataLoggingClient' )
+      own.append( time.time() - start )
+      if not result['OK']:
+        raise RuntimeError( result['Message'] )
+    lock.acquire()
+    try:
+      latencies.extend( own )
+    finally:
+      lock.release()
+
+  agents = [threading.Thread( target = agent, args = ( thread, ) ) for thread in range( threads )]
+  with Timer() as timer:
+    for thread in agents:
+      thread.start()
+    for thread in agents:
+      thread.join()
+  return latencies, timer
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class DataLoggingClientBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the data logging latency test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+
+  def tearDown( self ):
+    pass
+
+  def compare( self, makeClient, calls, title ):
+    """ log with makeClient() directly, then through a BufferedDataLoggingClient
+    """
+    rows = []
+    for threads in agentThreads:
+      for mode in ( 'synchronous', 'buffered' ):
+        client = makeClient()
+        buffered = None
+        if mode == 'buffered':
+          client = buffered = BufferedDataLoggingClient( client, maxRecords = maxRecords, flushPeriod = flushPeriod )
+        latencies, timer = logRecords( client, threads, calls )
+        self.assertEqual( len( latencies ), threads * calls )
+        batches = threads * calls
+        with Timer() as drain:
+          if buffered:
+            self.assert_( buffered.close()['OK'] )
+            self.assertEqual( buffered.sent, threads * calls )
+            batches = buffered.batches
+        rows.append( ( threads, mode, sum( latencies ) * 1e6 / len( latencies ), percentile( latencies, 0.95 ) * 1e6,
+                       threads * calls / timer.wall, drain.wall, batches ) )
+    printReport( title, ( 'agents', 'mode', 'us/call', 'p95 us', 'calls/s', 'drain s', 'RPCs' ), rows )
+    return rows
+
+class Simulated( DataLoggingClientBenchmarkTestCase ):
+
+  def test_simulated( self ):
+    """ latency saved against a simulated round trip
+    """
+    rows = self.compare( SimulatedClient, callsPerThread,
+                         "Data logging, simulated round trip of %.1f ms: %d calls per agent" % ( roundTrip * 1000.,
+                                                                                                callsPerThread ) )
+    for synchronous, buffered in zip( rows[::2], rows[1::2] ):
+      self.assert_( buffered[2] < synchronous[2] )
+
+class Service( DataLoggingClientBenchmarkTestCase ):
+
+  def test_service( self ):
+    """ latency saved against the DataLogging service
+    """
+    self.compare( DataLoggingClient, serviceCallsPerThread,
+                  "Data logging through DataManagement/DataLogging: %d calls per agent" % serviceCallsPerThread )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( DataLoggingClientBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Simulated ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Service ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
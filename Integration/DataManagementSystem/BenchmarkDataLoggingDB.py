@@ -0,0 +1,173 @@
+""" DataLoggingDB ingest and queries: flat table against the table partitioned by month
+
+    - Ingest: sweepRecords synthetic records through addFileRecords, for each batch size, in
+      both layouts
+    - Growth: ingestRecords records spread over the last months, in batches of growthBatchSize;
+      at each checkpoint the ingest rate, getFileLoggingInfo on random LFNs (also restricted to
+      the last month in the partitioned layout) and getUniqueStates are timed; then the
+      retention purge of the oldest month: DELETE on the flat table, purgeRecords dropping the
+      partition
+
+    It supposes that the DataLoggingDB database is present, as for DataLoggingDBTests
+"""
+
+import random
+import datetime
+import unittest
+
+from DIRAC import gConfig
+from DIRAC.Core.Utilities import Time
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.DB.DataLoggingDB import DataLoggingDB
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.PartitionedDataLoggingDB import PartitionedDataLoggingDB, monthStart
+
+batchSizes = [10, 100, 1000, 10000]
+sweepRecords = 10 ** 5
+ingestRecords = 10 ** 7
+checkpoints = [10 ** 5, 10 ** 6, 10 ** 7]
+growthBatchSize = 10000
+# months covered by the records, the current one included
+months = 12
+recordsPerLFN = 10
+lookups = 100
+statuses = ['Upload', 'Register', 'Replicate', 'RemoveReplica', 'RemoveFile', 'Migrated', 'Staged']
+sources = ['FTSAgent', 'RequestExecutingAgent', 'ReplicaManager', 'TransferAgent']
+
+def makeRecords( first, number, start, end, total ):
+  """ records first to first + number of total, with times spread from start to end in order
+
+  :return: tuple of ( lfn, status, minor, date string, date, source ) as DataLoggingDBTests
+  """
+  step = ( end - start ).total_seconds() / total
+  records = []
+  for i in xrange( first, first + number ):
+    date = start + datetime.timedelta( seconds = i * step )
+    records.append( ( '/bench/%08d/File%d' % ( i // recordsPerLFN // 1000, i // recordsPerLFN ),
+                      statuses[i % len( statuses )], 'Bench', Time.toString( date ), date,
+                      sources[i % len( sources )] ) )
+  return tuple( records )
+
+def setUpModule():
+  initializeDIRAC()
+  gConfig.setOptionValue( "/DIRAC/Setup", "Test" )
+  gConfig.setOptionValue( "/DIRAC/Setups/Test/DataManagement", "Test" )
+  spath = "/Systems/DataManagement/Test/Databases/DataLoggingDB"
+  gConfig.setOptionValue( "%s/%s" % ( spath, "Host" ), "127.0.0.1" )
+  gConfig.setOptionValue( "%s/%s" % ( spath, "DBName" ), "AccountingDB" )
+  gConfig.setOptionValue( "%s/%s" % ( spath, "User" ), "Dirac" )
+  gConfig.setOptionValue( "%s/%s" % ( spath, "Password" ), "Dirac" )
+
+
+class DataLoggingDBBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the DataLoggingDB benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.end = datetime.datetime.utcnow()
+    self.start = monthStart( self.end, 1 - months )
+    self.layouts = ( ( 'flat', DataLoggingDB() ), ( 'partitioned', PartitionedDataLoggingDB() ) )
+
+  def tearDown( self ):
+    for _layout, db in self.layouts:
+      db._update( 'DROP TABLE IF EXISTS `%s`' % db.tableName )
+
+  def createTable( self, db ):
+    """ a new empty table for db
+    """
+    self.assert_( db._update( 'DROP TABLE IF EXISTS `%s`' % db.tableName )['OK'] )
+    if isinstance( db, PartitionedDataLoggingDB ):
+      result = db._createTable( self.start, months + 1 )
+    else:
+      result = db._createTable()
+    self.assert_( result['OK'], result.get( 'Message' ) )
+
+  def ingest( self, db, first, number, batchSize, total ):
+    """ add records first to first + number by batches of batchSize
+
+    :return: Timer
+    """
+    with Timer() as timer:
+      for offset in xrange( first, first + number, batchSize ):
+        records = makeRecords( offset, min( batchSize, first + number - offset ), self.start, self.end, total )
+        result = db.addFileRecords( records )
+        self.assert_( result['OK'], result.get( 'Message' ) )
+    return timer
+
+class Ingest( DataLoggingDBBenchmarkTestCase ):
+
+  def test_batchSizes( self ):
+    """ addFileRecords rate by batch size
+    """
+    rows = []
+    for batchSize in batchSizes:
+      row = [batchSize]
+      for _layout, db in self.layouts:
+        self.createTable( db )
+        timer = self.ingest( db, 0, sweepRecords, batchSize, sweepRecords )
+        row.append( sweepRecords / timer.wall )
+      rows.append( row )
+    printReport( "DataLoggingDB.addFileRecords: %d records, records/s" % sweepRecords,
+                 ( 'batch size', ) + tuple( [layout for layout, _db in self.layouts] ), rows )
+
+class Growth( DataLoggingDBBenchmarkTestCase ):
+
+  def test_growth( self ):
+    """ ingest, lookups and getUniqueStates as the table grows, then the purge of a month
+    """
+    rows = []
+    generator = random.Random( 1234 )
+    lastMonth = monthStart( self.end )
+    for layout, db in self.layouts:
+      self.createTable( db )
+      ingested = 0
+      for checkpoint in checkpoints:
+        timer = self.ingest( db, ingested, checkpoint - ingested, growthBatchSize, ingestRecords )
+        rate = ( checkpoint - ingested ) / timer.wall
+        ingested = checkpoint
+
+        lfns = [makeRecords( generator.randrange( ingested ), 1, self.start, self.end, ingestRecords )[0][0]
+                for _i in range( lookups )]
+        with Timer() as lookup:
+          for lfn in lfns:
+            result = db.getFileLoggingInfo( lfn )
+            self.assert_( result['OK'] )
+            self.assert_( result['Value'] )
+        recent = None
+        if isinstance( db, PartitionedDataLoggingDB ):
+          with Timer() as recent:
+            for lfn in lfns:
+              self.assert_( db.getFileLoggingInfo( lfn, since = lastMonth )['OK'] )
+        with Timer() as uniqueStates:
+          result = db.getUniqueStates()
+        self.assert_( result['OK'] )
+        self.assertEqual( sorted( result['Value'] ), sorted( statuses ) )
+        rows.append( ( layout, checkpoint, rate, lookup.wall * 1000. / lookups,
+                       recent.wall * 1000. / lookups if recent else '-', uniqueStates.wall * 1000., '-' ) )
+
+      purgeLimit = monthStart( self.start, 1 )
+      with Timer() as purge:
+        if isinstance( db, PartitionedDataLoggingDB ):
+          result = db.purgeRecords( purgeLimit )
+        else:
+          result = db._update( "DELETE FROM `%s` WHERE `StatusTime` < '%s'" % ( db.tableName,
+                                                                                purgeLimit.strftime( '%Y-%m-%d %H:%M:%S' ) ) )
+      self.assert_( result['OK'], result.get( 'Message' ) )
+      remaining = db._query( "SELECT COUNT(*) FROM `%s` WHERE `StatusTime` < '%s'" % ( db.tableName,
+                                                                                         purgeLimit.strftime( '%Y-%m-%d %H:%M:%S' ) ) )
+      self.assertEqual( remaining['Value'][0][0], 0 )
+      rows.append( ( layout, 'purge 1 month', '-', '-', '-', '-', purge.wall ) )
+    printReport( "DataLoggingDB growth over %d months, batches of %d" % ( months, growthBatchSize ),
+                 ( 'layout', 'records', 'records/s', 'ms/lookup', 'ms/lookup last month', 'ms/uniqueStates', 'purge s' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( DataLoggingDBBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Ingest ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Growth ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
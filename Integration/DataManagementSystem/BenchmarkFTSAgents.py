@@ -0,0 +1,199 @@
+""" FTS submission and monitoring throughput against a local FTS stand-in
+
+    The FTS tests only use fake server URLs. Here the FTSStandInServer plays the FTS server:
+    the jobs go through SUBMITTED, READY and ACTIVE, then end FINISHED, FINISHEDDIRTY or FAILED.
+
+    The agents are replayed with the FTSRESTClient:
+    - submission: concurrentJobs jobs of filesPerJob files, by submitThreads threads
+    - monitoring: cycles polling the state of all the jobs not final yet, by monitorThreads
+      threads, one job per request as the monitor agent does, or batchSize jobs per request;
+      the files of the jobs reaching a final state are fetched, to find the failed ones
+
+    Reported: jobs submitted per second, per-poll latency, monitoring cycle time and the number
+    of jobs one agent can track in a cycle of agentCycle seconds. No external service is needed.
+"""
+
+import time
+import unittest
+from multiprocessing.pool import ThreadPool
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.FTSStandIn import FTSStandInServer, FTSRESTClient, FTSTimeline, finalStates
+
+concurrentJobs = [100, 1000, 5000]
+filesPerJob = 10
+submitThreads = 8
+monitorThreads = 8
+batchSizes = [1, 100]
+# polling time of the monitoring agent
+agentCycle = 120.
+benchmarkTimeline = { 'submitted' : 1., 'ready' : 1., 'active' : 4., 'failed' : 0.05, 'finishedDirty' : 0.1 }
+
+def percentile( values, fraction ):
+  if not values:
+    return 0.
+  values = sorted( values )
+  return values[min( len( values ) - 1, int( fraction * len( values ) ) )]
+
+def submitJobs( client, jobNumber, fileNumber, threads ):
+  """ :return: [ job ID ]
+  """
+  def submit( index ):
+    files = [( 'srm://source.example.org/bench/%d/%d' % ( index, i ), 'srm://target.example.org/bench/%d/%d' % ( index, i ) )
+             for i in range( fileNumber )]
+    result = client.submit( files )
+    if not result['OK']:
+      raise RuntimeError( result['Message'] )
+    return result['Value']
+
+  pool = ThreadPool( threads )
+  try:
+    return pool.map( submit, range( jobNumber ) )
+  finally:
+    pool.close()
+    pool.join()
+
+def monitorCycle( client, jobIDs, threads, batchSize ):
+  """ one cycle of the monitor agent over jobIDs
+
+  :return: ( { job ID : [ file dict ] } for the jobs in a final state, [ poll latencies ] )
+  """
+  def poll( batch ):
+    start = time.time()
+    result = client.status( batch )
+    latency = time.time() - start
+    if not result['OK']:
+      raise RuntimeError( result['Message'] )
+    files = {}
+    for jobID, state in result['Value'].items():
+      if state in finalStates:
+        result = client.files( jobID )
+        if not result['OK']:
+          raise RuntimeError( result['Message'] )
+        files[jobID] = result['Value']
+    return latency, files
+
+  pool = ThreadPool( threads )
+  try:
+    results = pool.map( poll, [jobIDs[i:i + batchSize] for i in range( 0, len( jobIDs ), batchSize )] )
+  finally:
+    pool.close()
+    pool.join()
+  finalFiles = {}
+  for _latency, files in results:
+    finalFiles.update( files )
+  return finalFiles, [latency for latency, _files in results]
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class FTSAgentsBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the FTS stand-in test cases
+  """
+
+  timeline = FTSTimeline( **benchmarkTimeline )
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.server = FTSStandInServer( self.timeline )
+    self.server.start()
+    self.client = FTSRESTClient( self.server.url )
+
+  def tearDown( self ):
+    self.client.close()
+    self.server.stop()
+
+  def track( self, jobIDs, batchSize ):
+    """ monitor cycles until all the jobs are final
+
+    :return: ( { job ID : [ file dict ] }, [ cycle Timers ], [ poll latencies ], number of job states polled )
+    """
+    pending = list( jobIDs )
+    finalFiles = {}
+    cycles = []
+    latencies = []
+    polled = 0
+    while pending:
+      polled += len( pending )
+      with Timer() as cycle:
+        files, cycleLatencies = monitorCycle( self.client, pending, monitorThreads, batchSize )
+      cycles.append( cycle )
+      latencies += cycleLatencies
+      finalFiles.update( files )
+      pending = [jobID for jobID in pending if jobID not in files]
+      if pending:
+        time.sleep( 0.5 )
+    return finalFiles, cycles, latencies, polled
+
+class StandIn( FTSAgentsBenchmarkTestCase ):
+
+  timeline = FTSTimeline( submitted = 0.1, ready = 0.1, active = 0.3, failed = 0.2, finishedDirty = 0.3 )
+
+  def test_timeline( self ):
+    """ jobs and files states, cancellation and errors
+    """
+    self.assertEqual( self.timeline.jobState( 1, 0. ), 'SUBMITTED' )
+    self.assertEqual( self.timeline.jobState( 1, 10. ), self.timeline.finalState( 1 ) )
+
+    jobIDs = submitJobs( self.client, 50, 5, 4 )
+    self.assertEqual( len( set( jobIDs ) ), 50 )
+    jobIDs.append( submitJobs( self.client, 1, 5, 1 )[0] )
+    canceled = self.client.cancel( jobIDs[-1] )
+    self.assert_( canceled['OK'] )
+    self.assertEqual( canceled['Value']['job_state'], 'CANCELED' )
+
+    finalFiles = self.track( jobIDs, 10 )[0]
+    states = self.client.status( jobIDs )['Value']
+    self.assertEqual( set( states ), set( jobIDs ) )
+    self.assertEqual( states[jobIDs[-1]], 'CANCELED' )
+    for jobID, state in states.items():
+      self.assert_( state in finalStates )
+      fileStates = [ftsFile['file_state'] for ftsFile in finalFiles[jobID]]
+      self.assertEqual( len( fileStates ), 5 )
+      if state == 'FINISHEDDIRTY':
+        self.assert_( 'FAILED' in fileStates and 'FINISHED' in fileStates )
+      else:
+        self.assertEqual( set( fileStates ), set( [state] ) )
+    self.assertEqual( set( states.values() ), set( finalStates ) )
+
+    self.assertFalse( self.client.status( ['99999999'] )['OK'] )
+    self.assertFalse( self.client.request( 'POST', '/jobs', { 'files' : [] } )['OK'] )
+    # # the connection stays usable after an error
+    self.assertFalse( self.client.request( 'POST', '/nope', { 'files' : [] } )['OK'] )
+    self.assertEqual( self.client.status( jobIDs )['Value'], states )
+
+class Throughput( FTSAgentsBenchmarkTestCase ):
+
+  def test_submitAndMonitor( self ):
+    """ submission rate, poll latency and jobs tracked per agent cycle
+    """
+    rows = []
+    for jobNumber in concurrentJobs:
+      for batchSize in batchSizes:
+        with Timer() as submission:
+          jobIDs = submitJobs( self.client, jobNumber, filesPerJob, submitThreads )
+        finalFiles, cycles, latencies, polled = self.track( jobIDs, batchSize )
+        self.assertEqual( len( finalFiles ), jobNumber )
+
+        polls = len( latencies )
+        pollTime = sum( [cycle.wall for cycle in cycles] )
+        jobsPerSecond = polled / pollTime if pollTime else 0.
+        dirty = len( [files for files in finalFiles.values()
+                      if len( set( [ftsFile['file_state'] for ftsFile in files] ) ) > 1] )
+        rows.append( ( jobNumber, batchSize, jobNumber / submission.wall, len( cycles ), polls,
+                       sum( latencies ) * 1000. / polls, percentile( latencies, 0.95 ) * 1000.,
+                       max( [cycle.wall for cycle in cycles] ), int( jobsPerSecond * agentCycle ), dirty ) )
+    printReport( "FTS stand-in: %d files per job, %d submit and %d monitor threads" % ( filesPerJob, submitThreads,
+                                                                                     monitorThreads ),
+                 ( 'jobs', 'jobs/poll', 'submitted/s', 'cycles', 'polls', 'ms/poll', 'p95 ms', 'max cycle s',
+                   'jobs/%ds cycle' % agentCycle, 'dirty' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSAgentsBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( StandIn ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Throughput ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
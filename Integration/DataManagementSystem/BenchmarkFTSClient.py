@@ -0,0 +1,162 @@
+""" Benchmark of the FTS job registration and retrieval: one call per job against the bulk calls
+
+    FTS jobs with filesPerJob files each are put, peeked, got and deleted through the FTSManager
+    service, job by job with FTSClient, then with the BulkFTSClient. Without the bulk methods
+    in the FTSManager the BulkFTSClient falls back to one call per job over a kept connection.
+
+    It supposes that the FTSDB is present, and that the FTSManager service is running
+"""
+
+import uuid
+import random
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.Client.FTSFile import FTSFile
+from DIRAC.DataManagementSystem.Client.FTSJob import FTSJob
+from DIRAC.DataManagementSystem.Client.FTSClient import FTSClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.BulkFTSClient import BulkFTSClient
+
+# number of FTS jobs handled at each step
+jobNumbers = [1000, 10000, 100000]
+filesPerJob = [1, 10]
+ftsServer = 'https://fts22-t0-export.cern.ch:8443/glite-data-transfer-fts/services/FileTransfer'
+
+def makeFTSJobs( jobNumber, fileNumber, requestID ):
+  """ Submitted FTS jobs of fileNumber files each, all for requestID
+  """
+  ftsJobs = []
+  for i in xrange( jobNumber ):
+    ftsJob = FTSJob()
+    ftsJob.FTSGUID = str( uuid.uuid4() )
+    ftsJob.FTSServer = ftsServer
+    ftsJob.Status = 'Submitted'
+    ftsJob.OperationID = i
+    ftsJob.SourceSE = 'CERN-USER'
+    ftsJob.TargetSE = 'PIC-USER'
+    ftsJob.RequestID = requestID
+    for j in xrange( fileNumber ):
+      ftsFile = FTSFile()
+      ftsFile.FileID = i * fileNumber + j + 1
+      ftsFile.OperationID = i
+      ftsFile.LFN = '/bench/%d/%d/%d' % ( requestID, i, j )
+      ftsFile.Size = 1000000
+      ftsFile.SourceSE = ftsJob.SourceSE
+      ftsFile.TargetSE = ftsJob.TargetSE
+      ftsFile.SourceSURL = 'foo://source.bar.baz/%s' % ftsFile.LFN
+      ftsFile.TargetSURL = 'foo://target.bar.baz/%s' % ftsFile.LFN
+      ftsFile.Status = 'Waiting'
+      ftsFile.RequestID = requestID
+      ftsFile.Checksum = 'addler'
+      ftsFile.ChecksumType = 'adler32'
+      ftsFile.FTSGUID = ftsJob.FTSGUID
+      ftsJob.addFile( ftsFile )
+    ftsJobs.append( ftsJob )
+  return ftsJobs
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class FTSClientBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the FTS client benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.ftsClient = FTSClient()
+    self.bulkClient = BulkFTSClient()
+    self.requestIDs = []
+
+  def tearDown( self ):
+    for requestID in self.requestIDs:
+      ftsJobs = self.ftsClient.getFTSJobsForRequest( requestID )
+      if ftsJobs['OK'] and ftsJobs['Value']:
+        self.bulkClient.deleteFTSJobs( [ftsJob.FTSJobID for ftsJob in ftsJobs['Value']] )
+
+  def newRequestID( self ):
+    requestID = random.randint( 10 ** 8, 10 ** 9 )
+    self.requestIDs.append( requestID )
+    return requestID
+
+  def registeredIDs( self, requestID ):
+    """ IDs of the FTS jobs and files of the request
+    """
+    ftsJobs = self.ftsClient.getFTSJobsForRequest( requestID )
+    self.assert_( ftsJobs['OK'] )
+    ftsJobIDs = [ftsJob.FTSJobID for ftsJob in ftsJobs['Value']]
+    ftsFileIDs = [ftsFile.FTSFileID for ftsJob in ftsJobs['Value'] for ftsFile in ftsJob]
+    return ftsJobIDs, ftsFileIDs
+
+class LoopVersusBulk( FTSClientBenchmarkTestCase ):
+
+  def test_loopVersusBulk( self ):
+    """ put, peek, get and delete of N jobs, one call each against the bulk calls
+    """
+    rows = []
+    for fileNumber in filesPerJob:
+      for jobNumber in jobNumbers:
+        row = [jobNumber, fileNumber]
+
+        # # one call per job
+        requestID = self.newRequestID()
+        ftsJobs = makeFTSJobs( jobNumber, fileNumber, requestID )
+        with Timer() as put:
+          for ftsJob in ftsJobs:
+            self.assert_( self.ftsClient.putFTSJob( ftsJob )['OK'] )
+        ftsJobIDs, ftsFileIDs = self.registeredIDs( requestID )
+        self.assertEqual( len( ftsJobIDs ), jobNumber )
+        with Timer() as peek:
+          for ftsJobID in ftsJobIDs:
+            self.assert_( self.ftsClient.peekFTSJob( ftsJobID )['OK'] )
+        with Timer() as get:
+          for ftsJobID in ftsJobIDs:
+            self.assert_( self.ftsClient.getFTSJob( ftsJobID )['OK'] )
+        with Timer() as getFiles:
+          for ftsFileID in ftsFileIDs:
+            self.assert_( self.ftsClient.getFTSFile( ftsFileID )['OK'] )
+        with Timer() as delete:
+          for ftsJobID in ftsJobIDs:
+            self.assert_( self.ftsClient.deleteFTSJob( ftsJobID )['OK'] )
+        loop = ( put, peek, get, getFiles, delete )
+
+        # # bulk
+        requestID = self.newRequestID()
+        ftsJobs = makeFTSJobs( jobNumber, fileNumber, requestID )
+        with Timer() as put:
+          res = self.bulkClient.putFTSJobs( ftsJobs )
+        self.assert_( res['OK'] )
+        self.assertFalse( res['Value']['Failed'] )
+        ftsJobIDs, ftsFileIDs = self.registeredIDs( requestID )
+        self.assertEqual( len( ftsJobIDs ), jobNumber )
+        with Timer() as peek:
+          res = self.bulkClient.peekFTSJobs( ftsJobIDs )
+        self.assertEqual( len( res['Value']['Successful'] ), jobNumber )
+        with Timer() as get:
+          res = self.bulkClient.getFTSJobs( ftsJobIDs )
+        self.assertEqual( len( res['Value']['Successful'] ), jobNumber )
+        self.assertEqual( sum( [len( ftsJob ) for ftsJob in res['Value']['Successful'].values()] ), jobNumber * fileNumber )
+        with Timer() as getFiles:
+          res = self.bulkClient.getFTSFiles( ftsFileIDs )
+        self.assertEqual( len( res['Value']['Successful'] ), len( ftsFileIDs ) )
+        with Timer() as delete:
+          res = self.bulkClient.deleteFTSJobs( ftsJobIDs )
+        self.assertFalse( res['Value']['Failed'] )
+        bulk = ( put, peek, get, getFiles, delete )
+
+        for loopTimer, bulkTimer in zip( loop, bulk ):
+          row += [loopTimer.wall, bulkTimer.wall]
+        rows.append( row )
+
+    printReport( "FTSManager: one call per job vs bulk calls (wall seconds), bulk methods: %s" % self.bulkClient.bulkMethods,
+                 ( 'jobs', 'files/job', 'put', 'bulk', 'peek', 'bulk', 'get', 'bulk', 'getFiles', 'bulk', 'delete', 'bulk' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSClientBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( LoopVersusBulk ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
@@ -0,0 +1,157 @@
+""" Scaling of FTSGraph against IndexedFTSGraph with the number of sites
+
+    Synthetic sites, with sesPerSite SEs each, are added to the graphs, each site having routes
+    to itself and to the next channelsPerSite - 1 sites. For each number of sites reported:
+    - construction: wall time and resident memory to add the sites and routes
+    - lookups: microseconds per findSiteForSE and per findRoute, for random SEs and channels
+    - history: updateHistory with changedFraction of the views changed, against the
+      construction of a new graph from the history, as done at each scheduling cycle
+
+    The sites of the CS are in the graphs too, the lookups are done on the synthetic ones.
+"""
+
+import gc
+import random
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.private.FTSGraph import FTSGraph, Site, Route
+from DIRAC.DataManagementSystem.private.FTSHistoryView import FTSHistoryView
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport, residentMemory
+from TestDIRAC.Utilities.FTSRoutingIndex import IndexedFTSGraph, routeCounters
+
+siteNumbers = [10, 100, 300, 1000]
+sesPerSite = 3
+channelsPerSite = 50
+lookups = 10000
+changedFraction = 0.01
+ftsServer = "https://fts.example.org:8443/glite-data-transfer-fts/services/FileTransfer"
+
+def siteName( index ):
+  return 'BENCH%04d.org' % index
+
+def seName( index, seIndex ):
+  return 'BENCH%04d-SE%d' % ( index, seIndex )
+
+def addSites( graph, siteNumber ):
+  """ add the synthetic sites and their routes to graph
+  """
+  sites = []
+  for index in range( siteNumber ):
+    site = Site( siteName( index ), { 'MaxActiveJobs' : 50 },
+                 { 'SEs' : [seName( index, seIndex ) for seIndex in range( sesPerSite )], 'ServerURI' : ftsServer } )
+    graph.addNode( site )
+    sites.append( site )
+  for index, fromSite in enumerate( sites ):
+    for offset in range( min( channelsPerSite, siteNumber ) ):
+      toSite = sites[( index + offset ) % siteNumber]
+      rwAttrs = dict.fromkeys( routeCounters, 0 )
+      rwAttrs.update( { 'FilePut' : 0., 'ThroughPut' : 0. } )
+      graph.addEdge( Route( fromSite, toSite, rwAttrs, { 'routeName' : '%s#%s' % ( fromSite.name, toSite.name ) } ) )
+
+def channels( siteNumber, number ):
+  """ random ( source SE, target SE ) pairs of existing routes
+  """
+  pairs = []
+  for _i in xrange( number ):
+    index = random.randrange( siteNumber )
+    offset = random.randrange( min( channelsPerSite, siteNumber ) )
+    pairs.append( ( seName( index, random.randrange( sesPerSite ) ),
+                    seName( ( index + offset ) % siteNumber, random.randrange( sesPerSite ) ) ) )
+  return pairs
+
+def historyViews( siteNumber, files = 100 ):
+  """ one Finished and one Active view per route, the SEs of the first of each site
+  """
+  views = []
+  for index in range( siteNumber ):
+    for offset in range( min( channelsPerSite, siteNumber ) ):
+      for status in ( 'Finished', 'Active' ):
+        views.append( FTSHistoryView( { 'SourceSE' : seName( index, 0 ),
+                                        'TargetSE' : seName( ( index + offset ) % siteNumber, 0 ),
+                                        'FTSServer' : ftsServer, 'Status' : status, 'FTSJobs' : 1,
+                                        'Files' : files, 'Size' : files * 1000, 'FailedFiles' : 0,
+                                        'FailedSize' : 0, 'Completeness' : 50 } ) )
+  return views
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class FTSGraphBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the FTSGraph benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    random.seed( 1234 )
+
+  def tearDown( self ):
+    pass
+
+  def buildGraph( self, graphClass, siteNumber ):
+    """ graph with the synthetic sites
+
+    :return: ( graph, construction Timer, resident memory added in bytes )
+    """
+    gc.collect()
+    memory = residentMemory()
+    with Timer() as timer:
+      graph = graphClass( 'ftsGraph' )
+      addSites( graph, siteNumber )
+    gc.collect()
+    return graph, timer, residentMemory() - memory
+
+class Scaling( FTSGraphBenchmarkTestCase ):
+
+  def test_lookups( self ):
+    """ construction, memory and lookup latency of both graphs
+    """
+    rows = []
+    for siteNumber in siteNumbers:
+      pairs = channels( siteNumber, lookups )
+      for graphClass in ( FTSGraph, IndexedFTSGraph ):
+        graph, construction, memory = self.buildGraph( graphClass, siteNumber )
+        with Timer() as siteLookups:
+          for sourceSE, _targetSE in pairs:
+            self.assert_( graph.findSiteForSE( sourceSE )['OK'] )
+        with Timer() as routeLookups:
+          for sourceSE, targetSE in pairs:
+            self.assert_( graph.findRoute( sourceSE, targetSE )['OK'] )
+        self.assertFalse( graph.findRoute( 'UNKNOWN-SE', pairs[0][1] )['OK'] )
+        rows.append( ( siteNumber, graphClass.__name__, len( graph.edges() ), construction.wall,
+                       memory / 1024. / 1024., siteLookups.wall * 1e6 / lookups, routeLookups.wall * 1e6 / lookups ) )
+        del graph
+    printReport( "FTSGraph: %d SEs per site, %d channels per site, %d lookups" % ( sesPerSite, channelsPerSite, lookups ),
+                 ( 'sites', 'graph', 'routes', 'build s', 'MB', 'us/findSiteForSE', 'us/findRoute' ), rows )
+
+  def test_history( self ):
+    """ incremental history update against a new graph
+    """
+    rows = []
+    for siteNumber in siteNumbers:
+      views = historyViews( siteNumber )
+      graph, _construction, _memory = self.buildGraph( IndexedFTSGraph, siteNumber )
+      with Timer() as full:
+        self.assert_( graph.updateHistory( views )['OK'] )
+      for ftsHistory in random.sample( views, max( 1, int( len( views ) * changedFraction ) ) ):
+        ftsHistory.Files += 1
+      with Timer() as incremental:
+        result = graph.updateHistory( views )
+      self.assert_( result['OK'] )
+      route = graph.findRoute( views[0].SourceSE, views[0].TargetSE )['Value']
+      self.assert_( route.FinishedJobs >= 1 and route.ActiveJobs >= 1 )
+      with Timer() as newGraph:
+        self.buildGraph( IndexedFTSGraph, siteNumber )[0].updateHistory( views )
+      rows.append( ( siteNumber, len( views ), result['Value'], full.wall, incremental.wall, newGraph.wall ) )
+      del graph
+    printReport( "FTSGraph history: %.0f%% of the views changed" % ( changedFraction * 100 ),
+                 ( 'sites', 'views', 'routes updated', 'first update', 'incremental', 'new graph' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSGraphBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Scaling ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
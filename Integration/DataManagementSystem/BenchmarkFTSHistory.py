@@ -0,0 +1,199 @@
+""" Cost of the FTS history: recomputed over all the FTS jobs against the incremental aggregate
+
+    - Consistency: FTSHistoryAggregate against a recomputation over all the jobs, after random
+      state changes, deletions and the expiry of the window
+    - InMemory: the history recomputed by a scan of all the jobs, as the FTSHistoryView of the
+      FTSDB does, against FTSHistoryAggregate.getFTSHistory, up to 10^7 files; with the cost
+      of an update of the aggregate per job state change
+    - FTSDB: FTSClient.getFTSHistory as the FTSDB grows to 10^6 files, against the aggregate
+      fed with the same jobs
+
+    The FTSDB test case supposes that the DB is present, and that the FTSManager service is running
+"""
+
+import time
+import random
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.Client.FTSClient import FTSClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.BulkFTSClient import BulkFTSClient
+from TestDIRAC.Utilities.FTSHistoryAggregate import FTSHistoryAggregate, historyCounters
+from TestDIRAC.Integration.DataManagementSystem.BenchmarkFTSClient import makeFTSJobs
+
+inMemoryFileNumbers = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+dbFileNumbers = [10 ** 4, 10 ** 5, 10 ** 6]
+filesPerJob = 100
+historyCalls = 20
+ses = ['CERN-USER', 'RAL-USER', 'PIC-USER', 'GRIDKA-USER', 'IN2P3-USER']
+statuses = ['Submitted', 'Ready', 'Active', 'Finished', 'FinishedDirty', 'Failed']
+ftsServer = 'https://fts22-t0-export.cern.ch:8443/glite-data-transfer-fts/services/FileTransfer'
+
+class SyntheticJob( object ):
+  """ the FTSJob attributes used by the history
+  """
+  __slots__ = ( 'FTSJobID', 'FTSGUID', 'SourceSE', 'TargetSE', 'FTSServer', 'Status', 'LastUpdate',
+                'Files', 'Size', 'FailedFiles', 'FailedSize' )
+
+  def __init__( self, ftsJobID, generator, lastUpdate ):
+    self.FTSJobID = ftsJobID
+    self.FTSGUID = None
+    self.SourceSE, self.TargetSE = generator.sample( ses, 2 )
+    self.FTSServer = ftsServer
+    self.Files = filesPerJob
+    self.Size = filesPerJob * 1000000
+    self.setStatus( generator.choice( statuses ), lastUpdate )
+
+  def setStatus( self, status, lastUpdate ):
+    self.Status = status
+    self.LastUpdate = lastUpdate
+    self.FailedFiles = self.Files if status == 'Failed' else ( 1 if status == 'FinishedDirty' else 0 )
+    self.FailedSize = self.FailedFiles * 1000000
+
+def recomputeHistory( ftsJobs, now, window = 3600 ):
+  """ the history as the FTSHistoryView computes it, over all the jobs
+
+  :return: { ( SourceSE, TargetSE, Status ) : [ FTSJobs, Files, Size, FailedFiles, FailedSize ] }
+  """
+  history = {}
+  for ftsJob in ftsJobs:
+    if ftsJob.LastUpdate <= now - window:
+      continue
+    counters = history.setdefault( ( ftsJob.SourceSE, ftsJob.TargetSE, ftsJob.Status ), [0] * ( len( historyCounters ) + 1 ) )
+    counters[0] += 1
+    for i, name in enumerate( historyCounters ):
+      counters[i + 1] += getattr( ftsJob, name )
+  return history
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class FTSHistoryBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the FTS history test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.generator = random.Random( 1234 )
+
+  def tearDown( self ):
+    pass
+
+class Consistency( FTSHistoryBenchmarkTestCase ):
+
+  def test_consistency( self ):
+    """ the aggregate follows the state changes, deletions and the window
+    """
+    # # the buckets are aligned on the minutes: compare at bucket boundaries
+    now = 1000020.
+    aggregate = FTSHistoryAggregate( window = 3600, bucketSize = 60 )
+    ftsJobs = {}
+    for ftsJobID in range( 1, 2001 ):
+      ftsJob = SyntheticJob( ftsJobID, self.generator, now - self.generator.uniform( 0, 7200 ) )
+      ftsJobs[ftsJobID] = ftsJob
+      aggregate.update( ftsJob, now )
+    self.assertEqual( aggregate.history( now ), recomputeHistory( ftsJobs.values(), now ) )
+
+    for step in range( 1, 11 ):
+      now += 600
+      for ftsJob in self.generator.sample( ftsJobs.values(), 200 ):
+        ftsJob.setStatus( self.generator.choice( statuses ), now - self.generator.uniform( 0, 300 ) )
+        aggregate.update( ftsJob, now )
+      for ftsJobID in self.generator.sample( ftsJobs.keys(), 20 ):
+        del ftsJobs[ftsJobID]
+        aggregate.remove( ftsJobID )
+      boundary = now + 60 * step
+      self.assertEqual( aggregate.history( boundary ), recomputeHistory( ftsJobs.values(), boundary ),
+                        "history differs after step %d" % step )
+
+    views = aggregate.getFTSHistory( boundary )
+    self.assert_( views['OK'] )
+    self.assertEqual( sum( [view.FTSJobs for view in views['Value']] ),
+                      sum( [counters[0] for counters in recomputeHistory( ftsJobs.values(), boundary ).values()] ) )
+
+class InMemory( FTSHistoryBenchmarkTestCase ):
+
+  def test_inMemory( self ):
+    """ recomputed history against the aggregate, up to 10^7 files
+    """
+    rows = []
+    now = time.time()
+    for fileNumber in inMemoryFileNumbers:
+      jobNumber = fileNumber / filesPerJob
+      aggregate = FTSHistoryAggregate()
+      ftsJobs = [SyntheticJob( ftsJobID, self.generator, now - self.generator.uniform( 0, 3000 ) )
+                 for ftsJobID in xrange( 1, jobNumber + 1 )]
+      with Timer() as build:
+        for ftsJob in ftsJobs:
+          aggregate.update( ftsJob, now )
+      changed = self.generator.sample( ftsJobs, max( 1, jobNumber / 10 ) )
+      with Timer() as updates:
+        for ftsJob in changed:
+          ftsJob.setStatus( self.generator.choice( statuses ), now )
+          aggregate.update( ftsJob, now )
+      with Timer() as recomputed:
+        for _i in range( historyCalls ):
+          reference = recomputeHistory( ftsJobs, now )
+      with Timer() as incremental:
+        for _i in range( historyCalls ):
+          history = aggregate.history( now )
+      self.assertEqual( history, reference )
+      rows.append( ( fileNumber, jobNumber, build.wall, updates.wall * 1e6 / len( changed ),
+                     recomputed.wall * 1000. / historyCalls, incremental.wall * 1000. / historyCalls ) )
+    printReport( "FTS history in memory: %d files per job, ms per history" % filesPerJob,
+                 ( 'files', 'jobs', 'aggregate build s', 'us/update', 'recomputed ms', 'incremental ms' ), rows )
+
+class FTSDB( FTSHistoryBenchmarkTestCase ):
+
+  def setUp( self ):
+    super( FTSDB, self ).setUp()
+    self.ftsClient = FTSClient()
+    self.bulkClient = BulkFTSClient()
+    self.requestID = random.randint( 10 ** 8, 10 ** 9 )
+
+  def tearDown( self ):
+    ftsJobs = self.ftsClient.getFTSJobsForRequest( self.requestID )
+    if ftsJobs['OK'] and ftsJobs['Value']:
+      self.bulkClient.deleteFTSJobs( [ftsJob.FTSJobID for ftsJob in ftsJobs['Value']] )
+
+  def test_ftsDB( self ):
+    """ getFTSHistory as the FTSDB grows, against the aggregate fed with the same jobs
+    """
+    rows = []
+    aggregate = FTSHistoryAggregate()
+    registered = 0
+    for fileNumber in dbFileNumbers:
+      ftsJobs = makeFTSJobs( ( fileNumber - registered ) / filesPerJob, filesPerJob, self.requestID )
+      for ftsJob in ftsJobs:
+        ftsJob.Files = len( ftsJob )
+        ftsJob.Size = sum( [ftsFile.Size for ftsFile in ftsJob] )
+      res = self.bulkClient.putFTSJobs( ftsJobs )
+      self.assert_( res['OK'] )
+      self.assertFalse( res['Value']['Failed'] )
+      for ftsJob in ftsJobs:
+        aggregate.update( ftsJob )
+      registered = fileNumber
+
+      with Timer() as recomputed:
+        for _i in range( historyCalls ):
+          res = self.ftsClient.getFTSHistory()
+          self.assert_( res['OK'] )
+      with Timer() as incremental:
+        for _i in range( historyCalls ):
+          self.assert_( aggregate.getFTSHistory()['OK'] )
+      rows.append( ( fileNumber, fileNumber / filesPerJob, recomputed.wall * 1000. / historyCalls,
+                     incremental.wall * 1000. / historyCalls ) )
+    printReport( "FTS history from the FTSDB: %d files per job, ms per history" % filesPerJob,
+                 ( 'files', 'jobs', 'getFTSHistory ms', 'incremental ms' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSHistoryBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Consistency ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( InMemory ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( FTSDB ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
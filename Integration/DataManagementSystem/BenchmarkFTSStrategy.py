@@ -0,0 +1,102 @@
+""" Comparison of the FTS scheduling strategies, offline
+
+    FTSClientMix cannot test ftsSchedule, the FTSStrategy object living in the FTSManager service.
+    Here the strategies of FTSStrategy are run in-process with FTSSimulator: synthetic
+    FTSHistoryViews give the throughput of the channels between the SEs, replica maps like
+    the getActiveReplicas ones of TestClientFTS give the source SEs of the files to replicate.
+
+    Reported for each strategy and number of files: scheduling decisions per second, load
+    balance of the channels and simulated makespan. Random and EarliestFinish are references
+    for the worst and the best of the file by file schedules.
+
+    The SEs must be defined in the CS, as for TestClientFTS.
+"""
+
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.DataManagementSystem.Client.FTSSite import FTSSite
+from DIRAC.DataManagementSystem.private.FTSStrategy import FTSStrategy
+
+from TestDIRAC.Utilities.Benchmark import printReport
+from TestDIRAC.Utilities.FTSSimulator import FTSSimulator, NamedFTSStrategy, RandomStrategy, EarliestFinishStrategy, \
+                                             syntheticChannels, syntheticHistory, syntheticReplicas, workloadFromReplicas
+
+ses = ['CERN-USER', 'RAL-USER', 'PIC-USER']
+targetSEs = ['PIC-USER']
+ftsStrategies = ['Simple', 'DynamicThroughput', 'Swarm', 'MinimiseTotalWait']
+fileNumbers = [1000, 10000, 100000]
+fileSize = 1000000000
+ftsServer = 'https://fts22-t0-export.cern.ch:8443/glite-data-transfer-fts/services/FileTransfer'
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class FTSStrategyBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the FTS strategy benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.channels = syntheticChannels( ses )
+    self.ftsHistoryViews = syntheticHistory( self.channels, ftsServer )
+    self.ftsSites = [ FTSSite( ftsServer = ftsServer, name = 'CERN.ch' ),
+                      FTSSite( ftsServer = 'https://fts.pic.es:8443/glite-data-transfer-fts/services/FileTransfer', name = 'PIC.es' ),
+                      FTSSite( ftsServer = 'https://lcgfts.gridpp.rl.ac.uk:8443/glite-data-transfer-fts/services/FileTransfer', name = 'RAL.uk' ) ]
+
+  def tearDown( self ):
+    pass
+
+  def strategies( self, simulator ):
+    """ ( name, strategy ) to compare, the FTSStrategy ones with a graph fresh from the history
+    """
+    strategies = [( 'Random', RandomStrategy() ), ( 'EarliestFinish', EarliestFinishStrategy( simulator ) )]
+    for name in ftsStrategies:
+      ftsStrategy = FTSStrategy( ftsSites = self.ftsSites, ftsHistoryViews = self.ftsHistoryViews )
+      strategies.append( ( name, NamedFTSStrategy( ftsStrategy, name ) ) )
+    return strategies
+
+class Simulator( FTSStrategyBenchmarkTestCase ):
+
+  def test_simulator( self ):
+    """ every file is transferred once per target, the makespan bounds the channel loads
+    """
+    simulator = FTSSimulator( self.channels )
+    workload = workloadFromReplicas( syntheticReplicas( 1000, ses ), targetSEs, fileSize )
+    for name, strategy in ( ( 'Random', RandomStrategy() ), ( 'EarliestFinish', EarliestFinishStrategy( simulator ) ) ):
+      result = simulator.run( strategy, workload )
+      self.assert_( result['OK'] )
+      summary = result['Value']
+      self.assertEqual( summary['Failed'], 0, name )
+      self.assertEqual( sum( summary['ChannelFiles'].values() ), sum( [len( item[3] ) for item in workload] ) )
+      busiest = max( [summary['ChannelBytes'][channel] / self.channels[channel] for channel in summary['ChannelBytes']] )
+      self.assertAlmostEqual( summary['Makespan'], busiest, 3 )
+
+class Strategies( FTSStrategyBenchmarkTestCase ):
+
+  def test_strategies( self ):
+    """ decisions/s, load balance and makespan of each strategy
+    """
+    rows = []
+    for fileNumber in fileNumbers:
+      workload = workloadFromReplicas( syntheticReplicas( fileNumber, ses ), targetSEs, fileSize )
+      simulator = FTSSimulator( self.channels )
+      for name, strategy in self.strategies( simulator ):
+        result = simulator.run( strategy, workload )
+        self.assert_( result['OK'] )
+        summary = result['Value']
+        rows.append( ( fileNumber, name, summary['Decisions'], summary['Failed'], summary['DecisionsPerSecond'],
+                       len( summary['ChannelFiles'] ), summary['LoadImbalance'], summary['Fairness'],
+                       summary['Makespan'] / 3600. ) )
+    printReport( "FTS strategies: %s -> %s, files of %d bytes" % ( ','.join( ses ), ','.join( targetSEs ), fileSize ),
+                 ( 'files', 'strategy', 'decisions', 'failed', 'decisions/s', 'channels', 'max/mean',
+                   'fairness', 'makespan h' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSStrategyBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Simulator ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Strategies ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
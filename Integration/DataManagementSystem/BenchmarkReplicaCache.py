@@ -0,0 +1,263 @@
+""" Hit rate and latency of the ReplicaCache on a replayed LFN access trace
+
+    A trace is a list of agent cycles ( time, agent, [ [ lfn ] ] ), each list of LFNs of a
+    cycle being one getActiveReplicas call. The synthetic trace mixes:
+    - a transformation agent resolving many new files by batches
+    - a request executing agent resolving files one by one, often recent ones
+    - an FTS agent resolving again the files of the transfers it schedules and monitors
+    new files appear all along, the recent ones are the most resolved. Set traceFile to replay
+    a recorded trace instead, one call per line: "<time> <agent> <lfn>[,<lfn>...]".
+
+    The trace is replayed against a simulated ReplicaManager answering after roundTrip seconds
+    plus perLFN seconds per LFN, on the clock of the trace: without cache, then through
+    ReplicaCache for several TTLs and sizes, with and without prefetch at each cycle start.
+    Reported: hit rate, getActiveReplicas calls and LFNs sent to the service, mean and 95th
+    percentile latency per call, simulated service time and prefetch included. No external
+    service is needed.
+"""
+
+import time
+import random
+import unittest
+
+from DIRAC import S_OK
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from TestDIRAC.Utilities.Benchmark import printReport
+from TestDIRAC.Utilities.ReplicaCache import ReplicaCache
+
+# recorded trace to replay, the synthetic one when None
+traceFile = None
+traceDuration = 6 * 3600
+ttls = [60, 300, 900]
+cacheSizes = [10 ** 3, 10 ** 4, 10 ** 5]
+roundTrip = 0.02
+perLFN = 0.0002
+ses = ['CERN-USER', 'RAL-USER', 'PIC-USER', 'GRIDKA-USER', 'IN2P3-USER']
+# name, period, LFNs per cycle, LFNs per call
+traceAgents = ( ( 'Transformation', 300, 2000, 100 ),
+                ( 'RequestExecuting', 60, 200, 1 ),
+                ( 'FTS', 120, 500, 1 ) )
+activeFiles = 20000
+newFilesPerSecond = 2
+
+def syntheticTrace( duration = traceDuration, seed = 1234 ):
+  """ :return: [ ( time, agent, [ [ lfn ] ] ) ]
+  """
+  generator = random.Random( seed )
+  trace = []
+  for now in xrange( 0, duration, 30 ):
+    newest = activeFiles + now * newFilesPerSecond
+    for agent, period, lfnNumber, lfnsPerCall in traceAgents:
+      if now % period:
+        continue
+      # # skewed towards the newest files
+      lfns = ['/trace/%d/%d' % ( index // 1000, index )
+              for index in [newest - int( activeFiles * generator.random() ** 3 ) for _i in xrange( lfnNumber )]]
+      trace.append( ( now, agent, [lfns[i:i + lfnsPerCall] for i in xrange( 0, len( lfns ), lfnsPerCall )] ) )
+  return trace
+
+def loadTrace( path ):
+  """ :return: [ ( time, agent, [ [ lfn ] ] ) ], the successive calls of an agent at the same time
+               form a cycle
+  """
+  trace = []
+  for line in open( path ):
+    fields = line.split()
+    if len( fields ) != 3 or fields[0].startswith( '#' ):
+      continue
+    now, agent, lfns = float( fields[0] ), fields[1], fields[2].split( ',' )
+    if trace and trace[-1][:2] == ( now, agent ):
+      trace[-1][2].append( lfns )
+    else:
+      trace.append( ( now, agent, [lfns] ) )
+  return trace
+
+def percentile( values, fraction ):
+  if not values:
+    return 0.
+  values = sorted( values )
+  return values[min( len( values ) - 1, int( fraction * len( values ) ) )]
+
+class SimulatedReplicaManager( object ):
+  """ getActiveReplicas taking roundTrip + perLFN * LFNs simulated seconds
+  """
+
+  def __init__( self ):
+    self.calls = 0
+    self.lfns = 0
+    self.serviceTime = 0.
+    self.replicas = {}
+
+  def getActiveReplicas( self, lfns ):
+    self.calls += 1
+    self.lfns += len( lfns )
+    self.serviceTime += roundTrip + perLFN * len( lfns )
+    successful = {}
+    for lfn in lfns:
+      if lfn not in self.replicas:
+        se = ses[hash( lfn ) % len( ses )]
+        self.replicas[lfn] = { se : '/%s%s' % ( se.lower(), lfn ) }
+      successful[lfn] = dict( self.replicas[lfn] )
+    return S_OK( { 'Successful' : successful, 'Failed' : {} } )
+
+class SimulatedCatalog( object ):
+  """ addReplica and removeReplica on the replicas of a SimulatedReplicaManager
+  """
+
+  def __init__( self, replicaManager ):
+    self.replicaManager = replicaManager
+
+  def addReplica( self, lfns ):
+    for lfn, info in lfns.items():
+      self.replicaManager.replicas.setdefault( lfn, {} )[info['SE']] = info['PFN']
+    return S_OK( { 'Successful' : dict.fromkeys( lfns, True ), 'Failed' : {} } )
+
+  def removeReplica( self, lfns ):
+    for lfn, info in lfns.items():
+      self.replicaManager.replicas.get( lfn, {} ).pop( info['SE'], None )
+    return S_OK( { 'Successful' : dict.fromkeys( lfns, True ), 'Failed' : {} } )
+
+def replay( trace, makeCache = None, prefetch = False ):
+  """ replay trace through makeCache( replicaManager, clock ), or on the replica manager directly
+
+  :return: ( [ call latencies ], replicaManager, cache ), the prefetch of a cycle is counted in
+           the latency of its first call
+  """
+  replicaManager = SimulatedReplicaManager()
+  clock = [0.]
+  cache = makeCache( replicaManager, lambda: clock[0] ) if makeCache else None
+  client = cache if cache else replicaManager
+  latencies = []
+  for now, _agent, calls in trace:
+    clock[0] = now
+    serviceTime = replicaManager.serviceTime
+    start = time.time()
+    if prefetch:
+      cache.prefetch( [lfn for lfns in calls for lfn in lfns] )
+    for lfns in calls:
+      result = client.getActiveReplicas( lfns )
+      latencies.append( time.time() - start + replicaManager.serviceTime - serviceTime )
+      serviceTime = replicaManager.serviceTime
+      start = time.time()
+      if not result['OK'] or len( result['Value']['Successful'] ) != len( set( lfns ) ):
+        raise RuntimeError( "getActiveReplicas failed for %s" % lfns )
+  return latencies, replicaManager, cache
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class ReplicaCacheBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the ReplicaCache test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.now = 1000.
+    self.replicaManager = SimulatedReplicaManager()
+    self.cache = ReplicaCache( self.replicaManager, SimulatedCatalog( self.replicaManager ), ttl = 60,
+                               maxEntries = 3, chunkSize = 10, clock = lambda: self.now )
+
+  def tearDown( self ):
+    pass
+
+class Cache( ReplicaCacheBenchmarkTestCase ):
+
+  def test_ttlAndLRU( self ):
+    """ expiry after ttl, least recently used evicted first
+    """
+    self.cache.getActiveReplicas( ['/a', '/b'] )
+    self.assertEqual( self.replicaManager.calls, 1 )
+    result = self.cache.getActiveReplicas( '/a' )
+    self.assertEqual( result['Value']['Successful'].keys(), ['/a'] )
+    self.assertEqual( self.replicaManager.calls, 1 )
+    self.assertEqual( ( self.cache.hits, self.cache.misses ), ( 1, 2 ) )
+
+    # # /b is the least recently used
+    self.cache.getActiveReplicas( ['/c', '/d'] )
+    self.assertEqual( self.cache.size(), 3 )
+    self.assertEqual( self.cache.evictions, 1 )
+    calls = self.replicaManager.calls
+    self.cache.getActiveReplicas( ['/a', '/c', '/d'] )
+    self.assertEqual( self.replicaManager.calls, calls )
+    self.cache.getActiveReplicas( '/b' )
+    self.assertEqual( self.replicaManager.calls, calls + 1 )
+
+    self.now += 61
+    self.cache.getActiveReplicas( '/b' )
+    self.assertEqual( self.replicaManager.calls, calls + 2 )
+
+  def test_invalidation( self ):
+    """ addReplica, removeReplica and changes during a fetch
+    """
+    before = self.cache.getActiveReplicas( '/a' )['Value']['Successful']['/a']
+    self.assertEqual( self.cache.addReplica( { '/a' : { 'PFN' : '/new/a', 'SE' : 'NEW-USER' } } )['OK'], True )
+    after = self.cache.getActiveReplicas( '/a' )['Value']['Successful']['/a']
+    self.assertEqual( after, dict( before, **{ 'NEW-USER' : '/new/a' } ) )
+    self.cache.removeReplica( { '/a' : { 'SE' : 'NEW-USER' } } )
+    self.assertEqual( self.cache.getActiveReplicas( '/a' )['Value']['Successful']['/a'], before )
+    self.assertEqual( self.replicaManager.calls, 3 )
+
+    # # the replicas change while they are fetched: the answer is not kept
+    getActiveReplicas = self.replicaManager.getActiveReplicas
+    def changing( lfns ):
+      result = getActiveReplicas( lfns )
+      self.cache.invalidate( lfns )
+      return result
+    self.replicaManager.getActiveReplicas = changing
+    self.cache.getActiveReplicas( '/b' )
+    self.replicaManager.getActiveReplicas = getActiveReplicas
+    self.cache.getActiveReplicas( '/b' )
+    self.assertEqual( self.replicaManager.calls, 5 )
+
+    self.cache.invalidate()
+    self.assertEqual( self.cache.size(), 0 )
+
+  def test_prefetch( self ):
+    """ bulk prefetch by chunks, then only hits
+    """
+    self.cache.maxEntries = 100
+    lfns = ['/p/%d' % i for i in range( 35 )]
+    self.assertEqual( self.cache.prefetch( lfns + lfns[:5] )['Value'], 35 )
+    self.assertEqual( self.replicaManager.calls, 4 )
+    for lfn in lfns:
+      self.cache.getActiveReplicas( lfn )
+    self.assertEqual( self.replicaManager.calls, 4 )
+    self.assertEqual( self.cache.hitRate(), 1. )
+    self.assertEqual( self.cache.prefetch( lfns )['Value'], 0 )
+
+class Trace( ReplicaCacheBenchmarkTestCase ):
+
+  def test_replay( self ):
+    """ hit rate and latency per call, without cache and through ReplicaCache
+    """
+    trace = loadTrace( traceFile ) if traceFile else syntheticTrace()
+    calls = sum( [len( cycle[2] ) for cycle in trace] )
+    lookups = sum( [len( lfns ) for cycle in trace for lfns in cycle[2]] )
+    rows = []
+    latencies, replicaManager, _cache = replay( trace )
+    rows.append( ( '-', '-', '-', 0., replicaManager.calls, replicaManager.lfns, sum( latencies ) * 1000. / calls,
+                   percentile( latencies, 0.95 ) * 1000., replicaManager.serviceTime ) )
+    uncachedTime = replicaManager.serviceTime
+    for ttl in ttls:
+      for maxEntries in cacheSizes:
+        for prefetch in ( False, True ):
+          makeCache = lambda replicaManager, clock: ReplicaCache( replicaManager, ttl = ttl, maxEntries = maxEntries,
+                                                                   clock = clock )
+          latencies, replicaManager, cache = replay( trace, makeCache, prefetch )
+          self.assert_( replicaManager.serviceTime < uncachedTime )
+          rows.append( ( ttl, maxEntries, prefetch, cache.hitRate(), replicaManager.calls, replicaManager.lfns,
+                         sum( latencies ) * 1000. / calls, percentile( latencies, 0.95 ) * 1000.,
+                         replicaManager.serviceTime ) )
+    printReport( "getActiveReplicas replay: %d cycles, %d calls, %d LFN lookups, %d distinct LFNs" % ( len( trace ), calls, lookups,
+                                                                                                        len( replicaManager.replicas ) ),
+                 ( 'ttl', 'entries', 'prefetch', 'hit rate', 'RPCs', 'LFNs fetched', 'ms/call', 'p95 ms', 'service s' ), rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( ReplicaCacheBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Cache ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Trace ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
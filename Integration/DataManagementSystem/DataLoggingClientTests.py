@@ -21,11 +21,60 @@
 # @brief Definition of DataLoggingClientTests class.
 
 # # imports
+import os
+import sys
+import time
+import weakref
+import tempfile
+import threading
+import subprocess
 import unittest
 # # from DIRAC
-from DIRAC import gLogger
+from DIRAC import S_OK, S_ERROR, gLogger
+from TestDIRAC.Utilities.Bootstrap import setTestLogLevel
 # # SUT
 from DIRAC.DataManagementSystem.Client.DataLoggingClient import DataLoggingClient
+from TestDIRAC.Utilities.BufferedDataLoggingClient import BufferedDataLoggingClient
+
+# # script logging records and exiting without close, the atexit handler has to send them
+atexitScript = """
+import sys
+from DIRAC import S_OK
+from TestDIRAC.Utilities.BufferedDataLoggingClient import BufferedDataLoggingClient
+class FileClient( object ):
+  def addFileRecords( self, fileTuples ):
+    out = open( sys.argv[1], 'a' )
+    out.write( ''.join( [ '%s\\n' % fileTuple[0] for fileTuple in fileTuples ] ) )
+    out.close()
+    return S_OK( len( fileTuples ) )
+client = BufferedDataLoggingClient( FileClient(), maxRecords = 1000, flushPeriod = 60. )
+for i in range( int( sys.argv[2] ) ):
+  client.addFileRecord( '/atexit/%d' % i, 'TestStatus' )
+"""
+
+class RecordingClient( object ):
+  """ records the batches, failing the first failures calls
+  """
+  def __init__( self, failures = 0, delay = 0. ):
+    self.batches = []
+    self.failures = failures
+    self.delay = delay
+    self.lock = threading.Lock()
+
+  def addFileRecords( self, fileTuples ):
+    time.sleep( self.delay )
+    self.lock.acquire()
+    try:
+      if self.failures:
+        self.failures -= 1
+        return S_ERROR( "service unavailable" )
+      self.batches.append( list( fileTuples ) )
+      return S_OK( len( fileTuples ) )
+    finally:
+      self.lock.release()
+
+  def records( self ):
+    return [fileTuple for batch in self.batches for fileTuple in batch]
 
 ########################################################################
 class DataLoggingClientTestCase( unittest.TestCase ):
@@ -38,7 +87,7 @@ class DataLoggingClientTestCase( unittest.TestCase ):
 
     :param self: self reference
     """
-    gLogger.setLevel( "VERBOSE" )
+    setTestLogLevel( "VERBOSE" )
     self.log = gLogger.getSubLogger( self.__class__.__name__ )
 
   def test( self ):
@@ -52,8 +101,127 @@ class DataLoggingClientTestCase( unittest.TestCase ):
     ping = dlc.ping()
     self.assertEqual( ping["OK"], True )
 
+class BufferedDataLoggingClientTestCase( unittest.TestCase ):
+  """
+  .. class:: BufferedDataLoggingClientTestCase
+
+  """
+  def setUp( self ):
+    """ c'tor
+
+    :param self: self reference
+    """
+    setTestLogLevel( "VERBOSE" )
+    self.log = gLogger.getSubLogger( self.__class__.__name__ )
+
+  def test_noLoss( self ):
+    """ records of concurrent threads all sent once, in order, after close
+
+    :param self: self reference
+    """
+    recording = RecordingClient( delay = 0.001 )
+    buffered = BufferedDataLoggingClient( recording, maxRecords = 100, flushPeriod = 0.05 )
+
+    def log( thread ):
+      for i in range( 1000 ):
+        self.assertEqual( buffered.addFileRecord( '/test/%d/%d' % ( thread, i ), "TestStatus", source = "Test" )["OK"], True )
+    threads = [threading.Thread( target = log, args = ( thread, ) ) for thread in range( 8 )]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual( buffered.close()["OK"], True )
+    self.assertEqual( buffered.queued(), 0 )
+    lfns = [fileTuple[0] for fileTuple in recording.records()]
+    self.assertEqual( len( lfns ), 8000 )
+    self.assertEqual( len( set( lfns ) ), 8000 )
+    for thread in range( 8 ):
+      self.assertEqual( [lfn for lfn in lfns if lfn.startswith( '/test/%d/' % thread )],
+                        ['/test/%d/%d' % ( thread, i ) for i in range( 1000 )] )
+    self.assertEqual( max( [len( batch ) for batch in recording.batches] ) <= 100, True )
+    # # logged after close: sent right away
+    self.assertEqual( buffered.addFileRecord( '/test/late', "TestStatus" )["OK"], True )
+    self.assertEqual( recording.records()[-1][0], '/test/late' )
+
+  def test_thresholds( self ):
+    """ sent when maxRecords are waiting, or after flushPeriod
+
+    :param self: self reference
+    """
+    recording = RecordingClient()
+    buffered = BufferedDataLoggingClient( recording, maxRecords = 10, flushPeriod = 1. )
+    buffered.addFileRecord( ['/test/size/%d' % i for i in range( 5 )], "TestStatus" )
+    time.sleep( 0.2 )
+    self.assertEqual( len( recording.records() ), 0 )
+    buffered.addFileRecord( ['/test/size/%d' % i for i in range( 5, 15 )], "TestStatus" )
+    time.sleep( 0.2 )
+    self.assertEqual( len( recording.records() ), 15 )
+    buffered.addFileRecord( ['/test/size/%d' % i for i in range( 15, 18 )], "TestStatus" )
+    time.sleep( 0.2 )
+    self.assertEqual( buffered.queued(), 3 )
+    time.sleep( 1. )
+    self.assertEqual( len( recording.records() ), 18 )
+    self.assertEqual( buffered.close()["OK"], True )
+
+  def test_failures( self ):
+    """ failed batches are kept and sent again
+
+    :param self: self reference
+    """
+    recording = RecordingClient( failures = 3 )
+    buffered = BufferedDataLoggingClient( recording, maxRecords = 10, flushPeriod = 0.05 )
+    buffered.addFileRecord( ['/test/failures/%d' % i for i in range( 35 )], "TestStatus" )
+    time.sleep( 0.5 )
+    self.assertEqual( buffered.close()["OK"], True )
+    self.assertEqual( buffered.failures, 3 )
+    self.assertEqual( [fileTuple[0] for fileTuple in recording.records()],
+                      ['/test/failures/%d' % i for i in range( 35 )] )
+
+    recording = RecordingClient( failures = 1000 )
+    buffered = BufferedDataLoggingClient( recording, maxRecords = 10, flushPeriod = 0.05 )
+    buffered.addFileRecord( '/test/unsent', "TestStatus" )
+    self.assertEqual( buffered.close()["OK"], False )
+    self.assertEqual( buffered.queued(), 1 )
+    # # logged after close: sent after the record still waiting
+    recording.failures = 0
+    self.assertEqual( buffered.addFileRecord( '/test/late', "TestStatus" )["OK"], True )
+    self.assertEqual( [fileTuple[0] for fileTuple in recording.records()], ['/test/unsent', '/test/late'] )
+
+  def test_collected( self ):
+    """ a client dropped without close is not kept alive, it is closed when collected
+
+    :param self: self reference
+    """
+    recording = RecordingClient()
+    threads = threading.activeCount()
+    buffered = BufferedDataLoggingClient( recording, maxRecords = 1000, flushPeriod = 60. )
+    clientRef = weakref.ref( buffered )
+    buffered.addFileRecord( ['/test/collected/%d' % i for i in range( 5 )], "TestStatus" )
+    del buffered
+    self.assertEqual( clientRef(), None )
+    self.assertEqual( [fileTuple[0] for fileTuple in recording.records()],
+                      ['/test/collected/%d' % i for i in range( 5 )] )
+    self.assertEqual( threading.activeCount(), threads )
+
+  def test_atexit( self ):
+    """ the buffer is drained when the process exits without close
+
+    :param self: self reference
+    """
+    fd, path = tempfile.mkstemp( suffix = '.records' )
+    os.close( fd )
+    try:
+      process = subprocess.Popen( [sys.executable, '-c', atexitScript, path, '2500'] )
+      self.assertEqual( process.wait(), 0 )
+      lfns = [line.strip() for line in open( path )]
+      self.assertEqual( lfns, ['/atexit/%d' % i for i in range( 2500 )] )
+    finally:
+      os.unlink( path )
+
 # # test execution
 if __name__ == "__main__":
   SUITE = unittest.defaultTestLoader.loadTestsFromTestCase( DataLoggingClientTestCase )
+  SUITE.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( BufferedDataLoggingClientTestCase ) )
   unittest.TextTestRunner( verbosity = 2 ).run( SUITE )
 
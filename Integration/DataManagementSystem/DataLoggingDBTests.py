@@ -30,6 +30,7 @@ import unittest
 ## from DIRAC
 from DIRAC import gLogger, gConfig
 from DIRAC.Core.Utilities import Time
+from TestDIRAC.Utilities.Bootstrap import setTestLogLevel
 ## SUT
 from DIRAC.DataManagementSystem.DB.DataLoggingDB import DataLoggingDB
 
@@ -113,7 +114,7 @@ class DataLoggingDBTestCase(unittest.TestCase):
 if __name__ == "__main__":
   from DIRAC.Core.Base import Script
   Script.parseCommandLine()
-  gLogger.setLevel( 'VERBOSE' )
+  setTestLogLevel( 'VERBOSE' )
 
   if 'PYTHONOPTIMIZE' in os.environ and os.environ['PYTHONOPTIMIZE']:
     gLogger.info( 'Unset python optimization "PYTHONOPTIMIZE"' )
@@ -4,19 +4,22 @@
     It supposes that the DB is present, and that the service is running
 """
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
 
 import unittest, mock
 import uuid
 
-from DIRAC import gLogger
 from DIRAC.DataManagementSystem.Client.FTSFile import FTSFile
 from DIRAC.DataManagementSystem.Client.FTSJob import FTSJob
 from DIRAC.DataManagementSystem.Client.FTSSite import FTSSite
 # from DIRAC.DataManagementSystem.private.FTSHistoryView import FTSHistoryView
 # # # SUT
 from DIRAC.DataManagementSystem.Client.FTSClient import FTSClient
+from TestDIRAC.Utilities.BulkFTSClient import BulkFTSClient
+
+
+def setUpModule():
+  initializeDIRAC()
 
 
 class FTSDBTestCase( unittest.TestCase ):
@@ -28,7 +31,7 @@ class FTSDBTestCase( unittest.TestCase ):
   def setUp( self ):
     """ test case set up """
 
-    gLogger.setLevel( 'NOTICE' )
+    setTestLogLevel( 'NOTICE' )
 
     self.ftsSites = [ FTSSite( ftsServer = 'https://fts22-t0-export.cern.ch:8443/glite-data-transfer-fts/services/FileTransfer', name = 'CERN.ch' ),
                       FTSSite( ftsServer = 'https://fts.pic.es:8443/glite-data-transfer-fts/services/FileTransfer', name = 'PIC.es' ),
@@ -170,6 +173,42 @@ class FTSClientChain( FTSDBTestCase ):
       res = self.ftsClient.deleteFTSFiles( i )
       self.assert_( res['OK'] )
 
+class FTSClientBulk( FTSDBTestCase ):
+
+  def test_bulkAddAndRemoveJobs( self ):
+    """ multi-job put, peek, get and delete """
+    bulkClient = BulkFTSClient( chunkSize = 4 )
+
+    res = bulkClient.putFTSJobs( self.ftsJobs )
+    self.assert_( res['OK'] )
+    self.assertEqual( len( res['Value']['Successful'] ), self.numberOfJobs )
+    self.assertFalse( res['Value']['Failed'] )
+
+    res = self.ftsClient.getFTSJobsForRequest( 12345 )
+    self.assert_( res['OK'] )
+    FTSjobIDs = [ftsJob.FTSJobID for ftsJob in res['Value']]
+    self.assertEqual( len( FTSjobIDs ), self.numberOfJobs )
+
+    for method in ( bulkClient.peekFTSJobs, bulkClient.getFTSJobs ):
+      res = method( FTSjobIDs + [0] )
+      self.assert_( res['OK'] )
+      self.assertEqual( sorted( res['Value']['Successful'] ), sorted( FTSjobIDs ) )
+      self.assertEqual( res['Value']['Failed'].keys(), [0] )
+      for ftsJob in res['Value']['Successful'].values():
+        self.assertEqual( len( ftsJob ), 1 )
+
+    FTSfileIDs = [ftsFile.FTSFileID for ftsJob in res['Value']['Successful'].values() for ftsFile in ftsJob]
+    res = bulkClient.getFTSFiles( FTSfileIDs )
+    self.assert_( res['OK'] )
+    self.assertEqual( len( res['Value']['Successful'] ), self.numberOfJobs )
+
+    res = bulkClient.deleteFTSJobs( FTSjobIDs )
+    self.assert_( res['OK'] )
+    self.assertFalse( res['Value']['Failed'] )
+    for i in self.opIDs:
+      res = self.ftsClient.deleteFTSFiles( i )
+      self.assert_( res['OK'] )
+
 class FTSClientMix( FTSDBTestCase ):
 
   def test_mix( self ):
@@ -180,6 +219,7 @@ class FTSClientMix( FTSDBTestCase ):
       opFileList.append( ( ftsJob[0].toJSON()["Value"], self.ses, self.ses ) )
 
 #    ftsSchedule can't work since the FTSStrategy object is refreshed in the service so it can't be mocked
+#    the strategies are run offline, in-process, in BenchmarkFTSStrategy
 #    for opID in self.opIDs:
 #      res = self.ftsClient.ftsSchedule( 12345, opID, opFileList )
 #      self.assert_( res['OK'] )
@@ -223,4 +263,5 @@ if __name__ == '__main__':
   suite = unittest.defaultTestLoader.loadTestsFromTestCase( FTSDBTestCase )
 #  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( FTSClientChain ) )
   suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( FTSClientMix ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( FTSClientBulk ) )
   testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
@@ -0,0 +1,214 @@
+""" Cost of the logging at each gLogger level
+
+    Representative workloads are replayed at each level, with the output going to a file,
+    as when the output of the suite is captured:
+    - replay: the logging calls done around a client call, with the messages formatted
+      eagerly ( log.debug( 'Result %s' % result ) ), passed unformatted as variable message
+      ( log.debug( 'Result', result ) ), or guarded by a level check done once
+    - JobDB: insertion and removal of jobs in the JobDB, which logs its queries at DEBUG level
+    - JobMonitoring: getJobStatus calls through the JobMonitoring service
+
+    The penalty is the wall time relative to the one at ERROR level. At ERROR level all the
+    replayed messages are discarded: the difference between the eager and the guarded
+    replays there is the cost of formatting and sending messages which are not printed.
+
+    In order to run this test we need the following DBs installed:
+    - JobDB
+
+    And the following services should also be on:
+    - JobMonitoring
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC import gLogger
+from DIRAC.WorkloadManagementSystem.DB.JobDB import JobDB
+from DIRAC.WorkloadManagementSystem.Client.JobMonitoringClient import JobMonitoringClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+
+jdl = """
+[
+    Origin = "DIRAC";
+    Executable = "$DIRACROOT/scripts/dirac-jobexec";
+    JobName = "benchmarkLogging";
+    JobGroup = "benchmark";
+    JobType = "User";
+    Site = "ANY";
+    Priority = "1";
+]
+"""
+
+# from the least to the most verbose, the first one is the reference for the penalty
+logLevels = ['ERROR', 'WARN', 'NOTICE', 'INFO', 'VERBOSE', 'DEBUG']
+replayCalls = 10000
+jobNumber = 200
+monitoringCalls = 1000
+
+# what a bulk getter returns, logged by the replays
+replayResult = dict( [( jobID, { 'Status' : 'Done', 'MinorStatus' : 'Execution Complete', 'Site' : 'LCG.CERN.ch' } )
+                      for jobID in range( 100 )] )
+
+def replayEager( log, calls ):
+  for call in xrange( calls ):
+    log.verbose( 'Calling getJobsStatus on %s' % 'WorkloadManagement/JobMonitoring' )
+    log.debug( 'Arguments: %s' % str( replayResult.keys() ) )
+    log.debug( 'Result: %s' % str( replayResult ) )
+    log.info( 'Call %d done, %d jobs' % ( call, len( replayResult ) ) )
+
+def replayDeferred( log, calls ):
+  for call in xrange( calls ):
+    log.verbose( 'Calling getJobsStatus on', 'WorkloadManagement/JobMonitoring' )
+    log.debug( 'Arguments:', replayResult.keys() )
+    log.debug( 'Result:', replayResult )
+    log.info( 'Call done', call )
+
+def replayGuarded( log, calls ):
+  level = log.getLevel()
+  verbose = level in ( 'VERBOSE', 'DEBUG' )
+  debug = level == 'DEBUG'
+  info = level in ( 'INFO', 'VERBOSE', 'DEBUG' )
+  for call in xrange( calls ):
+    if verbose:
+      log.verbose( 'Calling getJobsStatus on %s' % 'WorkloadManagement/JobMonitoring' )
+    if debug:
+      log.debug( 'Arguments: %s' % str( replayResult.keys() ) )
+      log.debug( 'Result: %s' % str( replayResult ) )
+    if info:
+      log.info( 'Call %d done, %d jobs' % ( call, len( replayResult ) ) )
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class LoggingBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the logging benchmark test cases
+  """
+
+  def setUp( self ):
+    self.log = gLogger.getSubLogger( 'BenchmarkLogging' )
+    fd, self.outputFile = tempfile.mkstemp( prefix = 'BenchmarkLogging_' )
+    os.close( fd )
+
+  def tearDown( self ):
+    setTestLogLevel( 'NOTICE' )
+    os.remove( self.outputFile )
+
+  def atLevels( self, workload, operations ):
+    """ run workload() at each level, with stdout and stderr going to the output file
+
+    :return: report rows: level, wall, CPU, operations per second, bytes logged, penalty
+    """
+    rows = []
+    reference = None
+    for level in logLevels:
+      gLogger.setLevel( level )
+      # # the sub-logger keeps its own level, read by replayGuarded
+      self.log.setLevel( level )
+      sys.stdout.flush()
+      sys.stderr.flush()
+      savedStdout = os.dup( 1 )
+      savedStderr = os.dup( 2 )
+      outputFD = os.open( self.outputFile, os.O_WRONLY | os.O_TRUNC )
+      os.dup2( outputFD, 1 )
+      os.dup2( outputFD, 2 )
+      try:
+        with Timer() as timer:
+          workload()
+          sys.stdout.flush()
+          sys.stderr.flush()
+      finally:
+        os.dup2( savedStdout, 1 )
+        os.dup2( savedStderr, 2 )
+        for fd in ( outputFD, savedStdout, savedStderr ):
+          os.close( fd )
+      if reference is None:
+        reference = timer.wall
+      rows.append( ( level, timer.wall, timer.cpu, operations / timer.wall if timer.wall else 0.,
+                     os.path.getsize( self.outputFile ), timer.wall / reference if reference else 0. ) )
+    return rows
+
+class Replay( LoggingBenchmarkTestCase ):
+
+  def test_replay( self ):
+    """ client call logging, eager formatting against variable messages and guards
+    """
+    header = ( 'level', 'wall', 'CPU', 'calls/s', 'bytes', 'penalty' )
+    for name, replay in ( ( 'eager formatting', replayEager ),
+                          ( 'variable messages', replayDeferred ),
+                          ( 'guarded', replayGuarded ) ):
+      rows = self.atLevels( lambda: replay( self.log, replayCalls ), replayCalls )
+      printReport( "Logging replay, %s: %d calls of 4 messages" % ( name, replayCalls ), header, rows )
+
+  def test_discarded( self ):
+    """ cost per discarded debug message, at ERROR level
+    """
+    gLogger.setLevel( 'ERROR' )
+    with Timer() as eager:
+      for _call in xrange( replayCalls ):
+        self.log.debug( 'Result: %s' % str( replayResult ) )
+    with Timer() as deferred:
+      for _call in xrange( replayCalls ):
+        self.log.debug( 'Result:', replayResult )
+    with Timer() as loop:
+      for _call in xrange( replayCalls ):
+        pass
+    printReport( "Discarded debug messages: microseconds per message",
+                 ( 'eager formatting', 'variable message', 'empty loop' ),
+                 [( ( eager.wall - loop.wall ) * 1e6 / replayCalls,
+                    ( deferred.wall - loop.wall ) * 1e6 / replayCalls,
+                    loop.wall * 1e6 / replayCalls )] )
+
+class Workloads( LoggingBenchmarkTestCase ):
+
+  def setUp( self ):
+    super( Workloads, self ).setUp()
+    setTestLogLevel( 'NOTICE' )
+    self.jobDB = JobDB()
+    self.jobMonitor = JobMonitoringClient()
+    res = self.jobDB.insertNewJobIntoDB( jdl, 'owner', '/DN/OF/owner', 'ownerGroup', 'someSetup' )
+    self.assert_( res['OK'] )
+    self.jobID = res['JobID']
+
+  def tearDown( self ):
+    self.jobDB.removeJobFromDB( self.jobID )
+    super( Workloads, self ).tearDown()
+
+  def test_jobDB( self ):
+    """ insertion and removal of jobNumber jobs
+    """
+    def workload():
+      jobIDs = []
+      for _i in xrange( jobNumber ):
+        res = self.jobDB.insertNewJobIntoDB( jdl, 'owner', '/DN/OF/owner', 'ownerGroup', 'someSetup' )
+        self.assert_( res['OK'] )
+        jobIDs.append( res['JobID'] )
+      for jobID in jobIDs:
+        self.assert_( self.jobDB.removeJobFromDB( jobID )['OK'] )
+
+    printReport( "JobDB: %d job insertions and removals" % jobNumber,
+                 ( 'level', 'wall', 'CPU', 'jobs/s', 'bytes', 'penalty' ),
+                 self.atLevels( workload, jobNumber ) )
+
+  def test_jobMonitoring( self ):
+    """ monitoringCalls getJobStatus calls
+    """
+    def workload():
+      for _i in xrange( monitoringCalls ):
+        self.assert_( self.jobMonitor.getJobStatus( self.jobID )['OK'] )
+
+    printReport( "JobMonitoring: %d getJobStatus calls" % monitoringCalls,
+                 ( 'level', 'wall', 'CPU', 'calls/s', 'bytes', 'penalty' ),
+                 self.atLevels( workload, monitoringCalls ) )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( LoggingBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Replay ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Workloads ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
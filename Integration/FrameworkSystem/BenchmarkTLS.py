@@ -0,0 +1,255 @@
+""" Cost of the proxy loading and of the TLS handshakes per RPC
+
+    - StandIn: a local TLS service (stdlib ssl, self-signed certificate generated with the
+      openssl command) answering one line per request. The calls are done with a new
+      connection, hence a full handshake, for each of them, then over one reused connection,
+      and over plain TCP for reference. The difference between the first two is the latency
+      saved per RPC when the connection is kept.
+    - Proxy: getProxyInfo and the dump of the chain at each call, as the setUp of the test
+      cases did, against the session cache (ProxyCache)
+    - RPC: ping of the JobMonitoring service with a new RPCClient per call against the
+      client shared through ClientCache
+
+    The Proxy and RPC test cases need a valid proxy, RPC needs the JobMonitoring service.
+"""
+
+import os
+import ssl
+import shutil
+import socket
+import tempfile
+import unittest
+import threading
+import subprocess
+import SocketServer
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.ProxyCache import ProxyCache
+from TestDIRAC.Utilities.ClientCache import ClientCache
+
+standInCalls = 500
+proxyCalls = 50
+rpcCalls = 200
+request = 'ping\n'
+
+def createCertificate( directory ):
+  """ self-signed certificate and key for localhost
+
+  :return: ( certificate file, key file ), None if openssl is not available
+  """
+  certFile = os.path.join( directory, 'cert.pem' )
+  keyFile = os.path.join( directory, 'key.pem' )
+  try:
+    returnCode = subprocess.call( ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                                   '-subj', '/CN=localhost', '-keyout', keyFile, '-out', certFile],
+                                  stdout = open( os.devnull, 'w' ), stderr = subprocess.STDOUT )
+  except OSError:
+    return None
+  if returnCode:
+    return None
+  return certFile, keyFile
+
+class LineHandler( SocketServer.StreamRequestHandler ):
+  """ one reply line per request line, until the client closes the connection
+  """
+
+  def handle( self ):
+    try:
+      while True:
+        line = self.rfile.readline()
+        if not line:
+          return
+        self.wfile.write( 'OK %s' % line )
+        self.wfile.flush()
+    except ( socket.error, ssl.SSLError ):
+      # the clients close without TLS shutdown
+      return
+
+class StandInServer( SocketServer.ThreadingMixIn, SocketServer.TCPServer ):
+  """ threaded line server on localhost, TLS if a server context is given
+  """
+
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__( self, context = None ):
+    self.context = context
+    SocketServer.TCPServer.__init__( self, ( '127.0.0.1', 0 ), LineHandler )
+    self.port = self.server_address[1]
+
+  def get_request( self ):
+    sock, address = SocketServer.TCPServer.get_request( self )
+    sock.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+    if self.context:
+      sock = self.context.wrap_socket( sock, server_side = True )
+    return sock, address
+
+def connect( port, context = None ):
+  sock = socket.create_connection( ( '127.0.0.1', port ) )
+  # no Nagle delay: the time measured is the one of the handshake, not of delayed ACKs
+  sock.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+  if context:
+    sock = context.wrap_socket( sock, server_hostname = 'localhost' )
+  return sock
+
+def call( sock ):
+  sock.sendall( request )
+  reply = ''
+  while not reply.endswith( '\n' ):
+    data = sock.recv( 4096 )
+    if not data:
+      break
+    reply += data
+  return reply
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class TLSBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the TLS benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+
+  def tearDown( self ):
+    pass
+
+class StandIn( TLSBenchmarkTestCase ):
+
+  def setUp( self ):
+    super( StandIn, self ).setUp()
+    self.certDir = tempfile.mkdtemp( prefix = 'BenchmarkTLS_' )
+    certificate = createCertificate( self.certDir )
+    if not certificate:
+      shutil.rmtree( self.certDir )
+      self.skipTest( 'openssl is needed to create the certificate of the stand-in service' )
+    serverContext = ssl.SSLContext( ssl.PROTOCOL_SSLv23 )
+    serverContext.load_cert_chain( *certificate )
+    # the stand-in certificate is self-signed: no verification, the handshake is still complete
+    self.clientContext = ssl.SSLContext( ssl.PROTOCOL_SSLv23 )
+    self.clientContext.verify_mode = ssl.CERT_NONE
+    self.servers = []
+    for context in ( serverContext, None ):
+      server = StandInServer( context )
+      thread = threading.Thread( target = server.serve_forever )
+      thread.daemon = True
+      thread.start()
+      self.servers.append( server )
+    self.tlsPort = self.servers[0].port
+    self.tcpPort = self.servers[1].port
+
+  def tearDown( self ):
+    for server in self.servers:
+      server.shutdown()
+      server.server_close()
+    shutil.rmtree( self.certDir )
+    super( StandIn, self ).tearDown()
+
+  def test_handshake( self ):
+    """ standInCalls calls with a new connection each, then over one connection
+    """
+    def perCall( port, context ):
+      for _i in xrange( standInCalls ):
+        sock = connect( port, context )
+        try:
+          self.assertEqual( call( sock ), 'OK %s' % request )
+        finally:
+          sock.close()
+
+    def reused( port, context ):
+      sock = connect( port, context )
+      try:
+        for _i in xrange( standInCalls ):
+          self.assertEqual( call( sock ), 'OK %s' % request )
+      finally:
+        sock.close()
+
+    rows = []
+    timings = {}
+    for name, function, port, context in ( ( 'TLS, new connection per call', perCall, self.tlsPort, self.clientContext ),
+                                           ( 'TLS, reused connection', reused, self.tlsPort, self.clientContext ),
+                                           ( 'TCP, new connection per call', perCall, self.tcpPort, None ),
+                                           ( 'TCP, reused connection', reused, self.tcpPort, None ) ):
+      with Timer() as timer:
+        function( port, context )
+      timings[name] = timer
+      rows.append( ( name, timer.wall, timer.cpu, timer.wall * 1000. / standInCalls, standInCalls / timer.wall ) )
+    printReport( "Local stand-in service: %d calls" % standInCalls,
+                 ( 'connection', 'wall', 'CPU', 'ms/call', 'calls/s' ), rows )
+
+    saved = ( timings['TLS, new connection per call'].wall - timings['TLS, reused connection'].wall ) / standInCalls
+    handshake = ( timings['TLS, new connection per call'].wall - timings['TCP, new connection per call'].wall ) / standInCalls
+    printReport( "Latency per RPC: milliseconds",
+                 ( 'saved by reuse', 'TLS handshake' ),
+                 [( saved * 1000., handshake * 1000. )] )
+
+class Proxy( TLSBenchmarkTestCase ):
+
+  def test_proxyLoading( self ):
+    """ proxyCalls loadings and dumps of the proxy, direct and cached
+    """
+    from DIRAC.Core.Security.ProxyInfo import getProxyInfo
+
+    def direct( disableVOMS ):
+      for _i in xrange( proxyCalls ):
+        result = getProxyInfo( disableVOMS = disableVOMS )
+        self.assert_( result['OK'] )
+        self.assert_( result['Value']['chain'].dumpAllToString()['OK'] )
+
+    def cached( disableVOMS ):
+      proxyCache = ProxyCache()
+      for _i in xrange( proxyCalls ):
+        self.assert_( proxyCache.getProxyInfo( disableVOMS = disableVOMS )['OK'] )
+        self.assert_( proxyCache.getProxyString( disableVOMS = disableVOMS )['OK'] )
+      self.assertEqual( proxyCache.misses, 1 )
+
+    rows = []
+    for disableVOMS in ( True, False ):
+      for name, function in ( ( 'getProxyInfo + dump', direct ), ( 'ProxyCache', cached ) ):
+        with Timer() as timer:
+          function( disableVOMS )
+        rows.append( ( name, disableVOMS, timer.wall, timer.cpu, timer.wall * 1000. / proxyCalls ) )
+    printReport( "Proxy loading: %d calls" % proxyCalls,
+                 ( 'method', 'disableVOMS', 'wall', 'CPU', 'ms/call' ), rows )
+
+class RPC( TLSBenchmarkTestCase ):
+
+  def test_clientReuse( self ):
+    """ rpcCalls pings of JobMonitoring, new client per call against the cached one
+    """
+    from DIRAC.Core.DISET.RPCClient import RPCClient
+
+    url = 'WorkloadManagement/JobMonitoring'
+
+    def perCall():
+      for _i in xrange( rpcCalls ):
+        self.assert_( RPCClient( url ).ping()['OK'] )
+
+    def cached():
+      clientCache = ClientCache()
+      for _i in xrange( rpcCalls ):
+        self.assert_( clientCache.getRPCClient( url ).ping()['OK'] )
+      self.assertEqual( clientCache.created, 1 )
+
+    rows = []
+    timings = {}
+    for name, function in ( ( 'new RPCClient per call', perCall ), ( 'ClientCache', cached ) ):
+      with Timer() as timer:
+        function()
+      timings[name] = timer
+      rows.append( ( name, timer.wall, timer.cpu, timer.wall * 1000. / rpcCalls ) )
+    printReport( "JobMonitoring ping: %d calls" % rpcCalls, ( 'client', 'wall', 'CPU', 'ms/call' ), rows )
+    printReport( "Latency saved per RPC: milliseconds", ( 'saved', ),
+                 [( ( timings['new RPCClient per call'].wall - timings['ClientCache'].wall ) * 1000. / rpcCalls, )] )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( TLSBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( StandIn ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( Proxy ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( RPC ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
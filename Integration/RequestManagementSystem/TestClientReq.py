@@ -4,13 +4,10 @@
     It supposes that the DB is present, and that the service is running
 """
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel, namespaced
 
 import unittest
 
-from DIRAC import gLogger
-
 from DIRAC.RequestManagementSystem.Client.Request import Request
 from DIRAC.RequestManagementSystem.Client.Operation import Operation
 from DIRAC.RequestManagementSystem.Client.File import File
@@ -20,6 +17,10 @@ from DIRAC.RequestManagementSystem.DB.RequestDB import RequestDB
 
 import time
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class ReqClientTestCase( unittest.TestCase ):
   """
   .. class:: ReqClientTestCase
@@ -29,7 +30,7 @@ class ReqClientTestCase( unittest.TestCase ):
   def setUp( self ):
     """ test case set up """
 
-    gLogger.setLevel( 'NOTICE' )
+    setTestLogLevel( 'NOTICE' )
 
     self.file = File()
     self.file.LFN = "/lhcb/user/c/cibak/testFile"
@@ -48,7 +49,7 @@ class ReqClientTestCase( unittest.TestCase ):
     self.operation.addFile( self.file2 )
 
     self.request = Request()
-    self.request.RequestName = "RequestManagerHandlerTests"
+    self.request.RequestName = namespaced( "RequestManagerHandlerTests" )
     self.request.OwnerDN = "/DC=ch/DC=cern/OU=Organic Units/OU=Users/CN=cibak/CN=605919/CN=Krzysztof Ciba"
     self.request.OwnerGroup = "dirac_user"
     self.request.JobID = 123
@@ -144,7 +145,7 @@ class ReqClientMix( ReqClientTestCase ):
 
     # Adding new request
     request2 = Request()
-    request2.RequestName = "RequestManagerHandlerTests-2"
+    request2.RequestName = namespaced( "RequestManagerHandlerTests-2" )
     request2.OwnerDN = "/DC=ch/DC=cern/OU=Organic Units/OU=Users/CN=cibak/CN=605919/CN=Krzysztof Ciba"
     request2.OwnerGroup = "dirac_user"
     request2.JobID = 456
@@ -186,7 +187,7 @@ class ReqClientMix( ReqClientTestCase ):
 
 
     for i in range( self.stressRequests ):
-      request = Request( { "RequestName": "test-%d" % i } )
+      request = Request( { "RequestName": namespaced( "test-%d" % i ) } )
       op = Operation( { "Type": "RemoveReplica", "TargetSE": "CERN-USER" } )
       op += File( { "LFN": "/lhcb/user/c/cibak/foo" } )
       request += op
@@ -196,7 +197,7 @@ class ReqClientMix( ReqClientTestCase ):
     startTime = time.time()
 
     for i in range( self.stressRequests ):
-      get = db.getRequest( "test-%s" % i, True )
+      get = db.getRequest( namespaced( "test-%s" % i ), True )
       if "Message" in get:
         print get["Message"]
       self.assertEqual( get["OK"], True, "get failed" )
@@ -206,7 +207,7 @@ class ReqClientMix( ReqClientTestCase ):
     print "getRequest duration %s " % ( endTime - startTime )
 
     for i in range( self.stressRequests ):
-      delete = db.deleteRequest( "test-%s" % i )
+      delete = db.deleteRequest( namespaced( "test-%s" % i ) )
       self.assertEqual( delete["OK"], True, "delete failed" )
 
 
@@ -216,7 +217,7 @@ class ReqClientMix( ReqClientTestCase ):
     db = RequestDB()
 
     for i in range( self.stressRequests ):
-      request = Request( { "RequestName": "test-%d" % i } )
+      request = Request( { "RequestName": namespaced( "test-%d" % i ) } )
       op = Operation( { "Type": "RemoveReplica", "TargetSE": "CERN-USER" } )
       op += File( { "LFN": "/lhcb/user/c/cibak/foo" } )
       request += op
@@ -243,7 +244,7 @@ class ReqClientMix( ReqClientTestCase ):
     self.assertEqual( totalSuccessful, self.stressRequests, "Did not retrieve all the requests: %s instead of %s" % ( totalSuccessful, self.stressRequests ) )
 
     for i in range( self.stressRequests ):
-      delete = db.deleteRequest( "test-%s" % i )
+      delete = db.deleteRequest( namespaced( "test-%s" % i ) )
       self.assertEqual( delete["OK"], True, "delete failed" )
 #
 #
@@ -4,13 +4,16 @@
     It supposes that the DB is present, and that the service is running
 """
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, namespaced
 
 import unittest
 
 from DIRAC.TransformationSystem.Client.TransformationClient   import TransformationClient
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class TestClientTransformationTestCase( unittest.TestCase ):
 
   def setUp( self ):
@@ -24,13 +27,13 @@ class TransformationClientChain( TestClientTransformationTestCase ):
 
   def test_addAndRemove( self ):
     # add
-    res = self.transClient.addTransformation( 'transName', 'description', 'longDescription', 'MCSimulation', 'Standard',
+    res = self.transClient.addTransformation( namespaced( 'transName' ), 'description', 'longDescription', 'MCSimulation', 'Standard',
                                               'Manual', '' )
     self.assert_( res['OK'] )
     transID = res['Value']
 
     # try to add again (this should fail)
-    res = self.transClient.addTransformation( 'transName', 'description', 'longDescription', 'MCSimulation', 'Standard',
+    res = self.transClient.addTransformation( namespaced( 'transName' ), 'description', 'longDescription', 'MCSimulation', 'Standard',
                                               'Manual', '' )
     self.assertFalse( res['OK'] )
 
@@ -51,7 +54,7 @@ class TransformationClientChain( TestClientTransformationTestCase ):
 
 
   def test_addTasksAndFiles( self ):
-    res = self.transClient.addTransformation( 'transName', 'description', 'longDescription', 'MCSimulation', 'Standard',
+    res = self.transClient.addTransformation( namespaced( 'transName' ), 'description', 'longDescription', 'MCSimulation', 'Standard',
                                               'Manual', '' )
     transID = res['Value']
 
@@ -95,7 +98,7 @@ class TransformationClientChain( TestClientTransformationTestCase ):
 
     # now adding a new Transformation with new tasks, and introducing a mix of insertion,
     # to test that the trigger works as it should
-    res = self.transClient.addTransformation( 'transName-new', 'description', 'longDescription', 'MCSimulation', 'Standard',
+    res = self.transClient.addTransformation( namespaced( 'transName-new' ), 'description', 'longDescription', 'MCSimulation', 'Standard',
                                               'Manual', '' )
     transIDNew = res['Value']
     # add tasks - no lfns
@@ -159,7 +162,7 @@ class TransformationClientChain( TestClientTransformationTestCase ):
     self.transClient.deleteTransformation( transIDNew )
 
   def test_mix( self ):
-    res = self.transClient.addTransformation( 'transName', 'description', 'longDescription', 'MCSimulation', 'Standard',
+    res = self.transClient.addTransformation( namespaced( 'transName' ), 'description', 'longDescription', 'MCSimulation', 'Standard',
                                               'Manual', '' )
     transID = res['Value']
 
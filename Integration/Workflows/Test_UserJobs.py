@@ -3,17 +3,65 @@
     Can be automatized.
 """
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, namespaced
 
 import unittest
+import os
+import shutil
+import tempfile
 
 from TestDIRAC.Utilities.IntegrationTest import IntegrationTest
-from TestDIRAC.Utilities.utils import find_all
+from TestDIRAC.Utilities.utils import find_all, getResourceRoot
+from TestDIRAC.Utilities.LocalJobRunner import LocalJobRunner
 
+from DIRAC import gLogger
 from DIRAC.Interfaces.API.Job import Job
 from DIRAC.Interfaces.API.Dirac import Dirac
 
+def setUpModule():
+  initializeDIRAC()
+
+# The jobs, built with absolute paths so that they can also run from another directory
+
+def helloWorldJob():
+  job = Job()
+  job.setName( namespaced( "helloWorld-test" ) )
+  job.setExecutable( os.path.abspath( find_all( 'exe-script.py', getResourceRoot(), 'Integration' )[0] ) )
+  return job
+
+def helloWorldPlusJob():
+  """ Adding quite a lot of calls from the API, for pure test purpose
+  """
+  job = Job()
+
+  job.setName( namespaced( "helloWorld-test" ) )
+  job.setExecutable( os.path.abspath( find_all( "helloWorld.py", getResourceRoot(), 'Integration' )[0] ),
+                     arguments = "This is an argument",
+                     logFile = "aLogFileForTest.txt" ,
+                     parameters=[('executable', 'string', '', "Executable Script"), 
+                                 ('arguments', 'string', '', 'Arguments for executable Script'), 
+                                 ( 'applicationLog', 'string', '', "Log file name" ),
+                                 ( 'someCustomOne', 'string', '', "boh" )],
+                     paramValues = [( 'someCustomOne', 'aCustomValue' )] )
+  job.setBannedSites( ['LCG.SiteA.com', 'DIRAC.SiteB.org'] )
+  job.setOwner( 'ownerName' )
+  job.setOwnerGroup( 'ownerGroup' )
+  job.setName( namespaced( 'jobName' ) )
+  job.setJobGroup( 'jobGroup' )
+  job.setType( 'jobType' )
+  job.setDestination( 'DIRAC.someSite.ch' )
+  job.setCPUTime( 12345 )
+  job.setLogLevel( 'DEBUG' )
+  return job
+
+def lsJob():
+  """ just testing unix "ls"
+  """
+  job = Job()
+  job.setName( namespaced( "ls-test" ) )
+  job.setExecutable( "/bin/ls", '-l' )
+  return job
+
 class UserJobTestCase( IntegrationTest ):
   """ Base class for the UserJob test cases
   """
@@ -21,16 +69,11 @@ class UserJobTestCase( IntegrationTest ):
     super( IntegrationTest, self ).setUp()
 
     self.d = Dirac()
-    self.exeScriptLocation = find_all( 'exe-script.py', '.', 'Integration' )[0]
 
 class HelloWorldSuccess( UserJobTestCase ):
   def test_execute( self ):
 
-    j = Job()
-
-    j.setName( "helloWorld-test" )
-    j.setExecutable( self.exeScriptLocation )
-    res = j.runLocal( self.d )
+    res = helloWorldJob().runLocal( self.d )
     self.assertTrue( res['OK'] )
 
 
@@ -40,28 +83,7 @@ class HelloWorldPlusSuccess( UserJobTestCase ):
 
   def test_execute( self ):
 
-    job = Job()
-
-    job.setName( "helloWorld-test" )
-    job.setExecutable( find_all( "helloWorld.py", '.', 'Integration' )[0],
-                       arguments = "This is an argument",
-                       logFile = "aLogFileForTest.txt" ,
-                       parameters=[('executable', 'string', '', "Executable Script"), 
-                                   ('arguments', 'string', '', 'Arguments for executable Script'), 
-                                   ( 'applicationLog', 'string', '', "Log file name" ),
-                                   ( 'someCustomOne', 'string', '', "boh" )],
-                       paramValues = [( 'someCustomOne', 'aCustomValue' )] )
-    job.setBannedSites( ['LCG.SiteA.com', 'DIRAC.SiteB.org'] )
-    job.setOwner( 'ownerName' )
-    job.setOwnerGroup( 'ownerGroup' )
-    job.setName( 'jobName' )
-    job.setJobGroup( 'jobGroup' )
-    job.setType( 'jobType' )
-    job.setDestination( 'DIRAC.someSite.ch' )
-    job.setCPUTime( 12345 )
-    job.setLogLevel( 'DEBUG' )
-
-    res = job.runLocal( self.d )
+    res = helloWorldPlusJob().runLocal( self.d )
     self.assertTrue( res['OK'] )
 
 
@@ -70,12 +92,32 @@ class LSSuccess( UserJobTestCase ):
     """ just testing unix "ls"
     """
 
-    job = Job()
+    res = lsJob().runLocal( self.d )
+    self.assertTrue( res['OK'] )
+
+
+class ParallelSuccess( UserJobTestCase ):
+  def setUp( self ):
+    super( ParallelSuccess, self ).setUp()
+    self.baseDir = tempfile.mkdtemp( prefix = 'ParallelSuccess_' )
+
+  def tearDown( self ):
+    shutil.rmtree( self.baseDir, ignore_errors = True )
+    super( ParallelSuccess, self ).tearDown()
+
+  def test_execute( self ):
+    """ the same jobs, several times each, all at once, each in its own directory
+    """
 
-    job.setName( "ls-test" )
-    job.setExecutable( "/bin/ls", '-l' )
-    res = job.runLocal( self.d )
+    runner = LocalJobRunner( baseDir = self.baseDir )
+    for i in range( 4 ):
+      runner.addJob( 'helloWorld-%d' % i, helloWorldJob )
+      runner.addJob( 'helloWorldPlus-%d' % i, helloWorldPlusJob )
+      runner.addJob( 'ls-%d' % i, lsJob )
+    res = runner.run()
     self.assertTrue( res['OK'] )
+    gLogger.notice( runner.report( res['Value'] ) )
+    self.assertEqual( res['Value']['Failed'], 0 )
 
 
 if __name__ == '__main__':
@@ -83,5 +125,6 @@ if __name__ == '__main__':
   suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( HelloWorldSuccess ) )
   suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( HelloWorldPlusSuccess ) )
   suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( LSSuccess ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( ParallelSuccess ) )
   testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
 
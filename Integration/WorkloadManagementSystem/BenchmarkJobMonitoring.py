@@ -0,0 +1,112 @@
+""" Benchmark of the JobMonitoring getters: N single calls against one bulk call
+
+    Jobs are inserted directly in the JobDB, then their attributes and parameters are
+    read back through the JobMonitoring service, job by job and with the BulkJobMonitoringClient.
+
+    In order to run this test we need the following DBs installed:
+    - JobDB
+
+    And the following services should also be on:
+    - JobMonitoring
+"""
+
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.WorkloadManagementSystem.DB.JobDB import JobDB
+from DIRAC.WorkloadManagementSystem.Client.JobMonitoringClient import JobMonitoringClient
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.BulkJobMonitoringClient import BulkJobMonitoringClient
+
+jdl = """
+[
+    Origin = "DIRAC";
+    Executable = "$DIRACROOT/scripts/dirac-jobexec";
+    JobName = "benchmarkJobMonitoring";
+    JobGroup = "benchmark";
+    JobType = "User";
+    Site = "ANY";
+    Priority = "1";
+]
+"""
+
+# number of jobs queried at each step
+jobNumbers = [10, 100, 1000, 10000, 100000]
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class JobMonitoringBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the JobMonitoring benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.jobDB = JobDB()
+    self.jobMonitor = JobMonitoringClient()
+    self.bulkMonitor = BulkJobMonitoringClient()
+
+    self.jobIDs = []
+    for _i in xrange( max( jobNumbers ) ):
+      res = self.jobDB.insertNewJobIntoDB( jdl, 'owner', '/DN/OF/owner', 'ownerGroup', 'someSetup' )
+      self.assert_( res['OK'] )
+      jobID = res['JobID']
+      res = self.jobDB.setJobParameters( jobID, [( 'par1', 'par1Value' ), ( 'par2', 'par2Value' )] )
+      self.assert_( res['OK'] )
+      self.jobIDs.append( jobID )
+
+  def tearDown( self ):
+    for jobID in self.jobIDs:
+      res = self.jobDB.removeJobFromDB( jobID )
+      self.assert_( res['OK'] )
+
+class SingleVersusBulk( JobMonitoringBenchmarkTestCase ):
+
+  def test_singleVersusBulk( self ):
+    """ time N getJobAttributes/getJobParameters/getJobParameter calls against their bulk variant
+    """
+    rows = []
+    for jobNumber in jobNumbers:
+      jobIDs = self.jobIDs[:jobNumber]
+
+      with Timer() as singleAttributes:
+        for jobID in jobIDs:
+          self.assert_( self.jobMonitor.getJobAttributes( jobID )['OK'] )
+      with Timer() as bulkAttributes:
+        res = self.bulkMonitor.getJobsAttributes( jobIDs )
+      self.assert_( res['OK'] )
+      self.assertEqual( len( res['Value'] ), jobNumber )
+
+      with Timer() as singleParameters:
+        for jobID in jobIDs:
+          self.assert_( self.jobMonitor.getJobParameters( jobID )['OK'] )
+      with Timer() as bulkParameters:
+        res = self.bulkMonitor.getJobsParameters( jobIDs )
+      self.assert_( res['OK'] )
+      self.assertEqual( len( res['Value'] ), jobNumber )
+
+      with Timer() as singleParameter:
+        for jobID in jobIDs:
+          self.assert_( self.jobMonitor.getJobParameter( jobID, 'par1' )['OK'] )
+      with Timer() as bulkParameter:
+        res = self.bulkMonitor.getJobsParameter( jobIDs, 'par1' )
+      self.assert_( res['OK'] )
+      self.assertEqual( set( res['Value'].values() ), set( ['par1Value'] ) )
+
+      rows.append( ( jobNumber,
+                     singleAttributes.wall, bulkAttributes.wall,
+                     singleParameters.wall, bulkParameters.wall,
+                     singleParameter.wall, bulkParameter.wall ) )
+
+    printReport( "JobMonitoring: N single calls vs one bulk call (wall seconds), bulk parameters: %s" % self.bulkMonitor.bulkParameters,
+                 ( 'N', 'attributes', 'bulk', 'parameters', 'bulk', 'parameter', 'bulk' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( JobMonitoringBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( SingleVersusBulk ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
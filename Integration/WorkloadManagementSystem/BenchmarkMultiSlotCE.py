@@ -0,0 +1,108 @@
+""" Throughput of a multi-slot local computing element, to size the slots of multi-core pilots
+
+    For each number of slots and payload duration, 2 * slots job wrappers are created with
+    createJobWrapper and run through a LocalSlotPool of InProcess CEs.
+    The payload burns CPU for cpuFraction of its duration and sleeps for the rest.
+
+    Reported: payloads per hour, mean and max idle time of the slots, longest gap
+    between two payloads in a slot and the CPU efficiency of the node.
+
+    A user proxy is needed, as for TestJobWrapper.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC.WorkloadManagementSystem.Utilities.Utils import createJobWrapper
+
+from TestDIRAC.Utilities.Benchmark import printReport
+from TestDIRAC.Utilities.ProxyCache import gProxyCache
+from TestDIRAC.Utilities.LocalSlotPool import LocalSlotPool, slotStatistics
+
+slotNumbers = [1, 2, 4, 8]
+payloadDurations = [10, 60]
+cpuFraction = 0.8
+
+payloadScript = """
+import sys, time
+duration = float( sys.argv[1] )
+burn = duration * float( sys.argv[2] )
+start = time.time()
+while time.time() - start < burn:
+  pass
+time.sleep( max( 0, duration - ( time.time() - start ) ) )
+"""
+
+def setUpModule():
+  initializeDIRAC()
+
+
+class MultiSlotCETestCase( unittest.TestCase ):
+  """ Base class for the multi-slot CE benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    proxyDumped = gProxyCache.getProxyString( disableVOMS = True )
+    self.assert_( proxyDumped['OK'] )
+    self.payloadProxy = proxyDumped['Value']
+
+    self.cwd = os.getcwd()
+    self.workDir = tempfile.mkdtemp()
+    os.chdir( self.workDir )
+    self.payloadFile = os.path.join( self.workDir, 'payload.py' )
+    fd = open( self.payloadFile, 'w' )
+    fd.write( payloadScript )
+    fd.close()
+    self.jobID = 0
+
+  def tearDown( self ):
+    os.chdir( self.cwd )
+    shutil.rmtree( self.workDir, ignore_errors = True )
+
+  def createWrappers( self, number, duration ):
+    wrappers = []
+    for _i in range( number ):
+      self.jobID += 1
+      jobParams = {'JobID': str( self.jobID ),
+                   'JobType': 'User',
+                   'CPUTime': '1000000',
+                   'Executable': sys.executable,
+                   'Arguments': '%s %s %s' % ( self.payloadFile, duration, cpuFraction )}
+      res = createJobWrapper( self.jobID, jobParams, {}, {}, logLevel = 'NOTICE' )
+      self.assert_( res['OK'] )
+      wrappers.append( ( res['Value'], self.payloadProxy ) )
+    return wrappers
+
+class SlotThroughput( MultiSlotCETestCase ):
+
+  def test_slots( self ):
+    rows = []
+    for duration in payloadDurations:
+      for slots in slotNumbers:
+        wrappers = self.createWrappers( 2 * slots, duration )
+        res = LocalSlotPool( slots ).run( wrappers )
+        self.assert_( res['OK'] )
+        statistics = slotStatistics( res['Value'], slots )
+        self.assertEqual( statistics['Failed'], 0 )
+
+        rows.append( ( duration, slots,
+                       statistics['PayloadsPerHour'],
+                       sum( statistics['IdleTime'] ) / slots, max( statistics['IdleTime'] ),
+                       max( statistics['MaxGap'] ),
+                       statistics['CPUEfficiency'] ) )
+
+    printReport( "Local multi-slot CE, %d%% CPU bound payloads, 2 payloads per slot" % ( cpuFraction * 100 ),
+                 ( 'duration', 'slots', 'payloads/h', 'mean idle', 'max idle', 'max gap', 'CPU eff.' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( MultiSlotCETestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( SlotThroughput ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
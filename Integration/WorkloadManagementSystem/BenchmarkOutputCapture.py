@@ -0,0 +1,122 @@
+""" Benchmark of the payload output callback: the original ExecutionThread one against OutputCapture
+
+    Millions of lines are pushed through the sendOutput callback, while the Watchdog peeks
+    at the last lines every peekEvery lines, like during a chatty payload.
+    Reported: CPU time, write system calls (from /proc/self/io, Linux only) and files opened.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+from DIRAC import S_OK, S_ERROR
+
+from TestDIRAC.Utilities.Benchmark import Timer, ioCounters, printReport
+from TestDIRAC.Utilities.OutputCapture import OutputCapture
+
+lineNumbers = [100000, 1000000, 3000000]
+peekEvery = 1000
+maxPeekLines = 200
+line = 'Event 12345 processed, 42 tracks found, everything is fine so far'
+
+class LegacyOutput( object ):
+  """ the sendOutput/getOutput of the JobWrapper ExecutionThread, as it was
+  """
+
+  def __init__( self, outputFile, maxPeekLines ):
+    self.outputFile = outputFile
+    self.maxPeekLines = maxPeekLines
+    self.outputLines = []
+    self.opens = 0
+
+  def sendOutput( self, stdid, line ):
+    f = open( self.outputFile, 'a' )
+    self.opens += 1
+    f.write( 'time: ' + str( time.time() ) + '\n' )
+    f.write( 'stdid ' + str( stdid ) + '\n' )
+    f.write( 'line ' + str( line ) + '\n' )
+    f.close()
+    self.outputLines.append( line )
+
+  def getOutput( self, lines = 0 ):
+    if self.outputLines:
+      size = len( self.outputLines )
+      if size > self.maxPeekLines:
+        cut = size - self.maxPeekLines
+        self.outputLines = self.outputLines[cut:]
+      if lines:
+        size = len( self.outputLines )
+        cut = size - lines
+        self.outputLines = self.outputLines[cut:]
+      result = S_OK()
+      result['Value'] = self.outputLines
+    else:
+      result = S_ERROR( 'No Job output found' )
+    return result
+
+  def close( self ):
+    pass
+
+def countLines( fileName ):
+  fd = open( fileName )
+  try:
+    return sum( 1 for _line in fd )
+  finally:
+    fd.close()
+
+@unittest.skipUnless( sys.platform.startswith( 'linux' ), 'system calls are counted from /proc' )
+class OutputCaptureBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the output capture benchmark test cases
+  """
+
+  def setUp( self ):
+    self.tmpDir = tempfile.mkdtemp()
+
+  def tearDown( self ):
+    shutil.rmtree( self.tmpDir )
+
+  def pushLines( self, output, lineNumber ):
+    """ push lineNumber lines through the callback, return ( CPU, write syscalls )
+    """
+    before = ioCounters()
+    with Timer() as timer:
+      for i in xrange( lineNumber ):
+        output.sendOutput( 'stdout', line )
+        if not i % peekEvery:
+          self.assert_( output.getOutput( 10 )['OK'] )
+      output.close()
+    return timer.cpu, ioCounters()['syscw'] - before['syscw']
+
+class LegacyVersusCapture( OutputCaptureBenchmarkTestCase ):
+
+  def test_callback( self ):
+    rows = []
+    for lineNumber in lineNumbers:
+      legacy = LegacyOutput( os.path.join( self.tmpDir, 'legacy.out' ), maxPeekLines )
+      legacyCPU, legacyWrites = self.pushLines( legacy, lineNumber )
+
+      capture = OutputCapture( os.path.join( self.tmpDir, 'capture.out' ), maxPeekLines )
+      captureCPU, captureWrites = self.pushLines( capture, lineNumber )
+
+      # same records in the output files
+      self.assertEqual( countLines( legacy.outputFile ), 3 * lineNumber )
+      self.assertEqual( countLines( capture.writer.fileName ), 3 * lineNumber )
+      self.assertEqual( capture.getOutput()['Value'], [line] * maxPeekLines )
+
+      rows.append( ( lineNumber, legacyCPU, legacyWrites, legacy.opens,
+                     captureCPU, captureWrites, 1 ) )
+      os.remove( legacy.outputFile )
+      os.remove( capture.writer.fileName )
+
+    printReport( "Payload output callback: ExecutionThread against OutputCapture",
+                 ( 'lines', 'legacy CPU', 'write calls', 'opens', 'capture CPU', 'write calls', 'opens' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( OutputCaptureBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( LegacyVersusCapture ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
@@ -0,0 +1,164 @@
+""" Benchmark of the CPU and wall time the Watchdog itself consumes per sampling period
+
+    The payload is a shell spawning a number of sleeping child processes, so that the cost
+    of walking the process tree dominates. Two things are measured, for each number of children:
+    - one CPU + memory sample: DIRAC ProcessMonitor against the /proc ProcessTreeSampler
+    - one Watchdog checking period (Watchdog.execute()), with the default and the 'proc' sampler
+
+    The CPU reported includes the one of the commands the sampling starts (e.g. ps).
+    Linux only.
+"""
+
+import os
+import sys
+import threading
+import time
+import signal
+import unittest
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Core.Utilities.Subprocess import Subprocess
+from DIRAC.Core.Utilities.ProcessMonitor import ProcessMonitor
+
+from TestDIRAC.Utilities.Benchmark import Timer, printReport
+from TestDIRAC.Utilities.ProcessTreeSampler import ProcessTreeSampler, SamplingWatchdogFactory
+
+# number of child processes of the payload
+childrenNumbers = [1, 10, 100, 500]
+# samples or checking periods timed for each number of children
+samples = 20
+payloadDuration = 600
+
+def setUpModule():
+  initializeDIRAC()
+
+
+def payloadCommand( children ):
+  return 'for i in `seq %d`; do sleep %d & done; wait' % ( children, payloadDuration )
+
+class PayloadThread( threading.Thread ):
+  """ runs the payload like the JobWrapper ExecutionThread does, keeping only the last lines
+  """
+
+  def __init__( self, spObject, cmd ):
+    threading.Thread.__init__( self )
+    self.spObject = spObject
+    self.cmd = cmd
+    self.outputLines = []
+
+  def run( self ):
+    self.spObject.systemCall( self.cmd, callbackFunction = self.sendOutput, shell = True )
+
+  def sendOutput( self, _stdid, line ):
+    self.outputLines = ( self.outputLines + [line] )[-10:]
+
+  def getOutput( self, lines = 0 ):
+    if not self.outputLines:
+      return S_ERROR( 'No Job output found' )
+    return S_OK( self.outputLines[-lines:] )
+
+def waitForChildren( pid, children ):
+  """ wait until the payload started all its children
+  """
+  sampler = ProcessTreeSampler( maxAge = 0 )
+  while len( sampler.getTree( pid ) ) <= children:
+    time.sleep( 0.1 )
+
+@unittest.skipUnless( sys.platform.startswith( 'linux' ), 'the /proc sampler is Linux only' )
+class WatchdogBenchmarkTestCase( unittest.TestCase ):
+  """ Base class for the Watchdog benchmark test cases
+  """
+
+  def setUp( self ):
+    setTestLogLevel( 'NOTICE' )
+    self.pid = os.getpid()
+    self.spObject = None
+    self.thread = None
+
+  def startPayload( self, children ):
+    self.spObject = Subprocess( 0 )
+    self.thread = PayloadThread( self.spObject, payloadCommand( children ) )
+    self.thread.start()
+    waitForChildren( self.pid, children )
+
+  def stopPayload( self ):
+    """ kill the payload and all the children it started
+    """
+    if not self.spObject:
+      return
+    for pid in ProcessTreeSampler().getTree( self.pid )[1:]:
+      try:
+        os.kill( pid, signal.SIGKILL )
+      except OSError:
+        continue
+    self.thread.join()
+    self.spObject = None
+    self.thread = None
+
+  def tearDown( self ):
+    self.stopPayload()
+
+class SamplerOverhead( WatchdogBenchmarkTestCase ):
+
+  def test_samplers( self ):
+    """ cost of one sample of the payload tree
+    """
+    processMonitor = ProcessMonitor()
+    treeSampler = ProcessTreeSampler( maxAge = 0 )
+
+    rows = []
+    for children in childrenNumbers:
+      self.startPayload( children )
+
+      with Timer( withChildren = True ) as monitorTimer:
+        for _i in xrange( samples ):
+          self.assert_( processMonitor.getCPUConsumed( self.pid )['OK'] )
+      with Timer( withChildren = True ) as procTimer:
+        for _i in xrange( samples ):
+          self.assert_( treeSampler.getCPUConsumed( self.pid )['OK'] )
+          self.assert_( treeSampler.getTreeMemoryUsed( self.pid )['OK'] )
+
+      rows.append( ( children,
+                     monitorTimer.cpu / samples, monitorTimer.wall / samples,
+                     procTimer.cpu / samples, procTimer.wall / samples ) )
+      self.stopPayload()
+
+    printReport( "Seconds per sample of the payload tree",
+                 ( 'children', 'ProcessMonitor CPU', 'wall', '/proc CPU', 'wall' ),
+                 rows )
+
+class WatchdogOverhead( WatchdogBenchmarkTestCase ):
+
+  def test_checkingPeriod( self ):
+    """ cost of one Watchdog checking period with each sampler
+    """
+    rows = []
+    for children in childrenNumbers:
+      row = [children]
+      for sampler in SamplingWatchdogFactory.samplers:
+        self.startPayload( children )
+        result = SamplingWatchdogFactory().getWatchdog( self.pid, self.thread, self.spObject,
+                                                        payloadDuration * 10, sampler = sampler )
+        self.assert_( result['OK'] )
+        watchdog = result['Value']
+        watchdog.calibrate()
+
+        with Timer( withChildren = True ) as timer:
+          for _i in xrange( samples ):
+            self.assert_( watchdog.execute()['OK'] )
+        row += [timer.cpu / samples, timer.wall / samples]
+        self.stopPayload()
+      rows.append( row )
+
+    printReport( "Seconds per Watchdog checking period",
+                 ( 'children', 'default CPU', 'wall', 'proc CPU', 'wall' ),
+                 rows )
+
+
+if __name__ == '__main__':
+  suite = unittest.defaultTestLoader.loadTestsFromTestCase( WatchdogBenchmarkTestCase )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( SamplerOverhead ) )
+  suite.addTest( unittest.defaultTestLoader.loadTestsFromTestCase( WatchdogOverhead ) )
+  testResult = unittest.TextTestRunner( verbosity = 2 ).run( suite )
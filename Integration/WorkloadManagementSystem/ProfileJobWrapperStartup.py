@@ -0,0 +1,124 @@
+""" Cold start profile of a job wrapper created with createJobWrapper and run by the InProcess CE,
+    the same way TestJobWrapper does.
+
+    To be run in a fresh interpreter, from a directory containing the TestDIRAC tree:
+
+      python ProfileJobWrapperStartup.py [-o jobWrapperStartup.json] [-t 0.2]
+
+    The wrapper script is instrumented (see StartupProfiler.instrumentScript) so that its phases
+    are timed inside the wrapper process:
+    - interpreter: from the process start to the first line of the wrapper
+    - imports: the imports of the wrapper, up to Script.parseCommandLine
+    - configuration: parseCommandLine (local cfg and CS initialisation)
+    - wrapperInitialization: JobWrapper creation and initialize
+    - proxy: getProxyInfo calls of the JobWrapper
+    - inputSandbox, inputData: transferInputSandbox, resolveInputData
+    - payloadExecution: JobWrapper.execute, the proxy calls excluded
+    - outputs, finalization: processJobOutputs, finalize
+    - other: the rest of the wrapper, up to its exit
+    and, in this process:
+    - wrapperCreation: createJobWrapper
+    - payloadLaunch: the InProcess CE submission, the wrapper process excluded (proxy file, spawn)
+
+    The profile is appended to the output file and compared with the previous ones found there:
+    the script exits with 1 if one of the phases regressed by more than the tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+from DIRAC.Core.Base import Script
+from DIRAC import gLogger
+from DIRAC.Core.Security.ProxyInfo import getProxyInfo
+from DIRAC.Resources.Computing.ComputingElementFactory import ComputingElementFactory
+from DIRAC.WorkloadManagementSystem.Utilities.Utils import createJobWrapper
+
+from TestDIRAC.Utilities.StartupProfiler import StartupProfiler, loadProfiles, compareProfiles, instrumentScript
+from TestDIRAC.Utilities.utils import find_all, getResourceRoot
+
+# phases the instrumented wrapper has to report
+wrapperPhases = ( 'imports', 'configuration', 'wrapperInitialization', 'payloadExecution', 'finalization' )
+
+Script.registerSwitch( 'o:', 'output=', 'file where the profile is appended (default jobWrapperStartup.json)' )
+Script.registerSwitch( 't:', 'tolerance=', 'relative slowdown accepted against the previous profiles (default 0.2)' )
+
+Script.parseCommandLine()
+
+profileFile = os.path.abspath( 'jobWrapperStartup.json' )
+tolerance = 0.2
+for switch, value in Script.getUnprocessedSwitches():
+  if switch in ( 'o', 'output' ):
+    profileFile = os.path.abspath( value )
+  elif switch in ( 't', 'tolerance' ):
+    tolerance = float( value )
+
+sandboxFiles = [find_all( 'helloWorld.xml', getResourceRoot(), 'WorkloadManagementSystem' )[0],
+                find_all( 'exe-script.py', getResourceRoot(), 'WorkloadManagementSystem' )[0],
+                find_all( 'pilot.cfg', getResourceRoot(), 'WorkloadManagementSystem' )[0]]
+
+proxyInfo = getProxyInfo( disableVOMS = True )
+if not proxyInfo['OK']:
+  gLogger.error( proxyInfo['Message'] )
+  sys.exit( -1 )
+payloadProxy = proxyInfo['Value']['chain'].dumpAllToString()['Value']
+
+workDir = tempfile.mkdtemp()
+for fileName in sandboxFiles:
+  shutil.copy( fileName, workDir )
+os.chdir( workDir )
+
+jobParams = {'JobID': '1',
+             'JobType': 'Merge',
+             'CPUTime': '1000000',
+             'Executable': '$DIRACROOT/scripts/dirac-jobexec',
+             'Arguments': "helloWorld.xml -o LogLevel=DEBUG pilot.cfg",
+             'ExtraOptions': 'pilot.cfg',
+             'InputSandbox': ['helloWorld.xml', 'exe-script.py']}
+
+profiler = StartupProfiler( 'JobWrapper' )
+with profiler.phase( 'wrapperCreation' ):
+  res = createJobWrapper( 1, jobParams, {}, {}, extraOptions = 'pilot.cfg', logLevel = 'DEBUG' )
+if not res['OK']:
+  gLogger.error( res['Message'] )
+  sys.exit( -1 )
+wrapperFile = res['Value']
+if not instrumentScript( wrapperFile ):
+  gLogger.error( "No Script.parseCommandLine in %s, the wrapper phases cannot be timed" % wrapperFile )
+  sys.exit( -1 )
+
+timingFile = os.path.join( workDir, 'wrapperTiming.json' )
+os.environ['TESTDIRAC_PROCESS_TIMING'] = timingFile
+computingElement = ComputingElementFactory().getCE( 'InProcess' )['Value']
+start = time.time()
+res = computingElement.submitJob( wrapperFile, payloadProxy )
+launchTime = time.time() - start
+if not res['OK']:
+  gLogger.error( res['Message'] )
+  sys.exit( -1 )
+if not os.path.exists( timingFile ):
+  gLogger.error( "The wrapper did not write its timing to %s" % timingFile )
+  sys.exit( -1 )
+wrapperTiming = json.load( open( timingFile ) )
+untimed = [phaseName for phaseName in wrapperPhases if phaseName not in wrapperTiming['Phases']]
+if untimed:
+  gLogger.error( "Wrapper phases not timed: %s" % ', '.join( untimed ) )
+  sys.exit( -1 )
+for phaseName in wrapperTiming['Order']:
+  profiler.addDuration( phaseName, wrapperTiming['Phases'][phaseName] )
+profiler.addDuration( 'payloadLaunch', max( 0., launchTime - wrapperTiming['Total'] ) )
+
+os.chdir( os.path.dirname( profileFile ) )
+shutil.rmtree( workDir, ignore_errors = True )
+
+baselines = loadProfiles( profileFile, profiler.name )
+record = profiler.store( profileFile )
+gLogger.always( profiler.report() )
+
+regressions = compareProfiles( baselines, record, tolerance )
+for phaseName, reference, duration in regressions:
+  gLogger.error( "Startup regression in %s: %.3f s, was %.3f s" % ( phaseName, duration, reference ) )
+sys.exit( 1 if regressions else 0 )
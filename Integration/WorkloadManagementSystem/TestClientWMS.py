@@ -26,24 +26,27 @@ import unittest, datetime
 import os, tempfile
 # from mock import Mock
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel, namespaced
 
-from TestDIRAC.Utilities.utils import find_all
+from TestDIRAC.Utilities.utils import find_all, getResourceRoot
+from TestDIRAC.Utilities.BulkJobMonitoringClient import BulkJobMonitoringClient
+from TestDIRAC.Utilities.ClientCache import gClientCache
 
 from DIRAC.Interfaces.API.Job import Job
-from DIRAC.Core.DISET.RPCClient import RPCClient
 from DIRAC.WorkloadManagementSystem.Client.WMSClient import WMSClient
 from DIRAC.WorkloadManagementSystem.Client.JobMonitoringClient import JobMonitoringClient
 from DIRAC.WorkloadManagementSystem.Agent.JobCleaningAgent import JobCleaningAgent
 from DIRAC.WorkloadManagementSystem.DB.PilotAgentsDB import PilotAgentsDB
 
-from DIRAC import gLogger
+
+def setUpModule():
+  initializeDIRAC()
+
 
 def helloWorldJob():
   job = Job()
-  job.setName( "helloWorld" )
-  exeScriptLocation = find_all( 'exe-script.py', '.', 'WorkloadManagementSystem' )[0]
+  job.setName( namespaced( "helloWorld" ) )
+  exeScriptLocation = find_all( 'exe-script.py', getResourceRoot(), 'WorkloadManagementSystem' )[0]
   job.setInputSandbox( exeScriptLocation )
   job.setExecutable( "exe-script.py", "", "helloWorld.log" )
   return job
@@ -64,7 +67,7 @@ class TestWMSTestCase( unittest.TestCase ):
   def setUp( self ):
     self.maxDiff = None
 
-    gLogger.setLevel( 'VERBOSE' )
+    setTestLogLevel( 'VERBOSE' )
 
   def tearDown( self ):
     """ use the JobCleaningAgent method to remove the jobs in status 'deleted' and 'Killed'
@@ -88,7 +91,7 @@ class WMSChain( TestWMSTestCase ):
     """
     wmsClient = WMSClient()
     jobMonitor = JobMonitoringClient()
-    jobStateUpdate = RPCClient( 'WorkloadManagement/JobStateUpdate' )
+    jobStateUpdate = gClientCache.getRPCClient( 'WorkloadManagement/JobStateUpdate' )
 
     # create the job
     job = helloWorldJob()
@@ -150,7 +153,7 @@ class JobMonitoring( TestWMSTestCase ):
     """
     wmsClient = WMSClient()
     jobMonitor = JobMonitoringClient()
-    jobStateUpdate = RPCClient( 'WorkloadManagement/JobStateUpdate' )
+    jobStateUpdate = gClientCache.getRPCClient( 'WorkloadManagement/JobStateUpdate' )
 
     # create a job and check stuff
     job = helloWorldJob()
@@ -195,7 +198,21 @@ class JobMonitoring( TestWMSTestCase ):
     res = jobMonitor.getJobAttributes( jobID )
     self.assert_( res['OK'] )
     self.assertEqual( res['Value']['ApplicationStatus'], 'Minchiapp status' )
-    self.assertEqual( res['Value']['JobName'], 'helloWorld' )
+    self.assertEqual( res['Value']['JobName'], namespaced( 'helloWorld' ) )
+
+    # the multi-job variants give the same as the single ones
+    bulkMonitor = BulkJobMonitoringClient()
+    res = bulkMonitor.getJobsParameters( [jobID] )
+    self.assert_( res['OK'] )
+    self.assertEqual( res['Value'], {jobID: {'par1': 'par1Value', 'par2': 'par2Value'}} )
+    res = bulkMonitor.getJobsParameter( [jobID], 'par1' )
+    self.assert_( res['OK'] )
+    self.assertEqual( res['Value'], {jobID: 'par1Value'} )
+    res = bulkMonitor.getJobsAttributes( [jobID], ['Site', 'JobName'] )
+    self.assert_( res['OK'] )
+    self.assertEqual( res['Value'][jobID]['Site'], 'Site' )
+    self.assertEqual( res['Value'][jobID]['JobName'], namespaced( 'helloWorld' ) )
+
     res = jobMonitor.getJobSummary( jobID )
     self.assert_( res['OK'] )
     self.assertEqual( res['Value']['ApplicationStatus'], 'Minchiapp status' )
@@ -248,7 +265,7 @@ class JobMonitoringMore( TestWMSTestCase ):
     """
     wmsClient = WMSClient()
     jobMonitor = JobMonitoringClient()
-    jobStateUpdate = RPCClient( 'WorkloadManagement/JobStateUpdate' )
+    jobStateUpdate = gClientCache.getRPCClient( 'WorkloadManagement/JobStateUpdate' )
 
     jobIDs = []
     dests = ['DIRAC.site1.org', 'DIRAC.site2.org']
@@ -336,7 +353,7 @@ class WMSAdministrator( TestWMSTestCase ):
   
   def test_JobDBWMSAdmin(self):
   
-    wmsAdministrator = RPCClient( 'WorkloadManagement/WMSAdministrator' )
+    wmsAdministrator = gClientCache.getRPCClient( 'WorkloadManagement/WMSAdministrator' )
 
     sitesList = ['My.Site.org', 'Your.Site.org']
     res = wmsAdministrator.setSiteMask( sitesList )
@@ -383,7 +400,7 @@ class WMSAdministratorPilots( TestWMSTestCase ):
 
   def test_PilotsDB( self ):
 
-    wmsAdministrator = RPCClient( 'WorkloadManagement/WMSAdministrator' )
+    wmsAdministrator = gClientCache.getRPCClient( 'WorkloadManagement/WMSAdministrator' )
     pilotAgentDB = PilotAgentsDB()
 
 
@@ -3,10 +3,8 @@
 
 import unittest
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
 
-from DIRAC import gLogger
 from DIRAC.WorkloadManagementSystem.DB.JobDB import JobDB
 
 jdl = """
@@ -39,12 +37,16 @@ jdl = """
 ]
 """
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class JobDBTestCase( unittest.TestCase ):
   """ Base class for the JobDB test cases
   """
 
   def setUp( self ):
-    gLogger.setLevel( 'DEBUG' )
+    setTestLogLevel( 'DEBUG' )
     self.jobDB = JobDB()
 
   def tearDown( self ):
@@ -3,11 +3,14 @@
 
 import unittest, datetime
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC
 
 from DIRAC.WorkloadManagementSystem.DB.JobLoggingDB import JobLoggingDB
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class JobLoggingDBTestCase( unittest.TestCase ):
   """ Base class for the JobLoggingDB test cases
   """
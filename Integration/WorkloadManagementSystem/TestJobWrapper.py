@@ -1,22 +1,24 @@
 from DIRAC.Resources.Computing.ComputingElementFactory import ComputingElementFactory
 from DIRAC.WorkloadManagementSystem.Utilities.Utils import createJobWrapper
-from DIRAC.Core.Security.ProxyInfo import getProxyInfo
 
-from DIRAC import gLogger
 import unittest
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
+from TestDIRAC.Utilities.ProxyCache import gProxyCache
+
+def setUpModule():
+  initializeDIRAC()
+
 
 class JobWrapperTestCase( unittest.TestCase ):
   """ Base class for the jobWrapper test cases
   """
 
   def setUp( self ):
-    gLogger.setLevel( 'DEBUG' )
+    setTestLogLevel( 'DEBUG' )
     self.wrapperFile = None
 
-    # get proxy
-    proxyInfo = getProxyInfo( disableVOMS = True )
-    proxyChain = proxyInfo['Value']['chain']
-    proxyDumped = proxyChain.dumpAllToString()
+    # get proxy, loaded and dumped once for all the tests
+    proxyDumped = gProxyCache.getProxyString( disableVOMS = True )
     self.payloadProxy = proxyDumped['Value']
 
   def tearDown( self ):
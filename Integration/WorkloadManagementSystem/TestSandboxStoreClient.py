@@ -28,23 +28,25 @@
 
 import unittest
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
 
-from TestDIRAC.Utilities.utils import find_all
+from TestDIRAC.Utilities.utils import find_all, getResourceRoot
 
-from DIRAC import gLogger
 
 from DIRAC.WorkloadManagementSystem.Client.SandboxStoreClient import SandboxStoreClient
 from DIRAC.WorkloadManagementSystem.DB.SandboxMetadataDB import SandboxMetadataDB
 
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class TestSSCTestCase( unittest.TestCase ):
 
   def setUp( self ):
     self.maxDiff = None
 
-    gLogger.setLevel( 'VERBOSE' )
+    setTestLogLevel( 'VERBOSE' )
 
   def tearDown( self ):
     """
@@ -59,7 +61,7 @@ class SSC( TestSSCTestCase ):
     ssc = SandboxStoreClient()
     smDB = SandboxMetadataDB()
 
-    exeScriptLocation = find_all( 'exe-script.py', '.', 'WorkloadManagementSystem' )[0]
+    exeScriptLocation = find_all( 'exe-script.py', getResourceRoot(), 'WorkloadManagementSystem' )[0]
     fileList = [exeScriptLocation]
     res = ssc.uploadFilesAsSandbox( fileList )
     self.assert_( res['OK'] )
@@ -3,18 +3,20 @@
 
 import unittest
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel
 
-from DIRAC import gLogger
 from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import TaskQueueDB
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class TQDBTestCase( unittest.TestCase ):
   """ Base class for the JobDB test cases
   """
 
   def setUp( self ):
-    gLogger.setLevel( 'DEBUG' )
+    setTestLogLevel( 'DEBUG' )
     self.tqDB = TaskQueueDB()
 
   def tearDown( self ):
@@ -3,24 +3,28 @@
 # File  : TestWatchdogMac.py
 # Author: Stuart Paterson
 ########################################################################
-from DIRAC.Core.Base import Script
-Script.parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC
 
 from DIRAC.WorkloadManagementSystem.JobWrapper.WatchdogFactory  import WatchdogFactory
 
 import unittest,types,time,sys
 
-from DIRAC                                                 import S_OK, S_ERROR
 import os,threading,time
 
 from DIRAC.Core.Utilities.Subprocess import Subprocess
 
+from TestDIRAC.Utilities.OutputCapture import OutputCapture
+
 import sys
 script = 'myPythonScript.py'
 
 EXECUTION_RESULT = {}
 #############################################################################
 
+def setUpModule():
+  initializeDIRAC()
+
+
 class JobWrapper:
 
   def __init__(self):
@@ -77,9 +81,8 @@ class ExecutionThread(threading.Thread):
     threading.Thread.__init__(self)
     self.cmd = cmd
     self.spObject = spObject
-    self.outputLines = []
-    self.maxPeekLines = maxPeekLines
     self.outputFile = 'appstd.out'
+    self.output = OutputCapture(self.outputFile,maxPeekLines)
 
   def run(self):
     cmd = self.cmd
@@ -87,40 +90,17 @@ class ExecutionThread(threading.Thread):
     pid = os.getpid()
     start = time.time()
     output = spObject.systemCall( cmd, callbackFunction = self.sendOutput, shell = True )
+    self.output.close()
     EXECUTION_RESULT['Thread'] = output
     timing = time.time() - start
     EXECUTION_RESULT['PID']=pid
     EXECUTION_RESULT['Timing']=timing
 
   def sendOutput(self,stdid,line):
-    f = open(self.outputFile,'a')
-    f.write('time: '+str(time.time())+'\n')
-    f.write('stdid '+str(stdid)+'\n')
-    f.write('line '+str(line)+'\n')
-    f.close()
-    self.outputLines.append(line)
+    self.output.sendOutput(stdid,line)
 
   def getOutput(self,lines=0):
-    if self.outputLines:
-      size = len(self.outputLines)
-      #reduce max size of output peeking
-      if size > self.maxPeekLines:
-        cut = size - self.maxPeekLines
-        self.outputLines = self.outputLines[cut:]
-
-      #restrict to smaller number of lines for regular
-      #peeking by the watchdog
-      if lines:
-        size = len(self.outputLines)
-        cut  = size - lines
-        self.outputLines = self.outputLines[cut:]
-
-      result = S_OK()
-      result['Value'] = self.outputLines
-    else:
-      result = S_ERROR('No Job output found')
-
-    return result
+    return self.output.getOutput(lines)
 
   #############################################################################
   #############################################################################
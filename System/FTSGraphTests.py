@@ -18,8 +18,7 @@
 # @date 2013/05/08 09:05:33
 # @brief Definition of FTSGraphTests class.
 
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC
 
 # # imports
 import unittest
@@ -27,8 +26,13 @@ import unittest
 from DIRAC.DataManagementSystem.private.FTSGraph import FTSGraph
 # # from DIRAC
 from DIRAC.DataManagementSystem.private.FTSHistoryView import FTSHistoryView
+# # indexed version
+from TestDIRAC.Utilities.FTSRoutingIndex import IndexedFTSGraph
 
 
+def setUpModule():
+  initializeDIRAC()
+
 ########################################################################
 class FTSGraphTests( unittest.TestCase ):
   """
@@ -73,6 +77,33 @@ class FTSGraphTests( unittest.TestCase ):
     route = graph.findRoute( "RAL-FOO", "CERN-BAR" )
     self.assertEqual( route["OK"], False, "findRoute failed for unknown source and target SEs" )
 
+  def testIndexed( self ):
+    """ indexed graph gives the same sites and routes """
+    graph = FTSGraph( "ftsGraph", self.ftsHistoryViews )
+    indexed = IndexedFTSGraph( "ftsGraph", self.ftsHistoryViews )
+
+    for se in ( "CERN-USER", "RAL-USER", "CERN-FOO" ):
+      site = graph.findSiteForSE( se )
+      indexedSite = indexed.findSiteForSE( se )
+      self.assertEqual( indexedSite["OK"], site["OK"], "findSiteForSE differs for %s" % se )
+      if site["OK"]:
+        self.assertEqual( indexedSite["Value"].name, site["Value"].name, "wrong site for %s" % se )
+
+    for sourceSE, targetSE in ( ( "CERN-USER", "RAL-USER" ), ( "RAL-USER", "CERN-USER" ), ( "RAL-FOO", "CERN-BAR" ) ):
+      route = graph.findRoute( sourceSE, targetSE )
+      indexedRoute = indexed.findRoute( sourceSE, targetSE )
+      self.assertEqual( indexedRoute["OK"], route["OK"], "findRoute differs for %s -> %s" % ( sourceSE, targetSE ) )
+      if route["OK"]:
+        self.assertEqual( indexedRoute["Value"].routeName, route["Value"].routeName, "wrong route" )
+        self.assertEqual( indexedRoute["Value"].ActiveJobs, route["Value"].ActiveJobs, "wrong ActiveJobs" )
+
+    # # same history: nothing to recompute, then one changed view: its route only
+    self.assertEqual( indexed.updateHistory( self.ftsHistoryViews )["Value"], 0, "unchanged history recomputed" )
+    self.ftsHistoryViews[0].FTSJobs += 5
+    self.assertEqual( indexed.updateHistory( self.ftsHistoryViews )["Value"], 1, "changed route not recomputed" )
+    route = indexed.findRoute( "CERN-USER", "RAL-USER" )["Value"]
+    self.assertEqual( route.ActiveJobs, 15, "wrong ActiveJobs after update" )
+
 
 # # test execution
 if __name__ == "__main__":
@@ -1,27 +1,30 @@
-from DIRAC.Core.Base.Script import parseCommandLine
-parseCommandLine()
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, setTestLogLevel, namespaced
 
 import unittest
-import time
 
 from DIRAC import gLogger
-from DIRAC.Core.Security.ProxyInfo import getProxyInfo
 from DIRAC.Interfaces.API.Dirac import Dirac
 from DIRAC.Interfaces.API.Job import Job
 
-from TestDIRAC.Utilities.utils import find_all
-
-gLogger.setLevel( 'VERBOSE' )
+from TestDIRAC.Utilities.utils import find_all, getResourceRoot
+from TestDIRAC.Utilities.JobWaiter import JobWaiter
+from TestDIRAC.Utilities.OutputCleaner import OutputCleaner
+from TestDIRAC.Utilities.ProxyCache import gProxyCache
 
 jobsSubmittedList = []
 
+def setUpModule():
+  initializeDIRAC()
+  setTestLogLevel( 'VERBOSE' )
+
+
 class GridSubmissionTestCase( unittest.TestCase ):
   """ Base class for the Regression test cases
   """
   def setUp( self ):
     self.dirac = Dirac()
 
-    result = getProxyInfo()
+    result = gProxyCache.getProxyInfo()
     if result['Value']['group'] not in ['dirac_user']:
       print "GET A USER GROUP"
       exit( 1 )
@@ -38,8 +41,8 @@ class submitSuccess( GridSubmissionTestCase ):
 
     helloJ = Job()
 
-    helloJ.setName( "helloWorld-test-T2s" )
-    helloJ.setInputSandbox( [find_all( 'exe-script.py', '.', 'GridTestSubmission' )[0]] )
+    helloJ.setName( namespaced( "helloWorld-test-T2s" ) )
+    helloJ.setInputSandbox( [find_all( 'exe-script.py', getResourceRoot(), 'GridTestSubmission' )[0]] )
 
     helloJ.setExecutable( "exe-script.py", "", "helloWorld.log" )
 
@@ -58,8 +61,8 @@ class submitSuccess( GridSubmissionTestCase ):
 
     helloJ = Job()
 
-    helloJ.setName( "upload-Output-test" )
-    helloJ.setInputSandbox( [find_all( 'testFileUpload.txt', '.', 'GridTestSubmission' )[0]] )
+    helloJ.setName( namespaced( "upload-Output-test" ) )
+    helloJ.setInputSandbox( [find_all( 'testFileUpload.txt', getResourceRoot(), 'GridTestSubmission' )[0]] )
     helloJ.setExecutable( "exe-script.py", "", "helloWorld.log" )
 
     helloJ.setCPUTime( 17800 )
@@ -82,36 +85,27 @@ class monitorSuccess( GridSubmissionTestCase ):
 
   def test_monitor( self ):
 
-    toRemove = []
-    fail = False
+    # the jobs should be done in about half an hour, they are waited for up to 6 hours
+    waiter = JobWaiter( self.dirac, expectedDuration = 1800, timeout = 6 * 3600 )
+    jobStatus = waiter.wait( jobsSubmittedList )
+    self.assert_( jobStatus['OK'] )
 
-    # we will check every 10 minutes, up to 6 hours
-    counter = 0
-    while counter < 36:
-      jobStatus = self.dirac.status( jobsSubmittedList )
-      self.assert_( jobStatus['OK'] )
-      for jobID in jobsSubmittedList:
-        status = jobStatus['Value'][jobID]['Status']
-        minorStatus = jobStatus['Value'][jobID]['MinorStatus']
-        if status == 'Done':
-          self.assert_( minorStatus in ['Execution Complete', 'Requests Done'] )
-          jobsSubmittedList.remove( jobID )
-          res = self.dirac.getJobOutputLFNs( jobID )
-          if res['OK']:
-            lfns = res['Value']
-            toRemove += lfns
-        if status in ['Failed', 'Killed', 'Deleted']:
-          fail = True
-          jobsSubmittedList.remove( jobID )
-      if jobsSubmittedList:
-        time.sleep( 600 )
-        counter = counter + 1
+    fail = False
+    for jobID in jobsSubmittedList:
+      status = jobStatus['Value'][jobID]['Status']
+      minorStatus = jobStatus['Value'][jobID]['MinorStatus']
+      if status == 'Done':
+        self.assert_( minorStatus in ['Execution Complete', 'Requests Done'] )
       else:
-        break
+        gLogger.error( "Job %s ended as %s (%s)" % ( jobID, status, minorStatus ) )
+        fail = True
 
     # removing produced files
-    res = self.dirac.removeFile( toRemove )
+    cleaner = OutputCleaner()
+    res = cleaner.removeFiles( waiter.outputLFNs )
     self.assert_( res['OK'] )
+    gLogger.info( cleaner.report( res['Value'] ) )
+    self.assertFalse( res['Value']['Failed'] )
 
     if fail:
       self.assertFalse( True )
@@ -0,0 +1,86 @@
+""" Few helpers shared by the benchmark test cases: timing of code blocks and tabular reports
+"""
+
+import time
+import resource
+
+def cpuTime( withChildren = False ):
+  """ user + system CPU time consumed so far by this process,
+      plus the one of its terminated children if withChildren
+  """
+  usage = resource.getrusage( resource.RUSAGE_SELF )
+  total = usage.ru_utime + usage.ru_stime
+  if withChildren:
+    usage = resource.getrusage( resource.RUSAGE_CHILDREN )
+    total += usage.ru_utime + usage.ru_stime
+  return total
+
+class Timer( object ):
+  """ Context manager measuring the wall clock and CPU time spent in a block
+
+      with Timer() as timer:
+        doSomething()
+      print timer.wall, timer.cpu
+  """
+
+  def __init__( self, withChildren = False ):
+    self.withChildren = withChildren
+    self.wall = 0.
+    self.cpu = 0.
+    self.__wallStart = None
+    self.__cpuStart = None
+
+  def __enter__( self ):
+    self.__wallStart = time.time()
+    self.__cpuStart = cpuTime( self.withChildren )
+    return self
+
+  def __exit__( self, *_exc ):
+    self.wall = time.time() - self.__wallStart
+    self.cpu = cpuTime( self.withChildren ) - self.__cpuStart
+    return False
+
+def printReport( title, header, rows ):
+  """ print a simple fixed width table, one line per row
+  """
+  widths = [len( str( column ) ) for column in header]
+  for row in rows:
+    widths = [max( width, len( formatCell( cell ) ) ) for width, cell in zip( widths, row )]
+
+  print
+  print title
+  print '  '.join( str( column ).rjust( width ) for column, width in zip( header, widths ) )
+  print '  '.join( '-' * width for width in widths )
+  for row in rows:
+    print '  '.join( formatCell( cell ).rjust( width ) for cell, width in zip( row, widths ) )
+
+def formatCell( cell ):
+  if isinstance( cell, float ):
+    return '%.4f' % cell
+  return str( cell )
+
+def ioCounters():
+  """ I/O counters of this process from /proc/self/io (Linux), e.g. syscr and syscw,
+      the number of read and write system calls
+  """
+  counters = {}
+  fd = open( '/proc/self/io' )
+  try:
+    for line in fd:
+      name, value = line.split( ':' )
+      counters[name.strip()] = int( value )
+  finally:
+    fd.close()
+  return counters
+
+def residentMemory():
+  """ resident set size of this process in bytes, from /proc/self/status (Linux)
+  """
+  fd = open( '/proc/self/status' )
+  try:
+    for line in fd:
+      if line.startswith( 'VmRSS:' ):
+        return int( line.split()[1] ) * 1024
+  finally:
+    fd.close()
+  return 0
@@ -0,0 +1,128 @@
+""" Lazy DIRAC initialisation for the test modules
+
+    The test modules do not call parseCommandLine() at import time: they call initializeDIRAC()
+    from their setUpModule, so that importing, collecting or selecting them does not pay the
+    local configuration and CS initialisation. The initialisation is done once per process,
+    the first time a test needing it is about to run.
+
+      from TestDIRAC.Utilities.Bootstrap import initializeDIRAC
+
+      def setUpModule():
+        initializeDIRAC()
+
+    The log level of the suite is set with setTestLogLevel instead of gLogger.setLevel:
+    the level each test case asks for is only a default, which the TESTDIRAC_LOG_LEVEL
+    environment variable overrides for the whole suite, e.g. to run it at NOTICE level
+    when timings matter, without the DEBUG output distorting them.
+"""
+
+import os
+import time
+
+bootstrapState = { 'Initialized' : False, 'Duration' : 0. }
+
+def initializeDIRAC( ignoreErrors = False ):
+  """ parseCommandLine, the first time it is called in the process
+
+  :param bool ignoreErrors: passed to parseCommandLine, for runners adding their own switches
+  :return: True if the initialisation was done by this call
+  """
+  if bootstrapState['Initialized']:
+    return False
+  start = time.time()
+  from DIRAC.Core.Base.Script import parseCommandLine
+  parseCommandLine( ignoreErrors = ignoreErrors )
+  if os.environ.get( 'TESTDIRAC_LOG_LEVEL' ):
+    setTestLogLevel()
+  if os.environ.get( 'TESTDIRAC_DB_PREFIX' ):
+    setDBPrefix( os.environ['TESTDIRAC_DB_PREFIX'] )
+  bootstrapState['Initialized'] = True
+  bootstrapState['Duration'] = time.time() - start
+  return True
+
+def isInitialized():
+  return bootstrapState['Initialized']
+
+def setTestLogLevel( defaultLevel = 'INFO' ):
+  """ set the gLogger level to TESTDIRAC_LOG_LEVEL if defined, to defaultLevel otherwise
+
+  :return: the level set
+  """
+  from DIRAC import gLogger
+  level = os.environ.get( 'TESTDIRAC_LOG_LEVEL', defaultLevel ).upper()
+  gLogger.setLevel( level )
+  return level
+
+def databaseOptions():
+  """ the databases of all the systems and instances
+
+  :return: list of ( 'System/Database', path of its DBName option )
+  """
+  from DIRAC import gConfig
+  options = []
+  result = gConfig.getSections( '/Systems' )
+  if not result['OK']:
+    return options
+  for system in result['Value']:
+    instances = gConfig.getSections( '/Systems/%s' % system )
+    if not instances['OK']:
+      continue
+    for instance in instances['Value']:
+      databasesPath = '/Systems/%s/%s/Databases' % ( system, instance )
+      databases = gConfig.getSections( databasesPath )
+      if not databases['OK']:
+        continue
+      for database in databases['Value']:
+        options.append( ( '%s/%s' % ( system, database ), '%s/%s/DBName' % ( databasesPath, database ) ) )
+  return options
+
+def setDBPrefix( prefix ):
+  """ prepend prefix to the DBName of the databases of all the systems and instances
+
+      Only the configuration of this process changes: the services keep their own DBs
+
+  :return: list of the DBName options changed
+  """
+  from DIRAC import gConfig
+  changed = []
+  for _fullName, optionPath in databaseOptions():
+    dbName = gConfig.getValue( optionPath, optionPath.split( '/' )[-2] )
+    if not dbName.startswith( prefix ):
+      gConfig.setOptionValue( optionPath, prefix + dbName )
+      changed.append( optionPath )
+  return changed
+
+def missingDatabases( prefix ):
+  """ the databases that setDBPrefix( prefix ) would use and that do not exist on their server
+
+  :return: S_OK( [ prefixed DB names ] )
+  """
+  from DIRAC import S_OK, S_ERROR
+  from DIRAC.ConfigurationSystem.Client.Utilities import getDBParameters
+  from DIRAC.Core.Utilities.MySQL import MySQL
+  existing = {}
+  missing = []
+  for fullName in sorted( set( [fullName for fullName, _optionPath in databaseOptions()] ) ):
+    result = getDBParameters( fullName )
+    if not result['OK']:
+      return result
+    parameters = result['Value']
+    server = ( parameters['Host'], parameters['Port'], parameters['User'] )
+    if server not in existing:
+      result = MySQL( parameters['Host'], parameters['User'], parameters['Password'],
+                      'INFORMATION_SCHEMA', parameters['Port'] )._query( 'SHOW DATABASES' )
+      if not result['OK']:
+        return S_ERROR( "Cannot list the databases of %s: %s" % ( parameters['Host'], result['Message'] ) )
+      existing[server] = set( [row[0] for row in result['Value']] )
+    dbName = prefix + parameters['DBName']
+    if dbName not in existing[server] and dbName not in missing:
+      missing.append( dbName )
+  return S_OK( missing )
+
+def namespaced( name ):
+  """ name in the namespace of this worker (TESTDIRAC_NAMESPACE), name itself if there is none
+  """
+  namespace = os.environ.get( 'TESTDIRAC_NAMESPACE' )
+  if not namespace:
+    return name
+  return '%s-%s' % ( namespace, name )
@@ -0,0 +1,218 @@
+""" DataLoggingClient queuing the records and sending them in batches from a thread
+
+    DataLoggingClient.addFileRecord is one synchronous RPC to DataManagement/DataLogging per
+    call, on the transfer path of the agents. BufferedDataLoggingClient.addFileRecord only
+    appends the records, stamped with the time of the call, to a buffer and returns; a
+    background thread sends them with addFileRecords:
+    - as soon as maxRecords records are waiting
+    - otherwise every flushPeriod seconds
+
+    A batch that fails is put back at the head of the buffer and sent again at the next period,
+    the records keep their order. Beyond maxQueued waiting records, addFileRecord flushes
+    synchronously. close() stops the thread and sends what is left. Neither the thread nor
+    the exit handler keep the client alive: the clients still open at a clean exit are closed
+    then, a client collected before is closed at that time. The reads (getFileLoggingInfo,
+    getUniqueStates) flush first, the other calls go to the client.
+
+      dataLogging = BufferedDataLoggingClient()
+      dataLogging.addFileRecord( lfns, 'Replicate', 'FTS', source = 'FTSAgent' )
+"""
+
+import atexit
+import weakref
+import threading
+import time
+
+from DIRAC import S_OK, S_ERROR, gLogger
+from DIRAC.Core.Utilities import Time
+from DIRAC.DataManagementSystem.Client.DataLoggingClient import DataLoggingClient
+
+# the clients not closed yet, referenced weakly
+_openClients = weakref.WeakSet()
+
+def _closeOpenClients():
+  for client in list( _openClients ):
+    client.close()
+
+atexit.register( _closeOpenClients )
+
+class BufferedDataLoggingClient( object ):
+  """ asynchronous DataLoggingClient
+  """
+
+  def __init__( self, client = None, maxRecords = 1000, flushPeriod = 5., maxQueued = 100000 ):
+    """ c'tor
+
+    :param client: the client sending the batches, a DataLoggingClient by default
+    """
+    self.client = client if client else DataLoggingClient()
+    self.maxRecords = maxRecords
+    self.flushPeriod = flushPeriod
+    self.maxQueued = maxQueued
+    self.log = gLogger.getSubLogger( 'BufferedDataLoggingClient' )
+    self.sent = 0
+    self.batches = 0
+    self.failures = 0
+    self.__records = []
+    self.__closed = False
+    self.__failed = False
+    self.__condition = threading.Condition()
+    # one batch in flight at a time, to keep the order of the records
+    self.__sendLock = threading.Lock()
+    self.__thread = threading.Thread( target = BufferedDataLoggingClient.__run,
+                                      args = ( weakref.ref( self ), self.__condition ), name = 'DataLoggingFlush' )
+    # # not joined by the interpreter before the atexit handlers, close joins it
+    self.__thread.setDaemon( True )
+    self.__thread.start()
+    _openClients.add( self )
+
+  def __del__( self ):
+    try:
+      closed = self.__closed
+    except AttributeError:
+      return
+    if not closed:
+      self.close()
+
+  def queued( self ):
+    """ number of records waiting
+    """
+    return len( self.__records )
+
+  def addFileRecord( self, lfns, status, minor = 'Unknown', date = None, source = 'Unknown' ):
+    """ queue a record for each of lfns, as DataLoggingClient.addFileRecord
+
+    :return: S_OK( number of queued records )
+    """
+    lfns = [lfns] if isinstance( lfns, basestring ) else lfns
+    date = date if date else Time.dateTime()
+    if isinstance( date, basestring ):
+      dateString, date = date, Time.fromString( date )
+    else:
+      dateString = Time.toString( date )
+    return self.addFileRecords( [( lfn, status, minor, dateString, date, source ) for lfn in lfns] )
+
+  def addFileRecords( self, fileTuples ):
+    """ queue the records ( lfn, status, minor, date string, date, source )
+
+    :return: S_OK( number of queued records )
+    """
+    self.__condition.acquire()
+    try:
+      closed = self.__closed
+      self.__records.extend( fileTuples )
+      queued = len( self.__records )
+      if queued >= self.maxRecords:
+        self.__condition.notify()
+    finally:
+      self.__condition.release()
+    if closed or queued >= self.maxQueued:
+      # # closed or too many waiting: sent now, in order after the records already waiting
+      result = self.flush()
+      if not result['OK']:
+        return result
+    return S_OK( len( fileTuples ) )
+
+  def flush( self ):
+    """ send all the waiting records now
+
+    :return: S_OK( number of records sent )
+    """
+    self.__sendLock.acquire()
+    try:
+      sent = 0
+      while True:
+        self.__condition.acquire()
+        try:
+          batch = self.__records[:self.maxRecords]
+          del self.__records[:self.maxRecords]
+        finally:
+          self.__condition.release()
+        if not batch:
+          self.__failed = False
+          return S_OK( sent )
+        result = self.__send( batch )
+        if not result['OK']:
+          self.__condition.acquire()
+          try:
+            self.__records[0:0] = batch
+            self.__failed = True
+          finally:
+            self.__condition.release()
+          return result
+        sent += len( batch )
+    finally:
+      self.__sendLock.release()
+
+  def __send( self, batch ):
+    try:
+      result = self.client.addFileRecords( batch )
+    except Exception, error:
+      result = S_ERROR( "addFileRecords: %s" % error )
+    if not result['OK']:
+      self.failures += 1
+      self.log.warn( "Cannot send %d records: %s" % ( len( batch ), result['Message'] ) )
+      return result
+    self.sent += len( batch )
+    self.batches += 1
+    return S_OK( len( batch ) )
+
+  @staticmethod
+  def __run( clientRef, condition ):
+    """ flush when maxRecords are waiting or every flushPeriod, until closed or collected
+
+        the client is not held while waiting, so that it can be collected
+    """
+    while True:
+      client = clientRef()
+      if client is None:
+        return
+      deadline = time.time() + client.flushPeriod
+      condition.acquire()
+      try:
+        # # after a failure, wait for the next period whatever the number of records
+        while not client.__closed and time.time() < deadline and ( client.__failed or len( client.__records ) < client.maxRecords ):
+          client = None
+          condition.wait( deadline - time.time() )
+          client = clientRef()
+          if client is None:
+            return
+        if client.__closed:
+          return
+      finally:
+        condition.release()
+      client.flush()
+
+  def close( self ):
+    """ stop the thread and send the records left
+
+    :return: S_OK( number of records sent ) or the error of the last batch
+    """
+    self.__condition.acquire()
+    try:
+      self.__closed = True
+      self.__condition.notify()
+    finally:
+      self.__condition.release()
+    _openClients.discard( self )
+    if self.__thread.isAlive() and self.__thread is not threading.currentThread():
+      self.__thread.join()
+    result = self.flush()
+    if not result['OK']:
+      self.log.error( "%d records not sent" % len( self.__records ), result['Message'] )
+    return result
+
+  def getFileLoggingInfo( self, lfn ):
+    """ the records of lfn, the waiting ones included
+    """
+    self.flush()
+    return self.client.getFileLoggingInfo( lfn )
+
+  def getUniqueStates( self ):
+    self.flush()
+    return self.client.getUniqueStates()
+
+  def __getattr__( self, name ):
+    if name.startswith( '_' ):
+      raise AttributeError( name )
+    return getattr( self.client, name )
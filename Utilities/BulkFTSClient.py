@@ -0,0 +1,155 @@
+""" Multi-job variants of the FTSClient put, peek, get and delete calls
+
+    putFTSJobs, peekFTSJobs, getFTSJobs, deleteFTSJobs, peekFTSFiles and getFTSFiles take lists
+    and call the FTSManager methods of the same name once per chunk of chunkSize items.
+    The bulk methods take the list of IDs, { index : FTSJob JSON } for putFTSJobs, and reply
+    S_OK( { 'Successful' : { key : value }, 'Failed' : { key : message } } ), value being what
+    the single item method returns.
+    An FTSManager without these methods replies that the method is unknown: the client then
+    remembers it and falls back to the single item calls (putFTSJob, getFTSJob...), one per item,
+    over the same connection.
+
+    The results are in the same Successful/Failed form:
+
+      result = BulkFTSClient().getFTSJobs( ftsJobIDs )
+      ftsJobs = result['Value']['Successful']  # { ftsJobID : FTSJob }
+"""
+
+from DIRAC import S_OK, gLogger
+from DIRAC.DataManagementSystem.Client.FTSJob import FTSJob
+from DIRAC.DataManagementSystem.Client.FTSFile import FTSFile
+
+from TestDIRAC.Utilities.ClientCache import gClientCache
+
+# what the service replies for a method it does not export
+unknownMethodMessages = ( 'Unknown method', 'not exported', 'has no attribute' )
+
+class BulkFTSClient( object ):
+  """ Client putting and fetching many FTS jobs and files in few round trips
+  """
+
+  def __init__( self, url = 'DataManagement/FTSManager', chunkSize = 1000 ):
+    self.ftsManager = gClientCache.getRPCClient( url )
+    self.chunkSize = chunkSize
+    # method -> None: not known yet, then True/False once the service replied
+    self.bulkMethods = {}
+    self.log = gLogger.getSubLogger( 'BulkFTSClient' )
+
+  def putFTSJobs( self, ftsJobs ):
+    """ put a list of FTS jobs with their files
+
+    :return: S_OK( { 'Successful' : [ index in ftsJobs ], 'Failed' : { index : message } } )
+    """
+    items = []
+    for ftsJob in ftsJobs:
+      ftsJobJSON = ftsJob.toJSON()
+      if not ftsJobJSON['OK']:
+        return ftsJobJSON
+      items.append( ftsJobJSON['Value'] )
+    result = self.__call( 'putFTSJobs', 'putFTSJob', range( len( items ) ),
+                          lambda chunk: dict( [( index, items[index] ) for index in chunk] ),
+                          lambda index: items[index] )
+    if not result['OK']:
+      return result
+    return S_OK( { 'Successful' : sorted( result['Value']['Successful'] ), 'Failed' : result['Value']['Failed'] } )
+
+  def peekFTSJobs( self, ftsJobIDs ):
+    """ peek a list of FTS jobs
+
+    :return: S_OK( { 'Successful' : { ftsJobID : FTSJob }, 'Failed' : { ftsJobID : message } } )
+    """
+    return self.__getObjects( 'peekFTSJobs', 'peekFTSJob', ftsJobIDs, FTSJob )
+
+  def getFTSJobs( self, ftsJobIDs ):
+    """ get a list of FTS jobs, as getFTSJob does for one
+
+    :return: S_OK( { 'Successful' : { ftsJobID : FTSJob }, 'Failed' : { ftsJobID : message } } )
+    """
+    return self.__getObjects( 'getFTSJobs', 'getFTSJob', ftsJobIDs, FTSJob )
+
+  def deleteFTSJobs( self, ftsJobIDs ):
+    """ delete a list of FTS jobs
+
+    :return: S_OK( { 'Successful' : { ftsJobID : True }, 'Failed' : { ftsJobID : message } } )
+    """
+    ftsJobIDs = [int( ftsJobID ) for ftsJobID in ftsJobIDs]
+    result = self.__call( 'deleteFTSJobs', 'deleteFTSJob', ftsJobIDs, list, int )
+    if not result['OK']:
+      return result
+    return S_OK( { 'Successful' : dict.fromkeys( result['Value']['Successful'], True ),
+                   'Failed' : result['Value']['Failed'] } )
+
+  def peekFTSFiles( self, ftsFileIDs ):
+    """ peek a list of FTS files
+
+    :return: S_OK( { 'Successful' : { ftsFileID : FTSFile }, 'Failed' : { ftsFileID : message } } )
+    """
+    return self.__getObjects( 'peekFTSFiles', 'peekFTSFile', ftsFileIDs, FTSFile )
+
+  def getFTSFiles( self, ftsFileIDs ):
+    """ get a list of FTS files
+
+    :return: S_OK( { 'Successful' : { ftsFileID : FTSFile }, 'Failed' : { ftsFileID : message } } )
+    """
+    return self.__getObjects( 'getFTSFiles', 'getFTSFile', ftsFileIDs, FTSFile )
+
+  def __getObjects( self, bulkMethod, singleMethod, ids, objectClass ):
+    """ fetch the JSON of the ids and build the FTSJob or FTSFile objects
+    """
+    ids = [int( objectID ) for objectID in ids]
+    result = self.__call( bulkMethod, singleMethod, ids, list, int )
+    if not result['OK']:
+      return result
+    successful = {}
+    failed = result['Value']['Failed']
+    for objectID, objectJSON in result['Value']['Successful'].items():
+      if not objectJSON:
+        failed[objectID] = 'No such %s' % objectClass.__name__
+        continue
+      successful[objectID] = objectClass( objectJSON )
+    return S_OK( { 'Successful' : successful, 'Failed' : failed } )
+
+  def __call( self, bulkMethod, singleMethod, keys, bulkArgument, singleArgument ):
+    """ call bulkMethod( bulkArgument( chunk ) ) per chunk of keys, or, if the service does not
+        have it, singleMethod( singleArgument( key ) ) per key
+
+    :return: S_OK( { 'Successful' : { key : value }, 'Failed' : { key : message } } ),
+             S_ERROR if a bulk call failed
+    """
+    successful = {}
+    failed = {}
+    for start in xrange( 0, len( keys ), self.chunkSize ):
+      chunk = keys[start:start + self.chunkSize]
+      if self.bulkMethods.get( bulkMethod ) is not False:
+        res = getattr( self.ftsManager, bulkMethod )( bulkArgument( chunk ) )
+        if res['OK']:
+          self.bulkMethods[bulkMethod] = True
+          self.__addBulkResult( chunk, res['Value'], successful, failed )
+          continue
+        if self.bulkMethods.get( bulkMethod ) or \
+           not [message for message in unknownMethodMessages if message in res['Message']]:
+          return res
+        self.log.verbose( "FTSManager has no %s, using one %s call per item" % ( bulkMethod, singleMethod ) )
+        self.bulkMethods[bulkMethod] = False
+
+      for key in chunk:
+        res = getattr( self.ftsManager, singleMethod )( singleArgument( key ) )
+        if res['OK']:
+          successful[key] = res['Value']
+        else:
+          failed[key] = res['Message']
+    return S_OK( { 'Successful' : successful, 'Failed' : failed } )
+
+  @staticmethod
+  def __addBulkResult( chunk, value, successful, failed ):
+    """ add the Successful and Failed items of a bulk reply, the keys of the chunk missing from
+        both are failed
+    """
+    keys = dict( [( str( key ), key ) for key in chunk] )
+    for key, itemValue in value.get( 'Successful', {} ).items():
+      successful[keys.get( str( key ), key )] = itemValue
+    for key, message in value.get( 'Failed', {} ).items():
+      failed[keys.get( str( key ), key )] = message
+    for key in chunk:
+      if key not in successful and key not in failed:
+        failed[key] = 'Missing from the reply'
@@ -0,0 +1,96 @@
+""" Multi-job variants of the JobMonitoring getters (getJobAttributes, getJobParameters, getJobParameter)
+
+    The JobMonitoring service already exposes getJobsParameters( jobIDs, attributes ),
+    which returns the job attributes of a whole list of jobs in one call: it is used here
+    in chunks of chunkSize jobs.
+    Job parameters are requested for the whole list in one call too. Services that only accept
+    one job ID at a time reply with a type mismatch: in that case the client remembers it and
+    falls back to one call per job.
+"""
+
+from DIRAC import S_OK, S_ERROR, gLogger
+
+from TestDIRAC.Utilities.ClientCache import gClientCache
+
+class BulkJobMonitoringClient( object ):
+  """ Client fetching attributes and parameters of many jobs in few round trips
+  """
+
+  def __init__( self, url = 'WorkloadManagement/JobMonitoring', chunkSize = 1000 ):
+    self.monitoring = gClientCache.getRPCClient( url )
+    self.chunkSize = chunkSize
+    # None: not known yet, then True/False once the service replied
+    self.bulkParameters = None
+    self.log = gLogger.getSubLogger( 'BulkJobMonitoringClient' )
+
+  def __chunks( self, jobIDs ):
+    jobIDs = [int( jobID ) for jobID in jobIDs]
+    for i in xrange( 0, len( jobIDs ), self.chunkSize ):
+      yield jobIDs[i:i + self.chunkSize]
+
+  def getJobsAttributes( self, jobIDs, attrList = None ):
+    """ get the attributes of a list of jobs
+
+    :param list jobIDs: job IDs
+    :param list attrList: attribute names, all the attributes if empty
+    :return: S_OK( { jobID : { attrName : attrValue } } )
+    """
+    result = {}
+    for chunk in self.__chunks( jobIDs ):
+      res = self.monitoring.getJobsParameters( chunk, list( attrList ) if attrList else [] )
+      if not res['OK']:
+        return res
+      for jobID, attrDict in res['Value'].items():
+        result[int( jobID )] = attrDict
+    return S_OK( result )
+
+  def getJobsParameters( self, jobIDs, paramList = None ):
+    """ get the job parameters of a list of jobs
+
+    :param list jobIDs: job IDs
+    :param list paramList: parameter names, all the parameters if empty
+    :return: S_OK( { jobID : { parName : parValue } } )
+    """
+    result = {}
+    for chunk in self.__chunks( jobIDs ):
+      res = self.__getChunkParameters( chunk )
+      if not res['OK']:
+        return res
+      result.update( res['Value'] )
+
+    if paramList:
+      for jobID, parDict in result.items():
+        result[jobID] = dict( [( name, value ) for name, value in parDict.items() if name in paramList] )
+    return S_OK( result )
+
+  def getJobsParameter( self, jobIDs, parName ):
+    """ get one job parameter for a list of jobs
+
+    :return: S_OK( { jobID : parValue } ), jobs without this parameter are not in the result
+    """
+    res = self.getJobsParameters( jobIDs, [parName] )
+    if not res['OK']:
+      return res
+    return S_OK( dict( [( jobID, parDict[parName] ) for jobID, parDict in res['Value'].items()
+                        if parName in parDict] ) )
+
+  def __getChunkParameters( self, chunk ):
+    """ parameters of a chunk of jobs, in one call if the service accepts a list
+    """
+    if self.bulkParameters is not False:
+      res = self.monitoring.getJobParameters( chunk )
+      if res['OK']:
+        self.bulkParameters = True
+        return S_OK( dict( [( int( jobID ), parDict ) for jobID, parDict in res['Value'].items()] ) )
+      if self.bulkParameters or 'Type mismatch' not in res['Message']:
+        return res
+      self.log.verbose( "JobMonitoring does not accept a list of jobs, using one call per job" )
+      self.bulkParameters = False
+
+    result = {}
+    for jobID in chunk:
+      res = self.monitoring.getJobParameters( jobID )
+      if not res['OK']:
+        return S_ERROR( "Failed to get parameters of job %s: %s" % ( jobID, res['Message'] ) )
+      result[jobID] = res['Value']
+    return S_OK( result )
@@ -0,0 +1,158 @@
+""" adler32 of large files computed by chunks in parallel, and several checksums in one pass
+
+    fileAdler reads the file by small blocks and updates one adler32, on one core. Here:
+    - the file is read through mmap, without copies, or by large blocks with read
+    - fileAdler32 splits the file in chunks of chunkSize bytes, computes the adler32 of each
+      chunk in a pool of threads (zlib releases the GIL on large buffers) and combines them
+      in order with adler32Combine, as zlib's adler32_combine does
+    - fileChecksums computes several checksums ( adler32, md5, sha1... ) reading the file only
+      once; adler32 alone is computed in parallel, the digests by a sequential pass
+
+    The adler32 values are returned as 8 digits lowercase hexadecimal strings:
+
+      checksum = fileAdler32( fileName )
+      checksums = fileChecksums( fileName, ( 'adler32', 'md5' ) )['Value']
+"""
+
+import os
+import mmap
+import zlib
+import hashlib
+from multiprocessing.pool import ThreadPool
+
+from DIRAC import S_OK, S_ERROR
+
+# largest prime below 2^16, modulus of the adler32 sums
+adlerBase = 65521
+# checksums computed by chunks and combined
+combinableChecksums = ( 'adler32', )
+# the hashlib digests, plus adler32
+supportedChecksums = ( 'adler32', 'md5', 'sha1', 'sha256', 'sha512' )
+defaultChunkSize = 64 * 1024 * 1024
+defaultBlockSize = 8 * 1024 * 1024
+
+def adler32Combine( adler1, adler2, length2 ):
+  """ adler32 of the concatenation of two buffers, from their adler32 and the length of the second
+  """
+  remainder = length2 % adlerBase
+  sum1 = adler1 & 0xffff
+  sum2 = ( remainder * sum1 ) % adlerBase
+  sum1 += ( adler2 & 0xffff ) + adlerBase - 1
+  sum2 += ( ( adler1 >> 16 ) & 0xffff ) + ( ( adler2 >> 16 ) & 0xffff ) + adlerBase - remainder
+  if sum1 >= adlerBase:
+    sum1 -= adlerBase
+  if sum1 >= adlerBase:
+    sum1 -= adlerBase
+  if sum2 >= ( adlerBase << 1 ):
+    sum2 -= ( adlerBase << 1 )
+  if sum2 >= adlerBase:
+    sum2 -= adlerBase
+  return sum1 | ( sum2 << 16 )
+
+def hexAdler( adler ):
+  return '%08x' % ( adler & 0xffffffff )
+
+def iterBlocks( fd, offset, length, blockSize = defaultBlockSize, useMmap = True ):
+  """ the content of the file descriptor from offset, length bytes, by buffers of blockSize bytes
+
+  :param bool useMmap: map the range, offset has to be a multiple of mmap.ALLOCATIONGRANULARITY
+  """
+  if useMmap and length:
+    mapped = mmap.mmap( fd, length, access = mmap.ACCESS_READ, offset = offset )
+    try:
+      for start in xrange( 0, length, blockSize ):
+        yield buffer( mapped, start, min( blockSize, length - start ) )
+    finally:
+      mapped.close()
+    return
+  os.lseek( fd, offset, os.SEEK_SET )
+  remaining = length
+  while remaining:
+    data = os.read( fd, min( blockSize, remaining ) )
+    if not data:
+      raise IOError( "unexpected end of file at %d" % ( offset + length - remaining ) )
+    remaining -= len( data )
+    yield data
+
+def chunkAdler32( fileName, offset, length, blockSize = defaultBlockSize, useMmap = True ):
+  """ adler32 of length bytes from offset, as an unsigned int
+  """
+  fd = os.open( fileName, os.O_RDONLY )
+  try:
+    adler = 1
+    for block in iterBlocks( fd, offset, length, blockSize, useMmap ):
+      adler = zlib.adler32( block, adler )
+    return adler & 0xffffffff
+  finally:
+    os.close( fd )
+
+def fileAdler32( fileName, threads = None, chunkSize = defaultChunkSize, blockSize = defaultBlockSize, useMmap = True ):
+  """ adler32 of the file, computed by chunks of chunkSize bytes in threads threads
+
+  :param int threads: size of the pool, the number of CPUs by default, 1 to compute in this thread
+  :return: 8 digits hexadecimal string, False on error as fileAdler
+  """
+  result = fileChecksums( fileName, combinableChecksums, threads, chunkSize, blockSize, useMmap )
+  return result['Value']['adler32'] if result['OK'] else False
+
+def fileChecksums( fileName, checksumTypes = ( 'adler32', ), threads = None, chunkSize = defaultChunkSize,
+                   blockSize = defaultBlockSize, useMmap = True ):
+  """ the checksums of the file, the file being read once
+
+  :param checksumTypes: names from supportedChecksums
+  :return: S_OK( { checksum type : hexadecimal string } )
+  """
+  unknown = [checksumType for checksumType in checksumTypes if checksumType not in supportedChecksums]
+  if unknown:
+    return S_ERROR( "Unsupported checksum types: %s" % ", ".join( unknown ) )
+  # # mmap offsets are multiples of the allocation granularity
+  chunkSize = max( mmap.ALLOCATIONGRANULARITY, chunkSize - chunkSize % mmap.ALLOCATIONGRANULARITY )
+  try:
+    size = os.stat( fileName ).st_size
+    if all( [checksumType in combinableChecksums for checksumType in checksumTypes] ):
+      return S_OK( dict.fromkeys( checksumTypes, hexAdler( parallelAdler32( fileName, size, threads, chunkSize,
+                                                                             blockSize, useMmap ) ) ) )
+    return S_OK( sequentialChecksums( fileName, size, checksumTypes, chunkSize, blockSize, useMmap ) )
+  except ( IOError, OSError, ValueError, mmap.error ), error:
+    return S_ERROR( "Cannot checksum %s: %s" % ( fileName, error ) )
+
+def parallelAdler32( fileName, size, threads, chunkSize, blockSize, useMmap ):
+  """ adler32 of the size bytes of the file, by chunks combined in order
+  """
+  chunks = [( offset, min( chunkSize, size - offset ) ) for offset in xrange( 0, size, chunkSize )]
+  if threads == 1 or len( chunks ) < 2:
+    adlers = [chunkAdler32( fileName, offset, length, blockSize, useMmap ) for offset, length in chunks]
+  else:
+    pool = ThreadPool( min( threads if threads else ( os.sysconf( 'SC_NPROCESSORS_ONLN' ) or 1 ), len( chunks ) ) )
+    try:
+      adlers = pool.map( lambda chunk: chunkAdler32( fileName, chunk[0], chunk[1], blockSize, useMmap ), chunks )
+    finally:
+      pool.close()
+      pool.join()
+  adler = 1
+  for ( _offset, length ), chunkAdler in zip( chunks, adlers ):
+    adler = adler32Combine( adler, chunkAdler, length )
+  return adler
+
+def sequentialChecksums( fileName, size, checksumTypes, chunkSize, blockSize, useMmap ):
+  """ all the checksums updated block after block, mapping chunkSize bytes at a time
+
+  :return: { checksum type : hexadecimal string }
+  """
+  digests = dict( [( checksumType, hashlib.new( checksumType ) ) for checksumType in checksumTypes
+                   if checksumType != 'adler32'] )
+  adler = 1
+  fd = os.open( fileName, os.O_RDONLY )
+  try:
+    for offset in xrange( 0, size, chunkSize ):
+      for block in iterBlocks( fd, offset, min( chunkSize, size - offset ), blockSize, useMmap ):
+        if 'adler32' in checksumTypes:
+          adler = zlib.adler32( block, adler )
+        for digest in digests.values():
+          digest.update( block )
+  finally:
+    os.close( fd )
+  checksums = dict( [( checksumType, digest.hexdigest() ) for checksumType, digest in digests.items()] )
+  if 'adler32' in checksumTypes:
+    checksums['adler32'] = hexAdler( adler )
+  return checksums
@@ -0,0 +1,43 @@
+""" RPCClient instances shared by the test code of a process
+
+    A new RPCClient per call opens a new connection, with a full TLS handshake and the
+    loading of the credentials, for every RPC. The clients returned here are created once
+    per thread, service URL and options, with keepAliveLapse set: the DISET transport keeps
+    the connection, and its TLS session, open between the calls of the same client.
+    Versions of DISET without keep alive ignore the option and behave as before.
+
+      monitoring = gClientCache.getRPCClient( 'WorkloadManagement/JobMonitoring' )
+"""
+
+import threading
+
+from DIRAC.Core.DISET.RPCClient import RPCClient
+
+class ClientCache( object ):
+  """ One RPCClient per thread, URL and options
+  """
+
+  def __init__( self, keepAliveLapse = 150 ):
+    self.keepAliveLapse = keepAliveLapse
+    self.created = 0
+    self.__local = threading.local()
+
+  def getRPCClient( self, url, **kwargs ):
+    """ the RPCClient( url, **kwargs ) of the calling thread, created on the first request
+    """
+    clients = getattr( self.__local, 'clients', None )
+    if clients is None:
+      clients = self.__local.clients = {}
+    kwargs.setdefault( 'keepAliveLapse', self.keepAliveLapse )
+    key = ( url, tuple( sorted( kwargs.items() ) ) )
+    if key not in clients:
+      clients[key] = RPCClient( url, **kwargs )
+      self.created += 1
+    return clients[key]
+
+  def clear( self ):
+    """ forget the clients of the calling thread
+    """
+    self.__local.clients = {}
+
+gClientCache = ClientCache()
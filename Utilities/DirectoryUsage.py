@@ -0,0 +1,151 @@
+""" In-memory model of the DFC directory usage, maintained file operation by file operation
+
+    FileCatalog.getDirectorySize( lfns, longOutput, rawFiles ) answers from the usage stored per
+    directory, or recalculates it from the files below the directory when rawFiles is True.
+    DirectoryUsage keeps, for every directory, the logical files and size and the files and size
+    per SE of the whole subtree, updated on addFile, addReplica, removeReplica and removeFile for
+    each ancestor of the file: an update costs the depth of the file, getDirectorySize is a
+    dictionary lookup. recalculate( path ) computes the same from the files, as rawFiles does.
+
+    It is the reference the catalog results are compared to:
+
+      usage = DirectoryUsage()
+      usage.addFile( lfn, 123, 'CERN-USER' )
+      usage.getDirectorySize( os.path.dirname( lfn ) )
+"""
+
+import os
+
+class DirectoryUsage( object ):
+  """ per directory usage of a file catalog
+  """
+
+  def __init__( self ):
+    # lfn -> [ size, set of SEs ]
+    self.files = {}
+    # directory -> [ logical files, logical size, { SE : [ files, size ] } ]
+    self.__usage = {}
+    # directory -> number of subdirectories, recursively
+    self.__subdirectories = {}
+
+  @staticmethod
+  def ancestors( path ):
+    """ the directories containing path, the closest first, '/' last
+    """
+    path = os.path.dirname( path.rstrip( '/' ) )
+    while True:
+      yield path
+      if path == '/':
+        return
+      path = os.path.dirname( path )
+
+  def __addDirectory( self, directory ):
+    if directory in self.__usage:
+      return
+    self.__usage[directory] = [0, 0, {}]
+    self.__subdirectories[directory] = 0
+    if directory != '/':
+      for ancestor in self.ancestors( directory ):
+        self.__addDirectory( ancestor )
+        self.__subdirectories[ancestor] += 1
+
+  def __updateReplica( self, lfn, se, sign ):
+    size = self.files[lfn][0]
+    for directory in self.ancestors( lfn ):
+      seUsage = self.__usage[directory][2].setdefault( se, [0, 0] )
+      seUsage[0] += sign
+      seUsage[1] += sign * size
+      if not seUsage[0]:
+        del self.__usage[directory][2][se]
+
+  def addFile( self, lfn, size, se ):
+    """ :return: False if lfn already exists
+    """
+    if lfn in self.files:
+      return False
+    self.__addDirectory( os.path.dirname( lfn ) )
+    self.files[lfn] = [size, set()]
+    for directory in self.ancestors( lfn ):
+      usage = self.__usage[directory]
+      usage[0] += 1
+      usage[1] += size
+    self.addReplica( lfn, se )
+    return True
+
+  def addReplica( self, lfn, se ):
+    """ :return: False if lfn does not exist, True otherwise, the replica existing or not
+    """
+    if lfn not in self.files:
+      return False
+    if se not in self.files[lfn][1]:
+      self.files[lfn][1].add( se )
+      self.__updateReplica( lfn, se, 1 )
+    return True
+
+  def removeReplica( self, lfn, se ):
+    """ the file stays when its last replica is removed
+    """
+    if lfn in self.files and se in self.files[lfn][1]:
+      self.files[lfn][1].discard( se )
+      self.__updateReplica( lfn, se, -1 )
+    return True
+
+  def removeFile( self, lfn ):
+    if lfn not in self.files:
+      return True
+    for se in list( self.files[lfn][1] ):
+      self.removeReplica( lfn, se )
+    size = self.files.pop( lfn )[0]
+    for directory in self.ancestors( lfn ):
+      usage = self.__usage[directory]
+      usage[0] -= 1
+      usage[1] -= size
+    return True
+
+  def isDirectory( self, path ):
+    return path in self.__usage
+
+  def directories( self ):
+    return self.__usage.keys()
+
+  def getDirectorySize( self, path, longOutput = True ):
+    """ the stored usage of the directory, in the form of FileCatalog.getDirectorySize
+
+    :return: { 'LogicalFiles', 'LogicalDirectories', 'LogicalSize'[, 'PhysicalSize' : { SE : { 'Files', 'Size' },
+               'TotalFiles', 'TotalSize' }] } or None if path is not a directory
+    """
+    usage = self.__usage.get( path )
+    if usage is None:
+      return None
+    return self.__format( usage[0], self.__subdirectories[path], usage[1], usage[2], longOutput )
+
+  def recalculate( self, path, longOutput = True ):
+    """ getDirectorySize computed from the files below path
+    """
+    if path not in self.__usage:
+      return None
+    prefix = path.rstrip( '/' ) + '/'
+    files = 0
+    size = 0
+    seUsage = {}
+    for lfn, ( fileSize, ses ) in self.files.items():
+      if not lfn.startswith( prefix ):
+        continue
+      files += 1
+      size += fileSize
+      for se in ses:
+        counters = seUsage.setdefault( se, [0, 0] )
+        counters[0] += 1
+        counters[1] += fileSize
+    subdirectories = len( [directory for directory in self.__usage if directory.startswith( prefix ) and directory != path] )
+    return self.__format( files, subdirectories, size, seUsage, longOutput )
+
+  @staticmethod
+  def __format( files, subdirectories, size, seUsage, longOutput ):
+    result = { 'LogicalFiles' : files, 'LogicalDirectories' : subdirectories, 'LogicalSize' : size }
+    if longOutput:
+      physical = dict( [( se, { 'Files' : counters[0], 'Size' : counters[1] } ) for se, counters in seUsage.items()] )
+      physical['TotalFiles'] = sum( [counters[0] for counters in seUsage.values()] )
+      physical['TotalSize'] = sum( [counters[1] for counters in seUsage.values()] )
+      result['PhysicalSize'] = physical
+    return result
@@ -0,0 +1,149 @@
+""" Incrementally maintained FTS history
+
+    getFTSHistory aggregates, at each call, the FTS jobs updated in the last hour: number of
+    jobs, files, size, failed files and size per source SE, target SE and status, which is
+    a scan of the FTSJob table growing with the number of jobs.
+
+    FTSHistoryAggregate keeps these counters up to date instead: update( ftsJob ) is called when
+    a job is put or changes state, it moves the contribution of the job from its previous
+    ( SE pair, status ) to the new one. The counters are kept per time bucket of the last update
+    of the jobs, so that the jobs leave the window by dropping whole buckets, and summed over
+    the window: getFTSHistory copies one set of counters per ( SE pair, status ), whatever the
+    number of jobs.
+
+      history = FTSHistoryAggregate()
+      history.update( ftsJob )
+      ftsHistoryViews = history.getFTSHistory()['Value']
+"""
+
+import time
+import calendar
+import datetime
+import threading
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.private.FTSHistoryView import FTSHistoryView
+
+# the summed attributes of the FTS jobs, in the order of the counters
+historyCounters = ( 'Files', 'Size', 'FailedFiles', 'FailedSize' )
+
+def jobKey( ftsJob ):
+  """ the FTS job identity: its ID once registered, its GUID before
+  """
+  return ftsJob.FTSJobID if getattr( ftsJob, 'FTSJobID', None ) else ftsJob.FTSGUID
+
+class FTSHistoryAggregate( object ):
+  """ FTS history counters, updated job by job
+  """
+
+  def __init__( self, window = 3600, bucketSize = 60 ):
+    self.window = window
+    self.bucketSize = bucketSize
+    # job key -> ( bucket, ( SourceSE, TargetSE, Status ), counters )
+    self.__jobs = {}
+    # bucket -> { ( SourceSE, TargetSE, Status ) : [ FTSJobs, Files, Size, FailedFiles, FailedSize ] }
+    self.__buckets = {}
+    # bucket -> set of the keys of the jobs counted in it
+    self.__bucketJobs = {}
+    # ( SourceSE, TargetSE, Status ) -> counters summed over the buckets
+    self.__totals = {}
+    # ( SourceSE, TargetSE, Status ) -> FTSServer of the last job
+    self.__servers = {}
+    self.__lock = threading.Lock()
+
+  def __bucket( self, ftsJob, now ):
+    lastUpdate = getattr( ftsJob, 'LastUpdate', None )
+    if isinstance( lastUpdate, datetime.datetime ):
+      lastUpdate = calendar.timegm( lastUpdate.utctimetuple() )
+    elif not isinstance( lastUpdate, ( int, long, float ) ):
+      lastUpdate = now
+    return int( lastUpdate // self.bucketSize )
+
+  def update( self, ftsJob, now = None ):
+    """ count the job in its current SE pair and status, instead of the previous ones
+    """
+    now = now if now is not None else time.time()
+    key = jobKey( ftsJob )
+    bucket = self.__bucket( ftsJob, now )
+    historyKey = ( ftsJob.SourceSE, ftsJob.TargetSE, ftsJob.Status )
+    counters = [1] + [getattr( ftsJob, name, 0 ) or 0 for name in historyCounters]
+    self.__lock.acquire()
+    try:
+      self.__remove( key )
+      self.__jobs[key] = ( bucket, historyKey, counters )
+      self.__bucketJobs.setdefault( bucket, set() ).add( key )
+      self.__add( self.__buckets.setdefault( bucket, {} ), historyKey, counters, 1 )
+      self.__add( self.__totals, historyKey, counters, 1 )
+      self.__servers[historyKey] = ftsJob.FTSServer
+    finally:
+      self.__lock.release()
+
+  def remove( self, key ):
+    """ forget a deleted job, by FTSJobID, or FTSGUID if it was never registered
+    """
+    self.__lock.acquire()
+    try:
+      self.__remove( key )
+    finally:
+      self.__lock.release()
+
+  def __remove( self, key ):
+    previous = self.__jobs.pop( key, None )
+    if previous is None:
+      return
+    bucket, historyKey, counters = previous
+    self.__bucketJobs[bucket].discard( key )
+    self.__add( self.__buckets[bucket], historyKey, counters, -1 )
+    self.__add( self.__totals, historyKey, counters, -1 )
+
+  @staticmethod
+  def __add( counterDict, historyKey, counters, sign ):
+    total = counterDict.setdefault( historyKey, [0] * len( counters ) )
+    for i, value in enumerate( counters ):
+      total[i] += sign * value
+    if not total[0]:
+      del counterDict[historyKey]
+
+  def expire( self, now = None ):
+    """ drop the buckets and the jobs last updated before the window
+
+    :return: number of jobs dropped
+    """
+    now = now if now is not None else time.time()
+    oldest = int( ( now - self.window ) // self.bucketSize )
+    dropped = 0
+    self.__lock.acquire()
+    try:
+      for bucket in [bucket for bucket in self.__buckets if bucket < oldest]:
+        for key in self.__bucketJobs.pop( bucket, () ):
+          del self.__jobs[key]
+          dropped += 1
+        for historyKey, counters in self.__buckets.pop( bucket ).items():
+          self.__add( self.__totals, historyKey, counters, -1 )
+    finally:
+      self.__lock.release()
+    return dropped
+
+  def history( self, now = None ):
+    """ :return: { ( SourceSE, TargetSE, Status ) : [ FTSJobs, Files, Size, FailedFiles, FailedSize ] }
+    """
+    now = now if now is not None else time.time()
+    self.expire( now )
+    self.__lock.acquire()
+    try:
+      return dict( [( historyKey, list( counters ) ) for historyKey, counters in self.__totals.items()] )
+    finally:
+      self.__lock.release()
+
+  def getFTSHistory( self, now = None ):
+    """ the FTSHistoryViews of the jobs updated in the window, as FTSClient.getFTSHistory
+
+    :return: S_OK( [ FTSHistoryView ] )
+    """
+    views = []
+    for ( sourceSE, targetSE, status ), counters in self.history( now ).items():
+      viewDict = dict( zip( ( 'FTSJobs', ) + historyCounters, counters ) )
+      viewDict.update( { 'SourceSE' : sourceSE, 'TargetSE' : targetSE, 'Status' : status,
+                         'FTSServer' : self.__servers.get( ( sourceSE, targetSE, status ) ) } )
+      views.append( FTSHistoryView( viewDict ) )
+    return S_OK( views )
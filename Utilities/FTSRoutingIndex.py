@@ -0,0 +1,143 @@
+""" FTSGraph with precomputed SE -> site and ( source SE, target SE ) -> route indexes
+
+    FTSGraph.findSiteForSE scans the SEs of all the sites and findRoute scans, after two such
+    lookups, the routes of the source site: with hundreds of SEs and thousands of routes the
+    lookups done for each scheduled file are linear in the size of the graph.
+
+    IndexedFTSGraph keeps two dictionaries, filled as the sites and routes are added to the
+    graph (addNode, addEdge), so that both lookups are dictionary accesses. It also keeps the
+    contribution of each FTSHistoryView: updateHistory( ftsHistoryViews ) only recomputes the
+    counters of the routes whose history changed, instead of building a new graph.
+
+      graph = IndexedFTSGraph( "ftsGraph", ftsHistoryViews )
+      route = graph.findRoute( "CERN-USER", "RAL-USER" )
+      graph.updateHistory( newFTSHistoryViews )
+"""
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.Client.FTSJob import FTSJob
+from DIRAC.DataManagementSystem.private.FTSGraph import FTSGraph
+
+# route counters derived from the history views
+routeCounters = ( 'ActiveJobs', 'FinishedJobs', 'WaitingFiles', 'WaitingSize',
+                  'SuccessfulFiles', 'SuccessfulSize', 'FailedFiles', 'FailedSize' )
+
+def historyKey( ftsHistory ):
+  """ a history view is the aggregate of the FTS jobs of a channel in a status
+  """
+  return ( ftsHistory.SourceSE, ftsHistory.TargetSE, ftsHistory.FTSServer, ftsHistory.Status )
+
+def historyValues( ftsHistory ):
+  return tuple( [getattr( ftsHistory, name, 0 ) or 0
+                 for name in ( 'FTSJobs', 'Files', 'Size', 'FailedFiles', 'FailedSize', 'Completeness' )] )
+
+class IndexedFTSGraph( FTSGraph ):
+  """ FTSGraph with constant time findSiteForSE and findRoute
+  """
+
+  def __init__( self, name, ftsHistoryViews = None, **kwargs ):
+    # filled by addNode and addEdge, which the FTSGraph c'tor calls
+    self.__siteForSE = {}
+    self.__routes = {}
+    self.__history = {}
+    # id( route ) -> keys of the history views of the route
+    self.__routeKeys = {}
+    FTSGraph.__init__( self, name, None, **kwargs )
+    self.reindex()
+    self.updateHistory( ftsHistoryViews if ftsHistoryViews else [] )
+
+  def addNode( self, node ):
+    """ add a site and index its SEs
+    """
+    FTSGraph.addNode( self, node )
+    for se in getattr( node, 'SEs', None ) or []:
+      self.__siteForSE.setdefault( se, node )
+
+  def addEdge( self, edge ):
+    """ add a route and index it by its source and target sites
+    """
+    FTSGraph.addEdge( self, edge )
+    self.__routes[( edge.fromNode.name, edge.toNode.name )] = edge
+
+  def reindex( self ):
+    """ rebuild both indexes from the sites and routes of the graph
+    """
+    self.__siteForSE = {}
+    self.__routes = {}
+    for node in self.nodes():
+      for se in getattr( node, 'SEs', None ) or []:
+        self.__siteForSE.setdefault( se, node )
+    for edge in self.edges():
+      self.__routes[( edge.fromNode.name, edge.toNode.name )] = edge
+
+  def findSiteForSE( self, se ):
+    """ the site holding the SE
+    """
+    site = self.__siteForSE.get( se )
+    if site is None:
+      return S_ERROR( "StorageElement %s not found" % se )
+    return S_OK( site )
+
+  def findRoute( self, fromSE, toSE ):
+    """ the route between the sites of two SEs
+    """
+    fromSite = self.__siteForSE.get( fromSE )
+    toSite = self.__siteForSE.get( toSE )
+    route = None
+    if fromSite is not None and toSite is not None:
+      route = self.__routes.get( ( fromSite.name, toSite.name ) )
+    if route is None:
+      return S_ERROR( "FTSGraph: unable to find route between '%s' and '%s'" % ( fromSE, toSE ) )
+    return S_OK( route )
+
+  def updateHistory( self, ftsHistoryViews ):
+    """ set the route counters from a new set of history views: only the routes with
+        a view added, removed or changed since the previous set are recomputed
+
+    :return: S_OK( number of routes recomputed )
+    """
+    history = dict( [( historyKey( ftsHistory ), historyValues( ftsHistory ) ) for ftsHistory in ftsHistoryViews] )
+    changedKeys = [key for key in set( history ) | set( self.__history )
+                   if history.get( key ) != self.__history.get( key )]
+    routes = {}
+    for key in changedKeys:
+      route = self.findRoute( key[0], key[1] )
+      if not route['OK']:
+        continue
+      route = route['Value']
+      routeKeys = self.__routeKeys.setdefault( id( route ), set() )
+      if key in history:
+        routeKeys.add( key )
+      else:
+        routeKeys.discard( key )
+      routes[id( route )] = route
+    self.__history = history
+
+    for routeID, route in routes.items():
+      for counter in routeCounters:
+        setattr( route, counter, 0 )
+      for key in self.__routeKeys[routeID]:
+        self.__addHistory( route, key[3], history[key] )
+    return S_OK( len( routes ) )
+
+  @staticmethod
+  def __addHistory( route, status, values ):
+    """ add the contribution of a history view to the counters of its route, as FTSGraph does
+    """
+    ftsJobs, files, size, failedFiles, failedSize, completeness = values
+    if status in FTSJob.INITSTATES:
+      route.ActiveJobs += ftsJobs
+      route.WaitingFiles += files
+      route.WaitingSize += size
+    elif status in FTSJob.TRANSSTATES:
+      route.ActiveJobs += ftsJobs
+      route.WaitingSize += completeness * size / 100.
+      route.WaitingFiles += int( completeness * files / 100. )
+    elif status in FTSJob.FAILEDSTATES:
+      route.FinishedJobs += ftsJobs
+      route.FailedFiles += failedFiles
+      route.FailedSize += failedSize
+    else:
+      route.FinishedJobs += ftsJobs
+      route.SuccessfulFiles += files - failedFiles
+      route.SuccessfulSize += size - failedSize
@@ -0,0 +1,234 @@
+""" Offline replay of file workloads through FTS scheduling strategies
+
+    The strategies are run in-process, without FTS nor FTSManager: a strategy is any object with
+
+      replicationTree( sourceSEs, targetSEs, size ) -> S_OK( { key : { 'SourceSE' : se, 'TargetSE' : se,
+                                                                       'Ancestor' : False or ancestor } } )
+
+    and optionally addTreeToGraph( tree, size ), called after each decision as the FTSAgent does.
+    FTSStrategy has both: NamedFTSStrategy selects one of its strategies, fed with synthetic
+    FTSHistoryViews (syntheticHistory). RandomStrategy and EarliestFinishStrategy are simple
+    references, which do not need the CS nor the FTS history.
+
+    The transfers are simulated on channels of fixed bandwidth: each channel transfers its files
+    one after the other, a hop with an ancestor starts once the file reached the source of the hop.
+    The summary gives the decisions per second of the strategy, the load of each channel and
+    the makespan, the simulated time at which the last transfer ends.
+
+      channels = syntheticChannels( ses )
+      simulator = FTSSimulator( channels )
+      workload = workloadFromReplicas( syntheticReplicas( 10000, ses ), ['PIC-USER'], 1000000 )
+      result = simulator.run( EarliestFinishStrategy( simulator ), workload )
+      print simulator.report( 'EarliestFinish', result['Value'] )
+"""
+
+import time
+import math
+import random
+
+from DIRAC import S_OK, S_ERROR
+
+def syntheticChannels( ses, minBandwidth = 10e6, maxBandwidth = 200e6, seed = 1234 ):
+  """ a channel between each pair of different SEs, of random bandwidth
+
+  :return: { ( sourceSE, targetSE ) : bytes per second }
+  """
+  generator = random.Random( seed )
+  return dict( [( ( sourceSE, targetSE ), generator.uniform( minBandwidth, maxBandwidth ) )
+                for sourceSE in ses for targetSE in ses if sourceSE != targetSE] )
+
+def syntheticHistory( channels, ftsServer, period = 3600., fileSize = 1e9 ):
+  """ FTSHistoryViews of the last period: one Finished view per channel, with the number of files
+      of fileSize bytes transferred at the bandwidth of the channel
+  """
+  from DIRAC.DataManagementSystem.private.FTSHistoryView import FTSHistoryView
+  views = []
+  for ( sourceSE, targetSE ), bandwidth in channels.items():
+    files = max( 1, int( bandwidth * period / fileSize ) )
+    views.append( FTSHistoryView( { 'SourceSE' : sourceSE, 'TargetSE' : targetSE, 'FTSServer' : ftsServer,
+                                    'Status' : 'Finished', 'FTSJobs' : max( 1, files / 100 ),
+                                    'Files' : files, 'Size' : int( files * fileSize ),
+                                    'FailedFiles' : 0, 'FailedSize' : 0, 'Completeness' : 100 } ) )
+  return views
+
+def syntheticReplicas( fileNumber, ses, replicasPerFile = 2, seed = 1234 ):
+  """ replica map as returned by getActiveReplicas, replicasPerFile replicas per file on random SEs
+  """
+  generator = random.Random( seed )
+  successful = {}
+  for index in xrange( fileNumber ):
+    lfn = '/sim/%d/%d' % ( index / 1000, index )
+    successful[lfn] = dict( [( se, '/%s%s' % ( se.lower(), lfn ) )
+                             for se in generator.sample( ses, min( replicasPerFile, len( ses ) ) )] )
+  return S_OK( { 'Successful' : successful, 'Failed' : {} } )
+
+def workloadFromReplicas( replicas, targetSEs, size ):
+  """ files to replicate to targetSEs, from a getActiveReplicas result
+
+  :return: [ ( lfn, size, sourceSEs, targetSEs ) ], the SEs already holding the file are not targets
+  """
+  workload = []
+  for lfn in sorted( replicas['Value']['Successful'] ):
+    sourceSEs = sorted( replicas['Value']['Successful'][lfn] )
+    fileTargets = [targetSE for targetSE in targetSEs if targetSE not in sourceSEs]
+    if fileTargets:
+      workload.append( ( lfn, size, sourceSEs, fileTargets ) )
+  return workload
+
+class NamedFTSStrategy( object ):
+  """ one of the strategies of an FTSStrategy object
+  """
+
+  def __init__( self, ftsStrategy, name ):
+    self.ftsStrategy = ftsStrategy
+    self.name = name
+
+  def replicationTree( self, sourceSEs, targetSEs, size ):
+    return self.ftsStrategy.replicationTree( sourceSEs, targetSEs, size, strategy = self.name )
+
+  def addTreeToGraph( self, tree, size ):
+    return self.ftsStrategy.addTreeToGraph( tree, size )
+
+class RandomStrategy( object ):
+  """ a random source SE for each target SE
+  """
+
+  def __init__( self, seed = 1234 ):
+    self.random = random.Random( seed )
+
+  def replicationTree( self, sourceSEs, targetSEs, size ):
+    tree = {}
+    for targetSE in targetSEs:
+      sourceSE = self.random.choice( sourceSEs )
+      tree['%s#%s' % ( sourceSE, targetSE )] = { 'SourceSE' : sourceSE, 'TargetSE' : targetSE,
+                                                 'Ancestor' : False, 'Strategy' : 'Random' }
+    return S_OK( tree )
+
+class EarliestFinishStrategy( object ):
+  """ for each target SE, the source SE whose channel would end the transfer first, knowing the
+      queues of the simulator: the best an omniscient scheduler can do, file by file
+  """
+
+  def __init__( self, simulator ):
+    self.simulator = simulator
+
+  def replicationTree( self, sourceSEs, targetSEs, size ):
+    tree = {}
+    for targetSE in targetSEs:
+      best = None
+      for sourceSE in sourceSEs:
+        finish = self.simulator.finishTime( sourceSE, targetSE, size )
+        if finish is not None and ( best is None or finish < best[0] ):
+          best = ( finish, sourceSE )
+      if best is None:
+        return S_ERROR( 'No channel to %s' % targetSE )
+      tree['%s#%s' % ( best[1], targetSE )] = { 'SourceSE' : best[1], 'TargetSE' : targetSE,
+                                                'Ancestor' : False, 'Strategy' : 'EarliestFinish' }
+    return S_OK( tree )
+
+class FTSSimulator( object ):
+  """ Channels of fixed bandwidth transferring the files scheduled by a strategy
+  """
+
+  def __init__( self, channels ):
+    self.channels = channels
+    self.reset()
+
+  def reset( self ):
+    # channel -> simulated time at which it is free, bytes and files transferred
+    self.channelFree = dict.fromkeys( self.channels, 0. )
+    self.channelBytes = dict.fromkeys( self.channels, 0 )
+    self.channelFiles = dict.fromkeys( self.channels, 0 )
+
+  def finishTime( self, sourceSE, targetSE, size, ready = 0. ):
+    """ simulated end of the transfer if it was queued now on the channel, None if no channel
+    """
+    channel = ( sourceSE, targetSE )
+    if channel not in self.channels:
+      return None
+    return max( self.channelFree[channel], ready ) + size / self.channels[channel]
+
+  def transfer( self, tree, size ):
+    """ queue the hops of a replication tree, the ancestors first
+
+    :return: S_OK( end of the last hop ), S_ERROR for a hop on an unknown channel
+    """
+    # SE -> time at which the file reaches it, the replicas are there from the start
+    available = {}
+    pending = tree.values()
+    end = 0.
+    while pending:
+      progress = False
+      for hop in list( pending ):
+        if [other for other in pending if other['TargetSE'] == hop['SourceSE']]:
+          # the ancestor bringing the file to the source of this hop is still to be queued
+          continue
+        channel = ( hop['SourceSE'], hop['TargetSE'] )
+        finish = self.finishTime( hop['SourceSE'], hop['TargetSE'], size, available.get( hop['SourceSE'], 0. ) )
+        if finish is None:
+          return S_ERROR( 'Unknown channel %s -> %s' % channel )
+        self.channelFree[channel] = finish
+        self.channelBytes[channel] += size
+        self.channelFiles[channel] += 1
+        available[hop['TargetSE']] = finish
+        end = max( end, finish )
+        pending.remove( hop )
+        progress = True
+      if not progress:
+        return S_ERROR( 'Circular replication tree' )
+    return S_OK( end )
+
+  def run( self, strategy, workload ):
+    """ replay the workload through the strategy, from empty channels
+
+    :param list workload: [ ( lfn, size, sourceSEs, targetSEs ) ]
+    :return: S_OK( { 'Files', 'Decisions', 'Failed', 'StrategyTime', 'DecisionsPerSecond', 'Makespan',
+                     'ChannelFiles', 'ChannelBytes', 'LoadImbalance', 'LoadCV', 'Fairness' } )
+    """
+    self.reset()
+    summary = { 'Files' : len( workload ), 'Decisions' : 0, 'Failed' : 0, 'StrategyTime' : 0., 'Makespan' : 0. }
+    feedback = getattr( strategy, 'addTreeToGraph', None )
+    for _lfn, size, sourceSEs, targetSEs in workload:
+      start = time.time()
+      result = strategy.replicationTree( sourceSEs, targetSEs, size )
+      if result['OK'] and feedback:
+        feedback( result['Value'], size )
+      summary['StrategyTime'] += time.time() - start
+      if not result['OK'] or not result['Value']:
+        summary['Failed'] += 1
+        continue
+      summary['Decisions'] += 1
+      result = self.transfer( result['Value'], size )
+      if not result['OK']:
+        summary['Failed'] += 1
+        continue
+      summary['Makespan'] = max( summary['Makespan'], result['Value'] )
+
+    summary['DecisionsPerSecond'] = summary['Decisions'] / summary['StrategyTime'] if summary['StrategyTime'] else 0.
+    summary['ChannelFiles'] = dict( [( channel, files ) for channel, files in self.channelFiles.items() if files] )
+    summary['ChannelBytes'] = dict( [( channel, size ) for channel, size in self.channelBytes.items() if size] )
+    # # busy time, not end time: the hops waiting for an ancestor leave channels idle
+    summary.update( self.balance( [float( size ) / self.channels[channel]
+                                   for channel, size in self.channelBytes.items()] ) )
+    return S_OK( summary )
+
+  @staticmethod
+  def balance( loads ):
+    """ balance of the busy time of the channels used: max / mean, coefficient of variation
+        and Jain's fairness index (1 when all the channels are equally busy)
+    """
+    loads = [load for load in loads if load]
+    if not loads:
+      return { 'LoadImbalance' : 0., 'LoadCV' : 0., 'Fairness' : 0. }
+    mean = sum( loads ) / len( loads )
+    variance = sum( [( load - mean ) ** 2 for load in loads] ) / len( loads )
+    return { 'LoadImbalance' : max( loads ) / mean,
+             'LoadCV' : math.sqrt( variance ) / mean,
+             'Fairness' : sum( loads ) ** 2 / ( len( loads ) * sum( [load ** 2 for load in loads] ) ) }
+
+  def report( self, name, summary ):
+    return '%-20s %8d files %6d failed %10.0f decisions/s  makespan %10.1f s  %4d channels  ' \
+           'max/mean %5.2f  CV %5.2f  fairness %5.3f' % ( name, summary['Files'], summary['Failed'],
+                                                         summary['DecisionsPerSecond'], summary['Makespan'],
+                                                         len( summary['ChannelFiles'] ), summary['LoadImbalance'],
+                                                         summary['LoadCV'], summary['Fairness'] )
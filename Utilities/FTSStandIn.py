@@ -0,0 +1,334 @@
+""" Local stand-in for an FTS REST server, for the submission and monitoring tests
+
+    FTSStandInServer serves, over HTTP on localhost, the part of the FTS3 REST interface
+    used to submit and monitor transfers:
+
+      POST   /jobs                  { "files" : [ { "sources" : [ surl ], "destinations" : [ surl ] } ] }
+                                    -> { "job_id" : id }
+      GET    /jobs/<id>[,<id>...]   -> job, or list of jobs: { "job_id", "job_state", "reason" }
+      GET    /jobs/<id>/files       -> [ { "source_surl", "dest_surl", "file_state", "reason" } ]
+      DELETE /jobs/<id>             -> cancel the job
+
+    No transfer is done: the states of a job follow an FTSTimeline from its submission time,
+    SUBMITTED, READY and ACTIVE for configurable durations, then a final state drawn with
+    configurable probabilities, FINISHED, FINISHEDDIRTY (some files FAILED) or FAILED.
+    The draw is seeded with the job ID, so that the states are reproducible.
+
+      server = FTSStandInServer( FTSTimeline( active = 5., failed = 0.1, finishedDirty = 0.1 ) )
+      server.start()
+      client = FTSRESTClient( server.url )
+      jobID = client.submit( [ ( sourceSURL, targetSURL ) ] )['Value']
+      ...
+      server.stop()
+"""
+
+import json
+import socket
+import time
+import random
+import httplib
+import urlparse
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from DIRAC import S_OK, S_ERROR
+
+finalStates = ( 'FINISHED', 'FINISHEDDIRTY', 'FAILED', 'CANCELED' )
+
+class FTSTimeline( object ):
+  """ state of a job and of its files as a function of the time since its submission
+  """
+
+  def __init__( self, submitted = 1., ready = 1., active = 5., failed = 0.05, finishedDirty = 0.1,
+                failedFileFraction = 0.2, jitter = 0.5 ):
+    """
+    :param float submitted, ready, active: seconds spent in each state
+    :param float failed, finishedDirty: probability of these final states, FINISHED otherwise
+    :param float failedFileFraction: fraction of the files failing in a FINISHEDDIRTY job
+    :param float jitter: the durations of a job are scaled by a random factor in [1-jitter, 1+jitter]
+    """
+    self.durations = ( ( 'SUBMITTED', submitted ), ( 'READY', ready ), ( 'ACTIVE', active ) )
+    self.failed = failed
+    self.finishedDirty = finishedDirty
+    self.failedFileFraction = failedFileFraction
+    self.jitter = jitter
+
+  def finalState( self, jobID ):
+    draw = random.Random( jobID ).random()
+    if draw < self.failed:
+      return 'FAILED'
+    if draw < self.failed + self.finishedDirty:
+      return 'FINISHEDDIRTY'
+    return 'FINISHED'
+
+  def jobState( self, jobID, elapsed ):
+    """ state of the job elapsed seconds after its submission
+    """
+    scale = 1. + self.jitter * ( 2. * random.Random( -jobID ).random() - 1. )
+    for state, duration in self.durations:
+      elapsed -= duration * scale
+      if elapsed < 0:
+        return state
+    return self.finalState( jobID )
+
+  def fileStates( self, jobID, fileNumber, jobState ):
+    if jobState == 'FINISHED':
+      return ['FINISHED'] * fileNumber
+    if jobState in ( 'FAILED', 'CANCELED' ):
+      return [jobState] * fileNumber
+    if jobState == 'FINISHEDDIRTY':
+      # at least one failed file, and one done if there are several
+      failedFiles = max( 1, min( fileNumber - 1, int( round( fileNumber * self.failedFileFraction ) ) ) )
+      return ['FAILED'] * failedFiles + ['FINISHED'] * ( fileNumber - failedFiles )
+    return [jobState] * fileNumber
+
+class FTSStandInHandler( BaseHTTPServer.BaseHTTPRequestHandler ):
+  """ REST requests on the jobs of the server
+  """
+
+  # keep the connections of the clients open between requests
+  protocol_version = 'HTTP/1.1'
+
+  def setup( self ):
+    BaseHTTPServer.BaseHTTPRequestHandler.setup( self )
+    # the headers are written line by line: no Nagle delay on the replies
+    self.connection.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+
+  def log_message( self, *_args ):
+    pass
+
+  def reply( self, code, body ):
+    data = json.dumps( body )
+    self.send_response( code )
+    self.send_header( 'Content-Type', 'application/json' )
+    self.send_header( 'Content-Length', str( len( data ) ) )
+    self.end_headers()
+    self.wfile.write( data )
+
+  def readBody( self ):
+    """ the request body, read whatever the reply: left unread, it would be taken for the
+        next request of the kept connection
+    """
+    return self.rfile.read( int( self.headers.getheader( 'Content-Length', 0 ) ) )
+
+  def jobPath( self ):
+    """ ( [ job IDs ], files requested ) from the path, None if it is not a job path
+    """
+    parts = urlparse.urlparse( self.path ).path.strip( '/' ).split( '/' )
+    if len( parts ) not in ( 2, 3 ) or parts[0] != 'jobs' or ( len( parts ) == 3 and parts[2] != 'files' ):
+      return None
+    return parts[1].split( ',' ), len( parts ) == 3
+
+  def do_POST( self ):
+    data = self.readBody()
+    if urlparse.urlparse( self.path ).path.strip( '/' ) != 'jobs':
+      return self.reply( 404, { 'message' : 'Not found' } )
+    try:
+      body = json.loads( data )
+      files = [( transfer['sources'][0], transfer['destinations'][0] ) for transfer in body['files']]
+    except ( ValueError, KeyError, IndexError, TypeError ), error:
+      return self.reply( 400, { 'message' : 'Bad submission: %s' % error } )
+    if not files:
+      return self.reply( 400, { 'message' : 'No file to transfer' } )
+    self.reply( 200, { 'job_id' : self.server.addJob( files ) } )
+
+  def do_GET( self ):
+    self.readBody()
+    jobPath = self.jobPath()
+    if not jobPath:
+      return self.reply( 404, { 'message' : 'Not found' } )
+    jobIDs, files = jobPath
+    jobs = [self.server.getJob( jobID ) for jobID in jobIDs]
+    if None in jobs:
+      return self.reply( 404, { 'message' : 'No such job %s' % jobIDs[jobs.index( None )] } )
+    if files:
+      if len( jobs ) != 1:
+        return self.reply( 400, { 'message' : 'Files of one job at a time' } )
+      return self.reply( 200, jobs[0]['files'] )
+    for job in jobs:
+      del job['files']
+    self.reply( 200, jobs[0] if len( jobs ) == 1 else jobs )
+
+  def do_DELETE( self ):
+    self.readBody()
+    jobPath = self.jobPath()
+    if not jobPath or len( jobPath[0] ) != 1 or jobPath[1]:
+      return self.reply( 404, { 'message' : 'Not found' } )
+    job = self.server.cancelJob( jobPath[0][0] )
+    if job is None:
+      return self.reply( 404, { 'message' : 'No such job %s' % jobPath[0][0] } )
+    del job['files']
+    self.reply( 200, job )
+
+class FTSStandInServer( SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer ):
+  """ FTS REST stand-in on localhost, the jobs following a timeline
+  """
+
+  daemon_threads = True
+  allow_reuse_address = True
+  # the agents open one connection per thread, at once
+  request_queue_size = 128
+
+  def __init__( self, timeline = None, port = 0 ):
+    BaseHTTPServer.HTTPServer.__init__( self, ( '127.0.0.1', port ), FTSStandInHandler )
+    self.timeline = timeline if timeline else FTSTimeline()
+    self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+    # job submissions and lookups served
+    self.operations = 0
+    # job ID -> { 'Submitted' : time, 'Files' : [ ( source, target ) ], 'Canceled' : time or None }
+    self.__jobs = {}
+    self.__lastJobID = 0
+    self.__lock = threading.Lock()
+    self.__thread = None
+
+  def start( self ):
+    self.__thread = threading.Thread( target = self.serve_forever )
+    self.__thread.daemon = True
+    self.__thread.start()
+
+  def stop( self ):
+    self.shutdown()
+    self.server_close()
+    self.__thread.join()
+
+  def addJob( self, files ):
+    self.__lock.acquire()
+    try:
+      self.operations += 1
+      self.__lastJobID += 1
+      self.__jobs[self.__lastJobID] = { 'Submitted' : time.time(), 'Files' : files, 'Canceled' : None }
+      return '%08d' % self.__lastJobID
+    finally:
+      self.__lock.release()
+
+  def getJob( self, jobID ):
+    """ the job as served, with its files, None if unknown
+    """
+    number = self.__jobNumber( jobID )
+    self.__lock.acquire()
+    try:
+      self.operations += 1
+      job = self.__jobs.get( number )
+    finally:
+      self.__lock.release()
+    if job is None:
+      return None
+    if job['Canceled'] is not None and \
+       self.timeline.jobState( number, job['Canceled'] - job['Submitted'] ) not in finalStates:
+      state = 'CANCELED'
+    else:
+      state = self.timeline.jobState( number, time.time() - job['Submitted'] )
+    fileStates = self.timeline.fileStates( number, len( job['Files'] ), state )
+    files = [{ 'source_surl' : source, 'dest_surl' : target, 'file_state' : fileState,
+               'reason' : 'Transfer failed (stand-in)' if fileState == 'FAILED' else '' }
+             for ( source, target ), fileState in zip( job['Files'], fileStates )]
+    return { 'job_id' : jobID, 'job_state' : state, 'reason' : '', 'files' : files }
+
+  def cancelJob( self, jobID ):
+    self.__lock.acquire()
+    try:
+      job = self.__jobs.get( self.__jobNumber( jobID ) )
+      if job is not None and job['Canceled'] is None:
+        job['Canceled'] = time.time()
+    finally:
+      self.__lock.release()
+    if job is None:
+      return None
+    return self.getJob( jobID )
+
+  @staticmethod
+  def __jobNumber( jobID ):
+    try:
+      return int( jobID )
+    except ValueError:
+      return None
+
+class FTSRESTClient( object ):
+  """ Minimal client of the FTS REST interface, one kept connection per thread
+  """
+
+  def __init__( self, url, timeout = 60 ):
+    parsed = urlparse.urlparse( url )
+    self.host = parsed.hostname
+    self.port = parsed.port
+    self.timeout = timeout
+    self.__local = threading.local()
+    self.__connections = []
+
+  def __connection( self ):
+    connection = getattr( self.__local, 'connection', None )
+    if connection is None:
+      connection = self.__local.connection = httplib.HTTPConnection( self.host, self.port, timeout = self.timeout )
+      connection.connect()
+      # headers and body are sent separately: no Nagle delay on the requests
+      connection.sock.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+      self.__connections.append( connection )
+    return connection
+
+  def close( self ):
+    """ close the connections of all the threads
+    """
+    for connection in self.__connections:
+      connection.close()
+    self.__connections = []
+    self.__local = threading.local()
+
+  def request( self, method, path, body = None ):
+    """ :return: S_OK( decoded JSON reply ), S_ERROR for an HTTP error or a connection failure
+    """
+    data = json.dumps( body ) if body is not None else None
+    headers = { 'Content-Type' : 'application/json' } if data else {}
+    for attempt in ( 1, 2 ):
+      connection = self.__connection()
+      try:
+        connection.request( method, path, data, headers )
+        response = connection.getresponse()
+        reply = response.read()
+        break
+      except ( httplib.HTTPException, IOError ), error:
+        # a kept connection closed by the server: one retry on a new one
+        connection.close()
+        self.__local.connection = None
+        if attempt == 2:
+          return S_ERROR( 'FTS request %s %s failed: %s' % ( method, path, error ) )
+    if response.status != 200:
+      try:
+        message = json.loads( reply ).get( 'message', reply )
+      except ( ValueError, AttributeError ):
+        message = reply
+      return S_ERROR( 'FTS request %s %s: %s %s' % ( method, path, response.status, message ) )
+    try:
+      return S_OK( json.loads( reply ) )
+    except ValueError, error:
+      return S_ERROR( 'FTS request %s %s: reply is not JSON: %s' % ( method, path, error ) )
+
+  def submit( self, files ):
+    """ submit a job transferring [ ( source SURL, target SURL ) ]
+
+    :return: S_OK( job ID )
+    """
+    result = self.request( 'POST', '/jobs', { 'files' : [{ 'sources' : [source], 'destinations' : [target] }
+                                                         for source, target in files] } )
+    if not result['OK']:
+      return result
+    return S_OK( result['Value']['job_id'] )
+
+  def status( self, jobIDs ):
+    """ :return: S_OK( { job ID : job state } ) in one request
+    """
+    if not jobIDs:
+      return S_OK( {} )
+    result = self.request( 'GET', '/jobs/%s' % ','.join( jobIDs ) )
+    if not result['OK']:
+      return result
+    jobs = result['Value'] if isinstance( result['Value'], list ) else [result['Value']]
+    return S_OK( dict( [( job['job_id'], job['job_state'] ) for job in jobs] ) )
+
+  def files( self, jobID ):
+    """ :return: S_OK( [ file dict ] )
+    """
+    return self.request( 'GET', '/jobs/%s/files' % jobID )
+
+  def cancel( self, jobID ):
+    return self.request( 'DELETE', '/jobs/%s' % jobID )
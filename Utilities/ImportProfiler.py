@@ -0,0 +1,181 @@
+""" Import time tree of each test module, measured in a fresh interpreter
+
+    Each module is imported alone in a new python process, with the ImportTimer hook started
+    before the import: the records give the cumulative and self time of every module loaded,
+    and the module which imported it first, from which the import tree is rebuilt.
+
+      python ImportProfiler.py [-b baseline.json] [-u] [-n 15] [-t 0.3] [-d 0.1] [module ...]
+
+    - the import tree of each module is printed, down to the imports taking more than the
+      minimal duration (-d, seconds)
+    - the heaviest transitive imports (-n) are flagged
+    - with a baseline file (-b), the profiles are compared with it: imports slower by more
+      than the tolerance (-t) and new heavy imports are reported, and the script exits with 1
+    - with -u, the baseline file is (re)written with the current profiles
+
+    Without module names, all the test modules of the TestDIRAC tree are profiled.
+"""
+
+import os
+import sys
+import json
+import time
+import getopt
+import tempfile
+import subprocess
+
+from TestDIRAC.Utilities.ImportTimer import ImportTimer, findTestModules
+
+def profileModule( moduleName ):
+  """ import moduleName in a fresh interpreter
+
+  :return: dict with Module, Process (wall time of the child), Total (import time), Error, Records
+  """
+  fd, outputFile = tempfile.mkstemp( suffix = '.json' )
+  os.close( fd )
+  try:
+    start = time.time()
+    child = subprocess.Popen( [sys.executable, os.path.abspath( __file__ ), '--child', moduleName, outputFile],
+                              stdout = subprocess.PIPE, stderr = subprocess.STDOUT )
+    childOutput = child.communicate()[0]
+    processTime = time.time() - start
+    try:
+      profile = json.load( open( outputFile ) )
+    except ValueError:
+      profile = { 'Module' : moduleName, 'Total' : 0., 'Records' : {},
+                  'Error' : 'No profile produced: %s' % childOutput.strip()[-500:] }
+  finally:
+    os.remove( outputFile )
+  profile['Process'] = processTime
+  return profile
+
+def childProfile( moduleName, outputFile ):
+  """ run in the fresh interpreter: import the module and dump the ImportTimer records
+  """
+  timer = ImportTimer()
+  timer.start()
+  start = time.time()
+  error = None
+  try:
+    try:
+      __import__( moduleName )
+    except Exception, exc:
+      error = '%s: %s' % ( exc.__class__.__name__, exc )
+  finally:
+    total = time.time() - start
+    timer.stop()
+  fd = open( outputFile, 'w' )
+  try:
+    json.dump( { 'Module' : moduleName, 'Total' : total, 'Error' : error, 'Records' : timer.records }, fd )
+  finally:
+    fd.close()
+
+def importTree( profile, minDuration = 0.01 ):
+  """ indented lines of the import tree, children sorted by decreasing cumulative time
+  """
+  children = {}
+  for name, record in profile['Records'].items():
+    children.setdefault( record['Parent'], [] ).append( name )
+
+  lines = []
+  def addNode( name, depth ):
+    record = profile['Records'][name]
+    lines.append( '%s%-*s %8.3fs %8.3fs' % ( '  ' * depth, 70 - 2 * depth, name, record['Cumulative'], record['Self'] ) )
+    for child in sorted( children.get( name, [] ), key = lambda child: -profile['Records'][child]['Cumulative'] ):
+      if profile['Records'][child]['Cumulative'] >= minDuration:
+        addNode( child, depth + 1 )
+
+  for root in sorted( children.get( None, [] ), key = lambda root: -profile['Records'][root]['Cumulative'] ):
+    addNode( root, 0 )
+  return lines
+
+def heaviestImports( profile, number = 15 ):
+  """ the transitive imports of the module with the largest cumulative time, itself excluded
+  """
+  ranked = sorted( [( name, record ) for name, record in profile['Records'].items() if name != profile['Module']],
+                   key = lambda item: item[1]['Cumulative'], reverse = True )
+  return ranked[:number]
+
+def compareWithBaseline( baseline, profile, tolerance = 0.3, minDelta = 0.1 ):
+  """ compare the profile of a module with its baseline
+
+  :return: list of ( import name, baseline seconds or None if new, current seconds )
+  """
+  regressions = []
+  if profile['Total'] > baseline['Total'] * ( 1. + tolerance ) and profile['Total'] - baseline['Total'] > minDelta:
+    regressions.append( ( profile['Module'] + ' (total)', baseline['Total'], profile['Total'] ) )
+  for name, record in profile['Records'].items():
+    if name == profile['Module']:
+      continue
+    reference = baseline['Records'].get( name )
+    duration = record['Cumulative']
+    if reference is None:
+      if duration > minDelta:
+        regressions.append( ( name, None, duration ) )
+    elif duration > reference['Cumulative'] * ( 1. + tolerance ) and duration - reference['Cumulative'] > minDelta:
+      regressions.append( ( name, reference['Cumulative'], duration ) )
+  return regressions
+
+def loadBaseline( fileName ):
+  if not os.path.exists( fileName ):
+    return {}
+  fd = open( fileName )
+  try:
+    return json.load( fd )
+  finally:
+    fd.close()
+
+def storeBaseline( fileName, profiles ):
+  fd = open( fileName, 'w' )
+  try:
+    json.dump( dict( [( profile['Module'], profile ) for profile in profiles] ), fd, indent = 1, sort_keys = True )
+  finally:
+    fd.close()
+
+def main( argv ):
+  usage = "Usage:\n python %s [-b baseline.json] [-u] [-n top] [-t tolerance] [-d minDuration] [module ...]" % argv[0]
+  try:
+    options, moduleNames = getopt.getopt( argv[1:], 'b:un:t:d:' )
+  except getopt.GetoptError, error:
+    print "%s\n%s" % ( error, usage )
+    return -1
+  options = dict( options )
+  baselineFile = options.get( '-b' )
+  top = int( options.get( '-n', 15 ) )
+  tolerance = float( options.get( '-t', 0.3 ) )
+  minDuration = float( options.get( '-d', 0.1 ) )
+
+  if not moduleNames:
+    moduleNames = findTestModules( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+  baseline = loadBaseline( baselineFile ) if baselineFile else {}
+
+  profiles = []
+  failed = False
+  for moduleName in moduleNames:
+    profile = profileModule( moduleName )
+    profiles.append( profile )
+    print "\n%s: %.3f s import, %.3f s process%s" % ( moduleName, profile['Total'], profile['Process'],
+                                                      ', %s' % profile['Error'] if profile['Error'] else '' )
+    if profile['Error']:
+      failed = True
+    print '\n'.join( importTree( profile, minDuration ) )
+    print "Heaviest transitive imports:"
+    for name, record in heaviestImports( profile, top ):
+      print "  %-68s %8.3fs  (imported by %s)" % ( name, record['Cumulative'], record['Parent'] )
+    if moduleName in baseline:
+      for name, reference, duration in compareWithBaseline( baseline[moduleName], profile, tolerance, minDuration ):
+        failed = True
+        if reference is None:
+          print "  REGRESSION %s: new import, %.3f s" % ( name, duration )
+        else:
+          print "  REGRESSION %s: %.3f s, was %.3f s" % ( name, duration, reference )
+
+  if baselineFile and '-u' in options:
+    storeBaseline( baselineFile, profiles )
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  if len( sys.argv ) == 4 and sys.argv[1] == '--child':
+    childProfile( sys.argv[2], sys.argv[3] )
+    sys.exit( 0 )
+  sys.exit( main( sys.argv ) )
@@ -0,0 +1,159 @@
+""" Import time accounting, to keep the collection of the test modules fast
+
+    ImportTimer replaces __import__ while started and records, for each module loaded for
+    the first time, the cumulative time of its import (its own imports included), its self
+    time and the module importing it.
+
+    Used as a script, it imports the test modules the way a collector does (all in the
+    same process, one after the other) and reports the time spent for each of them,
+    the cumulative time, and the heaviest modules imported:
+
+      python ImportTimer.py [-n 20] [TestDIRAC.Integration.WorkloadManagementSystem.TestJobDB ...]
+
+    Without module names, all the test modules of the TestDIRAC tree are imported.
+"""
+
+import os
+import sys
+import time
+import __builtin__
+
+class ImportTimer( object ):
+  """ Records the first import of each module
+  """
+
+  def __init__( self ):
+    self.records = {}
+    self.order = []
+    self.__stack = []
+    self.__originalImport = None
+
+  def start( self ):
+    if self.__originalImport is None:
+      self.__originalImport = __builtin__.__import__
+      __builtin__.__import__ = self.__import
+
+  def stop( self ):
+    if self.__originalImport is not None:
+      __builtin__.__import__ = self.__originalImport
+      self.__originalImport = None
+
+  def __import( self, name, globalsDict = None, localsDict = None, fromlist = None, level = -1 ):
+    if name in sys.modules and not fromlist:
+      return self.__originalImport( name, globalsDict, localsDict, fromlist, level )
+    loaded = len( sys.modules )
+    # [ time spent in the imports done by this one, names of the modules they loaded ]
+    self.__stack.append( [0., []] )
+    start = time.time()
+    try:
+      return self.__originalImport( name, globalsDict, localsDict, fromlist, level )
+    finally:
+      elapsed = time.time() - start
+      childrenTime, children = self.__stack.pop()
+      if len( sys.modules ) > loaded:
+        # the full name is only known once the module is loaded
+        name = self.__absoluteName( name, globalsDict, fromlist, level )
+        for child in children:
+          self.records[child]['Parent'] = name
+        if self.__stack:
+          self.__stack[-1][0] += elapsed
+        if name not in self.records:
+          self.order.append( name )
+          self.records[name] = { 'Cumulative' : elapsed, 'Self' : elapsed - childrenTime, 'Parent' : None }
+          if self.__stack:
+            self.__stack[-1][1].append( name )
+
+  @staticmethod
+  def __absoluteName( name, globalsDict, fromlist, level ):
+    """ full name of the module loaded by an import, which can be relative (implicitly or not)
+        or load a submodule listed in fromlist
+    """
+    if level != 0 and globalsDict and '__name__' in globalsDict:
+      if '__path__' in globalsDict:
+        package = globalsDict['__name__']
+      else:
+        package = globalsDict['__name__'].rpartition( '.' )[0]
+      for _up in range( max( level - 1, 0 ) ):
+        package = package.rpartition( '.' )[0]
+      if not name:
+        name = package
+      # a failed implicit relative import leaves None in sys.modules
+      elif package and sys.modules.get( '%s.%s' % ( package, name ) ) is not None:
+        name = '%s.%s' % ( package, name )
+    for item in fromlist or []:
+      if sys.modules.get( '%s.%s' % ( name, item ) ) is not None:
+        return '%s.%s' % ( name, item )
+    return name
+
+  def heaviest( self, number = 20 ):
+    """ the number modules with the largest cumulative import time, as ( name, record ) tuples
+    """
+    ranked = sorted( self.records.items(), key = lambda item: item[1]['Cumulative'], reverse = True )
+    return ranked[:number]
+
+def findTestModules( path, packageName = 'TestDIRAC' ):
+  """ dotted names of the test modules below path, the TestDIRAC directory
+  """
+  modules = []
+  for root, dirs, files in os.walk( path ):
+    dirs.sort()
+    if root != path and ( '__init__.py' not in files or os.path.basename( root ) == 'Utilities' ):
+      dirs[:] = []
+      continue
+    for fileName in sorted( files ):
+      if not fileName.endswith( '.py' ):
+        continue
+      if not ( fileName.startswith( 'Test' ) or fileName.startswith( 'unitTest' ) or
+               fileName.startswith( 'Benchmark' ) or fileName.endswith( 'Tests.py' ) ):
+        continue
+      relativePath = os.path.relpath( os.path.join( root, fileName[:-3] ), path )
+      modules.append( '.'.join( [packageName] + relativePath.split( os.sep ) ) )
+  return modules
+
+def timeImports( moduleNames, timer = None ):
+  """ import the modules one after the other in this process
+
+  :return: list of ( moduleName, seconds, error ) tuples, error being None if the import went fine
+  """
+  if timer is None:
+    timer = ImportTimer()
+  results = []
+  timer.start()
+  try:
+    for moduleName in moduleNames:
+      start = time.time()
+      error = None
+      try:
+        __import__( moduleName )
+      except Exception, exc:
+        error = '%s: %s' % ( exc.__class__.__name__, exc )
+      results.append( ( moduleName, time.time() - start, error ) )
+  finally:
+    timer.stop()
+  return results
+
+def importReport( results, timer, top = 20 ):
+  lines = ['%-70s %9s %11s' % ( 'Test module', 'Import', 'Cumulative' )]
+  cumulative = 0.
+  for moduleName, duration, error in results:
+    cumulative += duration
+    lines.append( '%-70s %8.3fs %10.3fs%s' % ( moduleName, duration, cumulative,
+                                               '  (%s)' % error if error else '' ) )
+  lines.append( '' )
+  lines.append( 'Heaviest imports:' )
+  lines.append( '%-70s %11s %9s  %s' % ( 'Module', 'Cumulative', 'Self', 'Imported by' ) )
+  for name, record in timer.heaviest( top ):
+    lines.append( '%-70s %10.3fs %8.3fs  %s' % ( name, record['Cumulative'], record['Self'], record['Parent'] ) )
+  return '\n'.join( lines )
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  top = 20
+  if len( args ) > 1 and args[0] == '-n':
+    top = int( args[1] )
+    args = args[2:]
+  testDIRACPath = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+  moduleNames = args if args else findTestModules( testDIRACPath )
+  importTimer = ImportTimer()
+  importResults = timeImports( moduleNames, importTimer )
+  print importReport( importResults, importTimer, top )
@@ -1,8 +1,8 @@
 import unittest
 
 from TestDIRAC.Utilities.utils import cleanTestDir
+from TestDIRAC.Utilities.Bootstrap import setTestLogLevel
 
-from DIRAC import gLogger
 from DIRAC.Interfaces.API.Dirac import Dirac
 from DIRAC.DataManagementSystem.Client.ReplicaManager import ReplicaManager
 
@@ -13,7 +13,7 @@ class IntegrationTest( unittest.TestCase ):
   def setUp( self ):
     cleanTestDir()
     self.dirac = Dirac()
-    gLogger.setLevel( 'DEBUG' )
+    setTestLogLevel( 'DEBUG' )
 
   def tearDown( self ):
     cleanTestDir()
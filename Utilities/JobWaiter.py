@@ -0,0 +1,114 @@
+""" Waits for a set of jobs to reach a final status
+
+    The statuses are read with one bulk Dirac.status call per poll. The polling interval adapts:
+    - before the expected completion time, it is half of the time left until then, so that
+      the polls tighten as the jobs are expected to end
+    - after it (or without expected duration), it starts at minInterval and doubles at each
+      poll, up to maxInterval
+
+    The waiting is done on an event: notify() wakes the waiter up for an immediate poll, so that
+    a job state change notification, where there is one, ends the wait as soon as the jobs are done.
+
+      waiter = JobWaiter( Dirac(), expectedDuration = 1800 )
+      result = waiter.wait( jobIDs )
+      lfns = waiter.outputLFNs
+"""
+
+import time
+import threading
+
+from DIRAC import S_OK, gLogger
+
+from TestDIRAC.Utilities.OutputCleaner import OutputCleaner
+
+class JobWaiter( object ):
+  """ Adaptive polling of the status of jobs, with bulk calls
+  """
+
+  finalStates = ['Done', 'Failed', 'Killed', 'Deleted']
+
+  def __init__( self, dirac, expectedDuration = None, minInterval = 10., maxInterval = 600.,
+                timeout = 6 * 3600., collectOutputLFNs = True ):
+    self.dirac = dirac
+    self.expectedDuration = expectedDuration
+    self.minInterval = minInterval
+    self.maxInterval = maxInterval
+    self.timeout = timeout
+    self.collectOutputLFNs = collectOutputLFNs
+    self.outputLFNs = []
+    self.polls = 0
+    self.log = gLogger.getSubLogger( 'JobWaiter' )
+    self.cleaner = OutputCleaner()
+    self.__event = threading.Event()
+
+  def notify( self, *_args ):
+    """ wake the waiter up for an immediate poll, e.g. from a job state change callback
+    """
+    self.__event.set()
+
+  def nextInterval( self, elapsed, previousInterval ):
+    """ seconds to wait before the next poll
+    """
+    if self.expectedDuration is not None and elapsed < self.expectedDuration:
+      interval = ( self.expectedDuration - elapsed ) / 2.
+    elif previousInterval is None:
+      interval = self.minInterval
+    else:
+      interval = previousInterval * 2.
+    return min( max( interval, self.minInterval ), self.maxInterval )
+
+  def wait( self, jobIDs ):
+    """ poll until all the jobs are in a final status, or the timeout
+
+    :param list jobIDs: the jobs, the list is not modified
+    :return: S_OK( { jobID : { 'Status' : status, 'MinorStatus' : minor status } } ) with the last
+             status of every job, the ones still pending at the timeout included
+    """
+    pending = set( jobIDs )
+    statuses = {}
+    start = time.time()
+    interval = None
+    while True:
+      self.__event.clear()
+      result = self.dirac.status( sorted( pending ) )
+      self.polls += 1
+      if not result['OK']:
+        self.log.warn( 'Could not get the jobs status: %s' % result['Message'] )
+      else:
+        done = []
+        for jobID, jobStatus in result['Value'].items():
+          jobID = int( jobID )
+          if jobID not in pending:
+            continue
+          statuses[jobID] = { 'Status' : jobStatus['Status'], 'MinorStatus' : jobStatus['MinorStatus'] }
+          if jobStatus['Status'] in self.finalStates:
+            pending.discard( jobID )
+            if jobStatus['Status'] == 'Done':
+              done.append( jobID )
+        if done and self.collectOutputLFNs:
+          self.__addOutputLFNs( done )
+
+      elapsed = time.time() - start
+      if not pending:
+        break
+      if elapsed >= self.timeout:
+        self.log.warn( '%d jobs still not in a final status after %d s' % ( len( pending ), elapsed ) )
+        break
+      interval = self.nextInterval( elapsed, interval )
+      self.__event.wait( min( interval, self.timeout - elapsed ) )
+      if self.__event.isSet():
+        # notified: poll now, and tighten again afterwards
+        interval = None
+
+    for jobID in pending:
+      statuses.setdefault( jobID, { 'Status' : 'Unknown', 'MinorStatus' : 'Unknown' } )
+    return S_OK( statuses )
+
+  def __addOutputLFNs( self, jobIDs ):
+    """ LFNs uploaded by the jobs, from their UploadedOutputData parameter, in bulk
+    """
+    result = self.cleaner.getOutputLFNs( jobIDs )
+    if not result['OK']:
+      self.log.warn( 'Could not get the output LFNs: %s' % result['Message'] )
+      return
+    self.outputLFNs += result['Value']
@@ -0,0 +1,114 @@
+""" Runs many Job.runLocal jobs concurrently, in a pool of processes
+
+    Each job runs in a fresh worker process, in its own working directory under baseDir,
+    with its stdout and stderr (DIRAC logging included) captured in its own log file.
+
+    Jobs are given as ( name, jobFactory ), jobFactory being a module level function (so
+    that it can be sent to the workers) returning the Job to run. The factory is called in
+    the worker, before moving to the job working directory: the files the job uses should be
+    given with absolute paths.
+
+      runner = LocalJobRunner( workers = 8 )
+      runner.addJob( 'helloWorld', helloWorldJob )
+      result = runner.run()
+      print runner.report( result['Value'] )
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Interfaces.API.Dirac import Dirac
+
+def runJob( jobTuple ):
+  """ run one job in the current (worker) process, return its summary
+  """
+  name, jobFactory, workDir = jobTuple
+  summary = { 'Name' : name, 'WorkDir' : workDir, 'LogFile' : os.path.join( workDir, 'runLocal.log' ),
+              'OK' : False, 'Message' : '', 'WallTime' : 0. }
+  os.makedirs( workDir )
+  start = time.time()
+
+  sys.stdout.flush()
+  sys.stderr.flush()
+  savedStdout = os.dup( 1 )
+  savedStderr = os.dup( 2 )
+  logFD = os.open( summary['LogFile'], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644 )
+  os.dup2( logFD, 1 )
+  os.dup2( logFD, 2 )
+  cwd = os.getcwd()
+  try:
+    try:
+      job = jobFactory()
+      os.chdir( workDir )
+      result = job.runLocal( Dirac() )
+    except Exception, error:
+      result = S_ERROR( 'Exception while running the job: %s' % error )
+  finally:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.chdir( cwd )
+    os.dup2( savedStdout, 1 )
+    os.dup2( savedStderr, 2 )
+    for fd in ( logFD, savedStdout, savedStderr ):
+      os.close( fd )
+
+  summary['WallTime'] = time.time() - start
+  summary['OK'] = result['OK']
+  if not result['OK']:
+    summary['Message'] = result['Message']
+  return summary
+
+class LocalJobRunner( object ):
+  """ Process pool running Job.runLocal jobs in isolated working directories
+  """
+
+  def __init__( self, workers = None, baseDir = None ):
+    self.workers = workers if workers else multiprocessing.cpu_count()
+    self.baseDir = baseDir
+    self.jobs = []
+
+  def addJob( self, name, jobFactory ):
+    self.jobs.append( ( name, jobFactory ) )
+
+  def run( self ):
+    """ run all the jobs added
+
+    :return: S_OK( { 'Jobs' : [ job summaries ], 'WallTime' : seconds for all the jobs,
+                     'SerialTime' : sum of the jobs wall times, 'Failed' : number of failed jobs } )
+    """
+    if not self.jobs:
+      return S_ERROR( 'No job to run' )
+    baseDir = self.baseDir if self.baseDir else tempfile.mkdtemp( prefix = 'LocalJobRunner_' )
+    jobTuples = [( name, jobFactory, os.path.join( os.path.abspath( baseDir ), '%04d_%s' % ( index, name ) ) )
+                 for index, ( name, jobFactory ) in enumerate( self.jobs )]
+
+    start = time.time()
+    pool = multiprocessing.Pool( self.workers, maxtasksperchild = 1 )
+    try:
+      summaries = pool.map( runJob, jobTuples, chunksize = 1 )
+    finally:
+      pool.close()
+      pool.join()
+
+    return S_OK( { 'Jobs' : summaries,
+                   'WallTime' : time.time() - start,
+                   'SerialTime' : sum( [summary['WallTime'] for summary in summaries] ),
+                   'Failed' : len( [summary for summary in summaries if not summary['OK']] ),
+                   'BaseDir' : baseDir } )
+
+  def report( self, result ):
+    """ one line per job, then the totals
+    """
+    lines = []
+    for summary in result['Jobs']:
+      lines.append( '%-40s %-6s %8.2f s  %s' % ( summary['Name'], 'OK' if summary['OK'] else 'FAILED',
+                                                 summary['WallTime'], summary['LogFile'] ) )
+    speedup = result['SerialTime'] / result['WallTime'] if result['WallTime'] else 0.
+    lines.append( '%d jobs (%d failed) with %d workers: %.2f s wall, %.2f s summed job time, speedup %.1f' %
+                  ( len( result['Jobs'] ), result['Failed'], self.workers,
+                    result['WallTime'], result['SerialTime'], speedup ) )
+    return '\n'.join( lines )
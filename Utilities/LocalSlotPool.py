@@ -0,0 +1,101 @@
+""" A pool of local computing element slots, running job wrappers concurrently on one node,
+    like a multi-core pilot does.
+
+    Each slot has its own computing element instance (InProcess by default) and takes the
+    next wrapper from a common queue as soon as its previous payload ended.
+    The start and end of each payload are recorded, so that the throughput, the idle time
+    of the slots and the CPU efficiency can be computed with slotStatistics.
+"""
+
+import time
+import Queue
+import threading
+
+from DIRAC import S_OK, gLogger
+from DIRAC.Resources.Computing.ComputingElementFactory import ComputingElementFactory
+
+from TestDIRAC.Utilities.Benchmark import Timer
+
+class LocalSlotPool( object ):
+  """ N slots, each submitting wrappers to its own local computing element
+  """
+
+  def __init__( self, slots, ceType = 'InProcess' ):
+    self.slots = slots
+    self.ceType = ceType
+    self.log = gLogger.getSubLogger( 'LocalSlotPool' )
+
+  def run( self, wrappers ):
+    """ run all the wrappers and wait for the end of the last one
+
+    :param list wrappers: ( wrapperFile, payloadProxy ) tuples
+    :return: S_OK( { 'Payloads' : [ { 'Slot', 'Start', 'End', 'OK' } ], 'Start', 'End', 'CPU' } )
+    """
+    computingElements = []
+    for _slot in range( self.slots ):
+      result = ComputingElementFactory().getCE( self.ceType )
+      if not result['OK']:
+        return result
+      computingElements.append( result['Value'] )
+
+    queue = Queue.Queue()
+    for wrapper in wrappers:
+      queue.put( wrapper )
+    payloads = []
+    lock = threading.Lock()
+
+    def slotLoop( slot, computingElement ):
+      while True:
+        try:
+          wrapperFile, payloadProxy = queue.get_nowait()
+        except Queue.Empty:
+          return
+        start = time.time()
+        result = computingElement.submitJob( wrapperFile, payloadProxy )
+        end = time.time()
+        if not result['OK']:
+          self.log.error( 'Payload failed in slot %d: %s' % ( slot, result['Message'] ) )
+        lock.acquire()
+        try:
+          payloads.append( { 'Slot' : slot, 'Start' : start, 'End' : end, 'OK' : result['OK'] } )
+        finally:
+          lock.release()
+
+    threads = [threading.Thread( target = slotLoop, args = ( slot, computingElement ) )
+               for slot, computingElement in enumerate( computingElements )]
+    with Timer( withChildren = True ) as timer:
+      start = time.time()
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+      end = time.time()
+
+    return S_OK( { 'Payloads' : payloads, 'Start' : start, 'End' : end, 'CPU' : timer.cpu } )
+
+def slotStatistics( result, slots ):
+  """ throughput and efficiency figures of a LocalSlotPool.run result
+
+  :return: dict with
+    - PayloadsPerHour: payloads done per hour of wall time
+    - Failed: number of failed payloads
+    - IdleTime: per slot, seconds not spent running a payload between the pool start and end
+    - MaxGap: per slot, longest time between the end of a payload and the start of the next one
+    - CPUEfficiency: CPU consumed / ( wall time * slots )
+  """
+  wall = result['End'] - result['Start']
+  idleTime = []
+  maxGap = []
+  for slot in range( slots ):
+    payloads = sorted( [payload for payload in result['Payloads'] if payload['Slot'] == slot],
+                       key = lambda payload: payload['Start'] )
+    busy = sum( [payload['End'] - payload['Start'] for payload in payloads] )
+    idleTime.append( wall - busy )
+    gaps = [payloads[i + 1]['Start'] - payloads[i]['End'] for i in range( len( payloads ) - 1 )]
+    maxGap.append( max( gaps ) if gaps else 0. )
+
+  return { 'PayloadsPerHour' : len( result['Payloads'] ) * 3600. / wall if wall else 0.,
+           'Failed' : len( [payload for payload in result['Payloads'] if not payload['OK']] ),
+           'IdleTime' : idleTime,
+           'MaxGap' : maxGap,
+           'CPUEfficiency' : result['CPU'] / ( wall * slots ) if wall else 0. }
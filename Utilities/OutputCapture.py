@@ -0,0 +1,116 @@
+""" Capture of the payload output, for the callback of Subprocess.systemCall
+
+    - the last maxPeekLines lines are kept in a ring buffer, for the Watchdog to peek at
+    - the output file is kept open and written in blocks, when maxBytes are buffered
+      or when the oldest buffered line is older than maxDelay seconds
+
+    The records written are the same as the JobWrapper ExecutionThread ones:
+      time: <time>
+      stdid <stdid>
+      line <line>
+"""
+
+import os
+import time
+import threading
+import collections
+
+from DIRAC import S_OK, S_ERROR
+
+class BufferedOutputWriter( object ):
+  """ Append only file writer flushing on size or time thresholds
+  """
+
+  def __init__( self, fileName, maxBytes = 64 * 1024, maxDelay = 5. ):
+    self.fileName = fileName
+    self.maxBytes = maxBytes
+    self.maxDelay = maxDelay
+    self.flushes = 0
+    self.__buffer = []
+    self.__bufferedBytes = 0
+    self.__firstBuffered = None
+    self.__fd = None
+    self.__lock = threading.Lock()
+
+  def write( self, data ):
+    self.__lock.acquire()
+    try:
+      if not self.__buffer:
+        self.__firstBuffered = time.time()
+      self.__buffer.append( data )
+      self.__bufferedBytes += len( data )
+      if self.__bufferedBytes >= self.maxBytes or time.time() - self.__firstBuffered >= self.maxDelay:
+        self.__flush()
+    finally:
+      self.__lock.release()
+
+  def flushIfDue( self ):
+    """ flush if the oldest buffered data waited more than maxDelay
+    """
+    self.__lock.acquire()
+    try:
+      if self.__buffer and time.time() - self.__firstBuffered >= self.maxDelay:
+        self.__flush()
+    finally:
+      self.__lock.release()
+
+  def flush( self ):
+    self.__lock.acquire()
+    try:
+      self.__flush()
+    finally:
+      self.__lock.release()
+
+  def close( self ):
+    self.__lock.acquire()
+    try:
+      self.__flush()
+      if self.__fd is not None:
+        os.close( self.__fd )
+        self.__fd = None
+    finally:
+      self.__lock.release()
+
+  def __flush( self ):
+    """ write the buffer out, to be called with the lock held
+    """
+    if not self.__buffer:
+      return
+    if self.__fd is None:
+      self.__fd = os.open( self.fileName, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0644 )
+    data = ''.join( self.__buffer )
+    while data:
+      data = data[os.write( self.__fd, data ):]
+    self.__buffer = []
+    self.__bufferedBytes = 0
+    self.__firstBuffered = None
+    self.flushes += 1
+
+class OutputCapture( object ):
+  """ Payload output capture: ring buffer for peeking plus buffered output file
+  """
+
+  def __init__( self, outputFile = 'appstd.out', maxPeekLines = 200, maxBytes = 64 * 1024, maxDelay = 5. ):
+    self.maxPeekLines = maxPeekLines
+    self.peekLines = collections.deque( maxlen = maxPeekLines )
+    self.writer = BufferedOutputWriter( outputFile, maxBytes, maxDelay )
+
+  def sendOutput( self, stdid, line ):
+    """ callback for Subprocess.systemCall
+    """
+    self.writer.write( 'time: %s\nstdid %s\nline %s\n' % ( time.time(), stdid, line ) )
+    self.peekLines.append( line )
+
+  def getOutput( self, lines = 0 ):
+    """ the last lines of output (at most maxPeekLines), all of them if lines is 0
+    """
+    self.writer.flushIfDue()
+    if not self.peekLines:
+      return S_ERROR( 'No Job output found' )
+    outputLines = list( self.peekLines )
+    if lines:
+      outputLines = outputLines[-lines:]
+    return S_OK( outputLines )
+
+  def close( self ):
+    self.writer.close()
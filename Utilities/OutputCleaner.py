@@ -0,0 +1,162 @@
+""" Bulk removal of the files produced by the test jobs
+
+    - the LFNs uploaded by the jobs are found with bulk queries of their UploadedOutputData
+      parameter (see BulkJobMonitoringClient)
+    - the replicas are listed in bulk and the files grouped by SE, each file with the first of
+      its SEs: the groups are removed in parallel (at most maxThreads at a time), by
+      ReplicaManager.removeFile calls of chunkSize LFNs, which remove the replicas then the
+      catalog entries
+    - with catalogOnFailure, the catalog entries of the files that could not be removed are
+      removed anyway, leaving their replicas as dark data
+
+      cleaner = OutputCleaner()
+      result = cleaner.cleanJobs( jobIDs )
+      print cleaner.report( result['Value'] )
+"""
+
+import time
+import Queue
+import threading
+
+from DIRAC import S_OK, gLogger
+from DIRAC.DataManagementSystem.Client.ReplicaManager import ReplicaManager
+
+from TestDIRAC.Utilities.BulkJobMonitoringClient import BulkJobMonitoringClient
+
+class OutputCleaner( object ):
+  """ Removes files, by chunks and in parallel over the SEs
+  """
+
+  def __init__( self, maxThreads = 8, chunkSize = 100 ):
+    self.maxThreads = maxThreads
+    self.chunkSize = chunkSize
+    self.monitoring = BulkJobMonitoringClient()
+    self.log = gLogger.getSubLogger( 'OutputCleaner' )
+
+  def getOutputLFNs( self, jobIDs ):
+    """ LFNs uploaded by the jobs
+
+    :return: S_OK( [ lfn ] )
+    """
+    result = self.monitoring.getJobsParameter( list( jobIDs ), 'UploadedOutputData' )
+    if not result['OK']:
+      return result
+    lfns = []
+    for uploaded in result['Value'].values():
+      lfns += [lfn.strip() for lfn in uploaded.split( ',' ) if lfn.strip()]
+    return S_OK( lfns )
+
+  def cleanJobs( self, jobIDs, force = False, catalogOnFailure = False ):
+    """ remove all the files uploaded by the jobs
+    """
+    result = self.getOutputLFNs( jobIDs )
+    if not result['OK']:
+      return result
+    return self.removeFiles( result['Value'], force, catalogOnFailure )
+
+  def removeFiles( self, lfns, force = False, catalogOnFailure = False ):
+    """ remove the files with ReplicaManager.removeFile, by chunks, the files grouped by SE and
+        the SEs in parallel
+
+    :param bool force: passed to ReplicaManager.removeFile (files missing from the catalog ignored)
+    :param bool catalogOnFailure: remove the catalog entries of the files whose removal failed,
+                                  leaving their replicas on the SEs as dark data
+    :return: S_OK( { 'Files' : number of LFNs, 'Removed' : [ lfn ], 'Failed' : { lfn : reason },
+                     'CatalogOnly' : [ lfn removed from the catalog only ],
+                     'SEs' : { se : number of replicas }, 'WallTime' : seconds, 'FilesPerSecond' : rate } )
+    """
+    start = time.time()
+    lfns = sorted( set( lfns ) )
+    summary = { 'Files' : len( lfns ), 'Removed' : [], 'Failed' : {}, 'CatalogOnly' : [], 'SEs' : {},
+                'WallTime' : 0., 'FilesPerSecond' : 0. }
+    if not lfns:
+      return S_OK( summary )
+
+    replicaManager = ReplicaManager()
+    # # each file in the group of the first of its SEs, the files without replica in None
+    lfnsBySE = {}
+    for chunk in self.__chunks( lfns ):
+      result = replicaManager.getReplicas( chunk )
+      if not result['OK']:
+        return result
+      for lfn, replicas in result['Value']['Successful'].items():
+        for se in replicas:
+          summary['SEs'][se] = summary['SEs'].get( se, 0 ) + 1
+        lfnsBySE.setdefault( min( replicas ) if replicas else None, [] ).append( lfn )
+      for lfn in result['Value']['Failed']:
+        lfnsBySE.setdefault( None, [] ).append( lfn )
+
+    removed, failed = self.__removeFiles( lfnsBySE, force )
+    summary['Removed'] = removed
+    summary['Failed'] = failed
+    if catalogOnFailure and failed:
+      for chunk in self.__chunks( sorted( failed ) ):
+        result = replicaManager.removeCatalogFile( chunk )
+        if not result['OK']:
+          continue
+        for lfn in result['Value']['Successful']:
+          summary['CatalogOnly'].append( lfn )
+          summary['Removed'].append( lfn )
+          del summary['Failed'][lfn]
+      if summary['CatalogOnly']:
+        self.log.warn( '%d files removed from the catalog only, with replicas left' % len( summary['CatalogOnly'] ) )
+
+    summary['WallTime'] = time.time() - start
+    if summary['WallTime']:
+      summary['FilesPerSecond'] = len( summary['Removed'] ) / summary['WallTime']
+    return S_OK( summary )
+
+  def report( self, summary ):
+    lines = ['%d files, %d removed, %d failed in %.2f s: %.1f files/s' % ( summary['Files'], len( summary['Removed'] ),
+                                                                         len( summary['Failed'] ), summary['WallTime'],
+                                                                         summary['FilesPerSecond'] )]
+    if summary['CatalogOnly']:
+      lines.append( '  %d removed from the catalog only, replicas left' % len( summary['CatalogOnly'] ) )
+    for se in sorted( summary['SEs'] ):
+      lines.append( '  %-30s %6d replicas' % ( se, summary['SEs'][se] ) )
+    return '\n'.join( lines )
+
+  def __chunks( self, lfns ):
+    for start in range( 0, len( lfns ), self.chunkSize ):
+      yield lfns[start:start + self.chunkSize]
+
+  def __removeFiles( self, lfnsBySE, force ):
+    """ ReplicaManager.removeFile by chunks, one thread per group of files, maxThreads at most
+
+    :return: ( [ lfn removed ], { lfn : reason } )
+    """
+    queue = Queue.Queue()
+    for se, seLFNs in lfnsBySE.items():
+      queue.put( ( se, seLFNs ) )
+    removed = []
+    failed = {}
+    lock = threading.Lock()
+
+    def removeLoop():
+      replicaManager = ReplicaManager()
+      while True:
+        try:
+          se, seLFNs = queue.get_nowait()
+        except Queue.Empty:
+          return
+        for chunk in self.__chunks( seLFNs ):
+          result = replicaManager.removeFile( chunk, force = force )
+          if not result['OK']:
+            chunkRemoved, chunkFailed = [], dict( [( lfn, result['Message'] ) for lfn in chunk] )
+          else:
+            chunkRemoved, chunkFailed = result['Value']['Successful'].keys(), result['Value']['Failed']
+          if chunkFailed:
+            self.log.warn( 'Failed to remove %d files with replicas at %s' % ( len( chunkFailed ), se ) )
+          lock.acquire()
+          try:
+            removed.extend( chunkRemoved )
+            failed.update( chunkFailed )
+          finally:
+            lock.release()
+
+    threads = [threading.Thread( target = removeLoop ) for _i in range( min( self.maxThreads, len( lfnsBySE ) ) )]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    return removed, failed
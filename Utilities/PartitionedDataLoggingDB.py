@@ -0,0 +1,146 @@
+""" DataLoggingDB with the records partitioned by month
+
+    DataLoggingDB keeps all the records in one table: every data operation adds records, so
+    the table grows without bound, getUniqueStates scans it all, and a retention purge is a
+    DELETE of millions of rows.
+
+    PartitionedDataLoggingDB creates the same table, RANGE partitioned on TO_DAYS( StatusTime )
+    with one partition per month, and indexed on ( LFN, StatusTimeOrder ) and Status:
+    - getFileLoggingInfo reads the records of a file from the index, already ordered; with
+      since, only the partitions after since are read
+    - getUniqueStates reads the Status index instead of the rows
+    - purgeRecords( before ) drops the partitions of the months before, and only deletes rows
+      in the partition holding the limit
+
+    The partitions are added ahead of time by addPartitions, the records beyond the last
+    month go to the pFuture partition until then.
+
+      db = PartitionedDataLoggingDB()
+      db._createTable()
+      db.addPartitions( months = 2 )
+      db.purgeRecords( datetime.datetime( 2012, 1, 1 ) )
+"""
+
+import datetime
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.DB.DataLoggingDB import DataLoggingDB
+
+def monthStart( date, months = 0 ):
+  """ first day of the month of date, shifted by months
+  """
+  month = date.year * 12 + date.month - 1 + months
+  return datetime.datetime( month // 12, month % 12 + 1, 1 )
+
+def partitionName( date ):
+  return date.strftime( 'p%Y%m' )
+
+class PartitionedDataLoggingDB( DataLoggingDB ):
+  """ DataLoggingDB partitioned by month of StatusTime
+  """
+
+  def _createTable( self, start = None, months = 13 ):
+    """ create the partitioned table, with a partition for each month from start
+
+    :param datetime start: first month, by default the last 12 months and the current one
+    """
+    start = monthStart( start if start else datetime.datetime.utcnow(), 0 if start else 1 - months )
+    partitions = [self.__partition( monthStart( start, i ) ) for i in range( months )]
+    partitions.append( "PARTITION pFuture VALUES LESS THAN MAXVALUE" )
+    # # the partitioning column has to be part of the primary key
+    return self._update( "CREATE TABLE IF NOT EXISTS `%s` ( "
+                         "`FileID` INTEGER NOT NULL AUTO_INCREMENT, "
+                         "`LFN` VARCHAR(255) NOT NULL, "
+                         "`Status` VARCHAR(255) NOT NULL, "
+                         "`MinorStatus` VARCHAR(255) NOT NULL DEFAULT 'Unknown', "
+                         "`StatusTime` DATETIME NOT NULL, "
+                         "`StatusTimeOrder` DOUBLE(12,3) NOT NULL, "
+                         "`Source` VARCHAR(127) NOT NULL DEFAULT 'Unknown', "
+                         "PRIMARY KEY ( `FileID`, `StatusTime` ), "
+                         "INDEX `LFN` ( `LFN`, `StatusTimeOrder` ), "
+                         "INDEX `Status` ( `Status` ) "
+                         ") ENGINE=InnoDB PARTITION BY RANGE ( TO_DAYS( `StatusTime` ) ) ( %s )" % ( self.tableName,
+                                                                                                   ", ".join( partitions ) ) )
+
+  @staticmethod
+  def __partition( month ):
+    return "PARTITION %s VALUES LESS THAN ( TO_DAYS( '%s' ) )" % ( partitionName( month ),
+                                                                  monthStart( month, 1 ).strftime( '%Y-%m-%d' ) )
+
+  def getPartitions( self ):
+    """ :return: S_OK( [ ( partition name, month, rows ) ] ), month is None for pFuture,
+                 rows is the InnoDB estimate
+    """
+    result = self._query( "SELECT `PARTITION_NAME`, `TABLE_ROWS` FROM `information_schema`.`PARTITIONS` "
+                          "WHERE `TABLE_SCHEMA` = DATABASE() AND `TABLE_NAME` = '%s' "
+                          "ORDER BY `PARTITION_ORDINAL_POSITION`" % self.tableName )
+    if not result['OK']:
+      return result
+    if not result['Value'] or result['Value'][0][0] is None:
+      return S_ERROR( "%s is not partitioned" % self.tableName )
+    partitions = []
+    for name, rows in result['Value']:
+      month = datetime.datetime.strptime( name, 'p%Y%m' ) if name != 'pFuture' else None
+      partitions.append( ( name, month, rows ) )
+    return S_OK( partitions )
+
+  def addPartitions( self, months = 1, now = None ):
+    """ split pFuture to have the partitions up to months after the current one
+
+    :return: S_OK( [ added partition names ] )
+    """
+    partitions = self.getPartitions()
+    if not partitions['OK']:
+      return partitions
+    monthly = [partitionMonth for _name, partitionMonth, _rows in partitions['Value'] if partitionMonth]
+    last = monthStart( now if now else datetime.datetime.utcnow(), months )
+    month = monthStart( monthly[-1], 1 ) if monthly else monthStart( last )
+    added = []
+    while month <= last:
+      added.append( month )
+      month = monthStart( month, 1 )
+    if not added:
+      return S_OK( [] )
+    result = self._update( "ALTER TABLE `%s` REORGANIZE PARTITION pFuture INTO ( %s, "
+                           "PARTITION pFuture VALUES LESS THAN MAXVALUE )" % ( self.tableName,
+                                                                               ", ".join( [self.__partition( addedMonth )
+                                                                                           for addedMonth in added] ) ) )
+    if not result['OK']:
+      return result
+    return S_OK( [partitionName( addedMonth ) for addedMonth in added] )
+
+  def purgeRecords( self, before ):
+    """ remove the records older than before: the partitions of the months ending before it are
+        dropped, the older records of the month of before are deleted
+
+    :return: S_OK( { 'Partitions' : [ dropped partition names ], 'Records' : deleted records } )
+    """
+    partitions = self.getPartitions()
+    if not partitions['OK']:
+      return partitions
+    dropped = [name for name, month, _rows in partitions['Value'] if month and monthStart( month, 1 ) <= before]
+    # # MySQL refuses to drop all the RANGE partitions, pFuture always stays
+    if dropped:
+      result = self._update( "ALTER TABLE `%s` DROP PARTITION %s" % ( self.tableName, ", ".join( dropped ) ) )
+      if not result['OK']:
+        return result
+    result = self._update( "DELETE FROM `%s` WHERE `StatusTime` < '%s'" % ( self.tableName,
+                                                                            before.strftime( '%Y-%m-%d %H:%M:%S' ) ) )
+    if not result['OK']:
+      return result
+    return S_OK( { 'Partitions' : dropped, 'Records' : result['Value'] } )
+
+  def getFileLoggingInfo( self, lfn, since = None ):
+    """ the records of lfn ordered by time, as DataLoggingDB.getFileLoggingInfo
+
+    :param datetime since: only read the partitions from since
+    """
+    if not since:
+      return DataLoggingDB.getFileLoggingInfo( self, lfn )
+    escaped = self._escapeString( lfn )
+    if not escaped['OK']:
+      return escaped
+    return self._query( "SELECT `Status`, `MinorStatus`, `StatusTime`, `Source` FROM `%s` "
+                        "WHERE `LFN` = %s AND `StatusTime` >= '%s' "
+                        "ORDER BY `StatusTimeOrder`, `StatusTime`" % ( self.tableName, escaped['Value'],
+                                                                       since.strftime( '%Y-%m-%d %H:%M:%S' ) ) )
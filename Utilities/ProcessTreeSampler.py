@@ -0,0 +1,139 @@
+""" Low overhead sampling of the CPU and memory used by a process tree, for the Watchdog
+
+    The whole process table is read from /proc/<pid>/stat in one pass, without starting any
+    external command, and the tree below the wrapper PID is summed up.
+    CPU and memory of the same sample are served to the Watchdog for maxAge seconds, so that
+    one checking period costs one pass.
+
+    SamplingWatchdogFactory makes the sampler selectable when the Watchdog is created:
+
+      SamplingWatchdogFactory().getWatchdog( pid, thread, spObject, jobCPUTime, sampler = 'proc' )
+
+    The sampler replaces the Watchdog's processMonitor, hence its CPU consumed. The memory the
+    Watchdog reports with getMemoryUsed stays the node memory used, as on the platform; the
+    resident memory of the payload tree is added as getTreeMemoryUsed.
+"""
+
+import os
+import time
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.WorkloadManagementSystem.JobWrapper.WatchdogFactory import WatchdogFactory
+
+# indexes in /proc/<pid>/stat, counting from the field following the command name
+PPID = 1
+UTIME = 11
+STIME = 12
+CUTIME = 13
+CSTIME = 14
+RSS = 21
+
+class ProcessTreeSampler( object ):
+  """ CPU (seconds) and resident memory (kB) of a process and all its descendants
+  """
+
+  def __init__( self, maxAge = 1. ):
+    self.maxAge = maxAge
+    self.clockTicks = float( os.sysconf( 'SC_CLK_TCK' ) )
+    self.pageSize = os.sysconf( 'SC_PAGE_SIZE' )
+    self.__lastSample = {}
+
+  def readProcessTable( self ):
+    """ { pid : ( ppid, cpu ticks, rss pages ) } for all the processes visible in /proc
+    """
+    table = {}
+    for entry in os.listdir( '/proc' ):
+      if not entry.isdigit():
+        continue
+      try:
+        fd = open( '/proc/%s/stat' % entry )
+        try:
+          stat = fd.read()
+        finally:
+          fd.close()
+      except IOError:
+        # the process ended in the meantime
+        continue
+      # the command name is in brackets and can contain spaces
+      fields = stat[stat.rfind( ')' ) + 2:].split()
+      ticks = int( fields[UTIME] ) + int( fields[STIME] ) + int( fields[CUTIME] ) + int( fields[CSTIME] )
+      table[int( entry )] = ( int( fields[PPID] ), ticks, int( fields[RSS] ) )
+    return table
+
+  def getTree( self, pid, table = None ):
+    """ pid followed by the PIDs of all its descendants
+    """
+    if table is None:
+      table = self.readProcessTable()
+    children = {}
+    for childPID, ( ppid, _ticks, _rss ) in table.items():
+      children.setdefault( ppid, [] ).append( childPID )
+
+    tree = [pid]
+    for treePID in tree:
+      tree.extend( children.get( treePID, [] ) )
+    return tree
+
+  def sample( self, pid ):
+    """ sample the tree starting at pid
+
+    :return: S_OK( { 'CPU' : seconds, 'RSS' : kB, 'Processes' : number of processes } )
+    """
+    pid = int( pid )
+    lastTime, lastSample = self.__lastSample.get( pid, ( 0, None ) )
+    if lastSample and time.time() - lastTime < self.maxAge:
+      return S_OK( lastSample )
+
+    table = self.readProcessTable()
+    if pid not in table:
+      return S_ERROR( 'Process %s not found in /proc' % pid )
+
+    tree = self.getTree( pid, table )
+    ticks = sum( [table[treePID][1] for treePID in tree] )
+    rss = sum( [table[treePID][2] for treePID in tree] )
+
+    result = { 'CPU' : ticks / self.clockTicks,
+               'RSS' : rss * self.pageSize / 1024.,
+               'Processes' : len( tree ) }
+    self.__lastSample[pid] = ( time.time(), result )
+    return S_OK( result )
+
+  def getCPUConsumed( self, pid ):
+    """ same interface as ProcessMonitor.getCPUConsumed
+    """
+    result = self.sample( pid )
+    if not result['OK']:
+      return result
+    return S_OK( result['Value']['CPU'] )
+
+  def getTreeMemoryUsed( self, pid ):
+    """ resident memory of the tree, in kB, not the node memory the Watchdog reports
+    """
+    result = self.sample( pid )
+    if not result['OK']:
+      return result
+    return S_OK( result['Value']['RSS'] )
+
+class SamplingWatchdogFactory( WatchdogFactory ):
+  """ WatchdogFactory where the way of sampling the payload can be chosen
+
+      sampler = 'default' keeps the platform Watchdog as it is,
+      sampler = 'proc' makes it read the process tree from /proc with a ProcessTreeSampler
+  """
+
+  samplers = ( 'default', 'proc' )
+
+  def getWatchdog( self, *args, **kwargs ):
+    sampler = kwargs.pop( 'sampler', 'default' )
+    if sampler not in self.samplers:
+      return S_ERROR( 'Unknown Watchdog sampler %s, should be one of %s' % ( sampler, ', '.join( self.samplers ) ) )
+
+    result = WatchdogFactory.getWatchdog( self, *args, **kwargs )
+    if not result['OK'] or sampler == 'default':
+      return result
+
+    watchdog = result['Value']
+    treeSampler = ProcessTreeSampler()
+    watchdog.processMonitor = treeSampler
+    watchdog.getTreeMemoryUsed = lambda: treeSampler.getTreeMemoryUsed( watchdog.wrapperPID )
+    return result
@@ -0,0 +1,104 @@
+""" Session scoped cache of the proxy information
+
+    getProxyInfo reads and parses the proxy file, and queries the VOMS extensions, at each
+    call; the dump of the chain for the payloads serialises it again. The test cases calling
+    them in their setUp pay this for each test: the result is kept here for the whole process.
+
+    An entry is used as long as the proxy file is the same (path, mtime and size) and its
+    remaining lifetime is above minLifetime seconds, so that a renewed proxy is picked up:
+
+      result = gProxyCache.getProxyInfo( disableVOMS = True )
+      result = gProxyCache.getProxyString( disableVOMS = True )
+"""
+
+import os
+import time
+import threading
+
+from DIRAC import S_OK, gLogger
+
+class ProxyCache( object ):
+  """ getProxyInfo and the dump of the proxy chain, done once per proxy file
+  """
+
+  def __init__( self, minLifetime = 300 ):
+    self.minLifetime = minLifetime
+    self.hits = 0
+    self.misses = 0
+    # ( disableVOMS, proxy file ) -> { 'Stamp' : file stamp, 'Time' : time of the lookup,
+    #                                  'Info' : getProxyInfo value, 'String' : dump of the chain }
+    self.__entries = {}
+    self.__lock = threading.Lock()
+    self.log = gLogger.getSubLogger( 'ProxyCache' )
+
+  def getProxyInfo( self, disableVOMS = False ):
+    """ getProxyInfo( disableVOMS = disableVOMS ) for the proxy of the environment, cached
+
+    :return: S_OK( proxy info dict ), the same dict for all the hits: not to be modified
+    """
+    result = self.__getEntry( disableVOMS )
+    if not result['OK']:
+      return result
+    return S_OK( result['Value']['Info'] )
+
+  def getProxyString( self, disableVOMS = False ):
+    """ the whole proxy chain as a string, as given to the payloads, cached
+    """
+    result = self.__getEntry( disableVOMS )
+    if not result['OK']:
+      return result
+    entry = result['Value']
+    if entry['String'] is None:
+      result = entry['Info']['chain'].dumpAllToString()
+      if not result['OK']:
+        return result
+      entry['String'] = result['Value']
+    return S_OK( entry['String'] )
+
+  def invalidate( self ):
+    self.__lock.acquire()
+    try:
+      self.__entries = {}
+    finally:
+      self.__lock.release()
+
+  def __getEntry( self, disableVOMS ):
+    from DIRAC.Core.Security.Locations import getProxyLocation
+    from DIRAC.Core.Security.ProxyInfo import getProxyInfo
+
+    proxyFile = getProxyLocation()
+    stamp = self.__stamp( proxyFile )
+    key = ( bool( disableVOMS ), proxyFile )
+    self.__lock.acquire()
+    try:
+      entry = self.__entries.get( key )
+      if entry and stamp and entry['Stamp'] == stamp and \
+         entry['Info'].get( 'secondsLeft', 0 ) - ( time.time() - entry['Time'] ) > self.minLifetime:
+        self.hits += 1
+        return S_OK( entry )
+
+      self.misses += 1
+      result = getProxyInfo( disableVOMS = disableVOMS )
+      if not result['OK']:
+        self.__entries.pop( key, None )
+        return result
+      entry = { 'Stamp' : stamp, 'Time' : time.time(), 'Info' : result['Value'], 'String' : None }
+      self.__entries[key] = entry
+      self.log.verbose( 'Proxy information loaded from %s' % proxyFile )
+      return S_OK( entry )
+    finally:
+      self.__lock.release()
+
+  @staticmethod
+  def __stamp( proxyFile ):
+    """ what changes when the proxy file is renewed, None if there is no file
+    """
+    if not proxyFile:
+      return None
+    try:
+      fileStat = os.stat( proxyFile )
+    except OSError:
+      return None
+    return ( fileStat.st_mtime, fileStat.st_size, fileStat.st_ino )
+
+gProxyCache = ProxyCache()
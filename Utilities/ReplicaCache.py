@@ -0,0 +1,209 @@
+""" Client-side cache of getActiveReplicas, with time to live and LRU eviction
+
+    The RMS, FTS and transformation agents resolve the replicas of the same LFNs again and
+    again, one getActiveReplicas call each time. ReplicaCache keeps the replicas returned for
+    each LFN for ttl seconds, at most maxEntries LFNs, the least recently used ones are
+    evicted first:
+    - getActiveReplicas( lfns ) answers the cached LFNs and fetches the others with one
+      ReplicaManager.getActiveReplicas call per chunkSize LFNs
+    - prefetch( lfns ) fills the cache in bulk, before the calls of an agent cycle
+    - addReplica and removeReplica go to the catalog and invalidate the LFNs, invalidate( lfns )
+      is there for the other changes of replicas made by the process
+
+    The Failed LFNs are not cached. A fetch running while LFNs are invalidated does not store
+    them: an answer older than the change is not kept.
+
+      cache = ReplicaCache( ttl = 300 )
+      cache.prefetch( lfns )
+      replicas = cache.getActiveReplicas( lfn )['Value']['Successful']
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from DIRAC import S_OK, gLogger
+
+class ReplicaCache( object ):
+  """ getActiveReplicas with a TTL and LRU cache in front
+  """
+
+  def __init__( self, replicaManager = None, catalog = None, ttl = 300, maxEntries = 100000,
+                chunkSize = 1000, clock = time.time ):
+    """ c'tor
+
+    :param replicaManager: answering getActiveReplicas, a ReplicaManager by default
+    :param catalog: receiving addReplica and removeReplica, a FileCatalogClient by default
+    :param clock: the current time in seconds, time.time by default
+    """
+    self.__replicaManager = replicaManager
+    self.__catalog = catalog
+    self.ttl = ttl
+    self.maxEntries = maxEntries
+    self.chunkSize = chunkSize
+    self.clock = clock
+    self.log = gLogger.getSubLogger( 'ReplicaCache' )
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.calls = 0
+    # lfn -> ( expiry, replicas ), least recently used first
+    self.__entries = OrderedDict()
+    self.__fetches = 0
+    self.__invalidatedDuringFetch = set()
+    self.__allInvalidatedDuringFetch = False
+    self.__lock = threading.Lock()
+
+  @property
+  def replicaManager( self ):
+    if not self.__replicaManager:
+      from DIRAC.DataManagementSystem.Client.ReplicaManager import ReplicaManager
+      self.__replicaManager = ReplicaManager()
+    return self.__replicaManager
+
+  @property
+  def catalog( self ):
+    if not self.__catalog:
+      from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+      self.__catalog = FileCatalogClient()
+    return self.__catalog
+
+  def size( self ):
+    """ number of LFNs cached, expired ones included
+    """
+    return len( self.__entries )
+
+  def hitRate( self ):
+    lookups = self.hits + self.misses
+    return float( self.hits ) / lookups if lookups else 0.
+
+  def __lookup( self, lfns ):
+    """ :return: ( { lfn : replicas } of the cached LFNs, [ missing LFNs ] )
+    """
+    now = self.clock()
+    cached = {}
+    missing = []
+    self.__lock.acquire()
+    try:
+      for lfn in lfns:
+        entry = self.__entries.pop( lfn, None )
+        if entry and entry[0] > now:
+          # # back at the most recently used end
+          self.__entries[lfn] = entry
+          cached[lfn] = entry[1]
+        else:
+          missing.append( lfn )
+    finally:
+      self.__lock.release()
+    return cached, missing
+
+  def __fetch( self, lfns ):
+    """ getActiveReplicas of lfns by chunks, the Successful ones are cached
+
+    :return: S_OK( { 'Successful' : { lfn : replicas }, 'Failed' : { lfn : message } } )
+    """
+    successful = {}
+    failed = {}
+    self.__lock.acquire()
+    self.__fetches += 1
+    self.__lock.release()
+    try:
+      for i in range( 0, len( lfns ), self.chunkSize ):
+        chunk = lfns[i:i + self.chunkSize]
+        self.calls += 1
+        result = self.replicaManager.getActiveReplicas( chunk )
+        if not result['OK']:
+          self.log.warn( "getActiveReplicas failed", result['Message'] )
+          return result
+        successful.update( result['Value']['Successful'] )
+        failed.update( result['Value']['Failed'] )
+      self.__store( successful )
+    finally:
+      self.__lock.acquire()
+      self.__fetches -= 1
+      if not self.__fetches:
+        self.__invalidatedDuringFetch.clear()
+        self.__allInvalidatedDuringFetch = False
+      self.__lock.release()
+    return S_OK( { 'Successful' : successful, 'Failed' : failed } )
+
+  def __store( self, replicas ):
+    expiry = self.clock() + self.ttl
+    self.__lock.acquire()
+    try:
+      if self.__allInvalidatedDuringFetch:
+        return
+      for lfn, lfnReplicas in replicas.items():
+        if lfn in self.__invalidatedDuringFetch:
+          continue
+        self.__entries.pop( lfn, None )
+        self.__entries[lfn] = ( expiry, lfnReplicas )
+      while len( self.__entries ) > self.maxEntries:
+        self.__entries.popitem( last = False )
+        self.evictions += 1
+    finally:
+      self.__lock.release()
+
+  def getActiveReplicas( self, lfns ):
+    """ ReplicaManager.getActiveReplicas, from the cache for the LFNs it holds
+
+    :return: S_OK( { 'Successful' : { lfn : { SE : PFN } }, 'Failed' : { lfn : message } } )
+    """
+    lfns = [lfns] if isinstance( lfns, basestring ) else list( lfns )
+    cached, missing = self.__lookup( lfns )
+    self.hits += len( cached )
+    self.misses += len( missing )
+    if not missing:
+      return S_OK( { 'Successful' : cached, 'Failed' : {} } )
+    result = self.__fetch( missing )
+    if not result['OK']:
+      return result
+    result['Value']['Successful'].update( cached )
+    return result
+
+  def prefetch( self, lfns ):
+    """ fetch in bulk the LFNs not cached, without counting hits or misses
+
+    :return: S_OK( number of LFNs fetched )
+    """
+    lfns = [lfns] if isinstance( lfns, basestring ) else list( set( lfns ) )
+    missing = self.__lookup( lfns )[1]
+    if not missing:
+      return S_OK( 0 )
+    result = self.__fetch( missing )
+    if not result['OK']:
+      return result
+    return S_OK( len( missing ) )
+
+  def invalidate( self, lfns = None ):
+    """ forget lfns, all the LFNs if None
+    """
+    self.__lock.acquire()
+    try:
+      if lfns is None:
+        self.__entries.clear()
+        self.__allInvalidatedDuringFetch = self.__fetches > 0
+        return
+      lfns = [lfns] if isinstance( lfns, basestring ) else lfns
+      for lfn in lfns:
+        self.__entries.pop( lfn, None )
+      if self.__fetches:
+        self.__invalidatedDuringFetch.update( lfns )
+    finally:
+      self.__lock.release()
+
+  def addReplica( self, lfns ):
+    """ FileCatalog.addReplica( { lfn : { 'PFN' : pfn, 'SE' : se } } ), the LFNs are invalidated
+    """
+    try:
+      return self.catalog.addReplica( lfns )
+    finally:
+      self.invalidate( list( lfns ) )
+
+  def removeReplica( self, lfns ):
+    """ FileCatalog.removeReplica( { lfn : { 'SE' : se } } ), the LFNs are invalidated
+    """
+    try:
+      return self.catalog.removeReplica( lfns )
+    finally:
+      self.invalidate( list( lfns ) )
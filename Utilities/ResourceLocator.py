@@ -0,0 +1,91 @@
+""" Index of the files below a directory, for the lookups of the test resources
+
+    The tree is walked once and the file names indexed: the lookups are then dictionary
+    accesses instead of a walk of the whole tree. The index is rebuilt when a directory
+    of the tree changed (a file or directory was added, removed or renamed), which is
+    checked from the directory mtimes at each lookup: a stat per directory, without
+    listing them. With a checkInterval, the mtimes are only checked every checkInterval
+    seconds, and the changes made in between may be missed.
+
+    With the default checkInterval of 0, the results are the same, in the same order, as
+    the ones of a walk:
+
+      gResourceLocator.find( 'exe-script.py', '.' )
+      [ './Integration/Workflows/exe-script.py', './Integration/WorkloadManagementSystem/exe-script.py' ]
+"""
+
+import os
+import time
+
+class ResourceLocator( object ):
+  """ File name index of directory trees, one per root directory
+  """
+
+  def __init__( self, checkInterval = 0. ):
+    self.checkInterval = checkInterval
+    self.rebuilds = 0
+    # absolute root -> { 'Files' : { name : [ relative directories ] }, 'Mtimes' : { directory : mtime },
+    #                    'Checked' : time of the last check }
+    self.__indexes = {}
+
+  def find( self, name, path, directory = None ):
+    """ paths of the files called name below path, as os.path.join( root, name ) for each root
+        of os.walk( path ), only the ones containing directory if given
+    """
+    index = self.__getIndex( path )
+    if name not in index['Files']:
+      # the file may have been created since the last check
+      index = self.__getIndex( path, force = True )
+    result = [os.path.join( path, relativeDir, name ) for relativeDir in index['Files'].get( name, [] )]
+    if directory:
+      result = [filePath for filePath in result if directory in filePath]
+    return result
+
+  def invalidate( self, path = None ):
+    """ forget the index of path, or all of them
+    """
+    if path is None:
+      self.__indexes = {}
+    else:
+      self.__indexes.pop( os.path.abspath( path ), None )
+
+  def __getIndex( self, path, force = False ):
+    root = os.path.abspath( path )
+    index = self.__indexes.get( root )
+    if index is not None and ( force or time.time() - index['Checked'] >= self.checkInterval ):
+      if self.__changed( index ):
+        index = None
+      else:
+        index['Checked'] = time.time()
+    if index is None:
+      index = self.__build( root )
+      self.__indexes[root] = index
+    return index
+
+  @staticmethod
+  def __changed( index ):
+    for directory, mtime in index['Mtimes'].iteritems():
+      try:
+        if os.stat( directory ).st_mtime != mtime:
+          return True
+      except OSError:
+        return True
+    return False
+
+  def __build( self, root ):
+    files = {}
+    mtimes = {}
+    for directory, _dirs, fileNames in os.walk( root ):
+      try:
+        mtimes[directory] = os.stat( directory ).st_mtime
+      except OSError:
+        continue
+      relativeDir = os.path.relpath( directory, root )
+      if relativeDir == os.curdir:
+        relativeDir = ''
+      for fileName in fileNames:
+        files.setdefault( fileName, [] ).append( relativeDir )
+    self.rebuilds += 1
+    return { 'Files' : files, 'Mtimes' : mtimes, 'Checked' : time.time() }
+
+gResourceLocator = ResourceLocator()
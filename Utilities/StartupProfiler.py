@@ -0,0 +1,308 @@
+""" Per phase timing of a startup, stored as JSON records that can be compared between runs
+
+    Records are appended one per line to a file, each one looking like:
+
+      { "Name": "JobWrapper", "Date": "2013-06-12 10:21:33", "Host": "...", "DIRACVersion": "v6r9",
+        "Phases": { "imports": 1.2, "configuration": 0.4, ... }, "Order": [ "imports", ... ], "Total": 2.3 }
+
+    compareProfiles compares a record with the median of previous ones, phase by phase.
+
+    The phases of a process started by someone else, e.g. a job wrapper run by a CE, are timed
+    from inside it: instrumentScript inserts in the script calls to gProcessTiming, which writes
+    the phases of the process to the file named by TESTDIRAC_PROCESS_TIMING when it exits.
+
+    Used as a script, it compares the last record of a file with the ones before it:
+
+      python StartupProfiler.py jobWrapperStartup.json [tolerance]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import socket
+import datetime
+
+class StartupProfiler( object ):
+  """ Collects the wall clock duration of the named phases of a startup
+
+      profiler = StartupProfiler( 'JobWrapper' )
+      with profiler.phase( 'imports' ):
+        import something
+  """
+
+  def __init__( self, name ):
+    self.name = name
+    self.durations = {}
+    self.order = []
+    self.start = time.time()
+
+  def phase( self, phaseName ):
+    return _Phase( self, phaseName )
+
+  def addDuration( self, phaseName, duration ):
+    if phaseName not in self.durations:
+      self.order.append( phaseName )
+      self.durations[phaseName] = 0.
+    self.durations[phaseName] += duration
+
+  def record( self ):
+    """ the JSON-able record of this startup
+    """
+    try:
+      import DIRAC
+      diracVersion = DIRAC.version
+    except ( ImportError, AttributeError ):
+      diracVersion = 'Unknown'
+    return { 'Name' : self.name,
+             'Date' : datetime.datetime.utcnow().strftime( '%Y-%m-%d %H:%M:%S' ),
+             'Host' : socket.getfqdn(),
+             'DIRACVersion' : diracVersion,
+             'Python' : sys.version.split()[0],
+             'Phases' : dict( self.durations ),
+             'Order' : list( self.order ),
+             'Total' : sum( self.durations.values() ) }
+
+  def store( self, fileName ):
+    """ append the record to fileName, return it
+    """
+    record = self.record()
+    fd = open( fileName, 'a' )
+    try:
+      fd.write( json.dumps( record, sort_keys = True ) + '\n' )
+    finally:
+      fd.close()
+    return record
+
+  def report( self ):
+    lines = ['%s startup' % self.name]
+    for phaseName in self.order:
+      lines.append( '  %-20s %8.3f s' % ( phaseName, self.durations[phaseName] ) )
+    lines.append( '  %-20s %8.3f s' % ( 'total', sum( self.durations.values() ) ) )
+    return '\n'.join( lines )
+
+class _Phase( object ):
+  """ context manager timing one phase
+  """
+
+  def __init__( self, profiler, phaseName ):
+    self.profiler = profiler
+    self.phaseName = phaseName
+    self.start = None
+
+  def __enter__( self ):
+    self.start = time.time()
+    return self
+
+  def __exit__( self, *_exc ):
+    self.profiler.addDuration( self.phaseName, time.time() - self.start )
+    return False
+
+# JobWrapper methods timed inside the wrapper process, and the phase they are counted in
+jobWrapperPhases = ( ( '__init__', 'wrapperInitialization' ),
+                     ( 'initialize', 'wrapperInitialization' ),
+                     ( 'transferInputSandbox', 'inputSandbox' ),
+                     ( 'resolveInputData', 'inputData' ),
+                     ( 'execute', 'payloadExecution' ),
+                     ( 'processJobOutputs', 'outputs' ),
+                     ( 'finalize', 'finalization' ) )
+# functions of the JobWrapper module timed as the proxy setup
+jobWrapperProxyFunctions = ( 'getProxyInfo', )
+
+def processAge():
+  """ seconds since the start of this process, None if /proc is not there
+  """
+  try:
+    startTicks = float( open( '/proc/self/stat' ).read().rpartition( ')' )[2].split()[19] )
+    uptime = float( open( '/proc/uptime' ).read().split()[0] )
+  except ( IOError, OSError, IndexError, ValueError ):
+    return None
+  return max( 0., uptime - startTicks / os.sysconf( 'SC_CLK_TCK' ) )
+
+class ProcessTiming( object ):
+  """ Phases of the current process, measured by marks and by timed functions
+
+      mark( phase ) counts the time since the previous mark in phase; the time spent in the
+      timed functions is counted in their own phase only, nested calls excluded
+  """
+
+  def __init__( self ):
+    self.durations = {}
+    self.order = []
+    self.fileName = None
+    self.last = None
+    self.timedSinceMark = 0.
+    self.stack = []
+
+  def __add( self, phaseName, duration ):
+    if phaseName not in self.durations:
+      self.order.append( phaseName )
+      self.durations[phaseName] = 0.
+    self.durations[phaseName] += duration
+
+  def start( self ):
+    """ count the interpreter startup, write the phases at exit if TESTDIRAC_PROCESS_TIMING is set
+    """
+    self.last = time.time()
+    age = processAge()
+    if age is not None:
+      self.__add( 'interpreter', age )
+    self.fileName = os.environ.get( 'TESTDIRAC_PROCESS_TIMING' )
+    if self.fileName:
+      atexit.register( self.store )
+
+  def mark( self, phaseName ):
+    now = time.time()
+    self.__add( phaseName, now - self.last - self.timedSinceMark )
+    self.last = now
+    self.timedSinceMark = 0.
+
+  def timed( self, phaseName, function ):
+    """ function counting its own duration in phaseName
+    """
+    def timedFunction( *args, **kwargs ):
+      start = time.time()
+      self.stack.append( 0. )
+      try:
+        return function( *args, **kwargs )
+      finally:
+        elapsed = time.time() - start
+        self.__add( phaseName, elapsed - self.stack.pop() )
+        if self.stack:
+          self.stack[-1] += elapsed
+        else:
+          self.timedSinceMark += elapsed
+    timedFunction.__name__ = function.__name__
+    timedFunction.__doc__ = function.__doc__
+    return timedFunction
+
+  def timeJobWrapper( self ):
+    """ time the JobWrapper methods and its proxy functions, importing the JobWrapper module
+        first if the wrapper did not yet: that import is counted in imports
+    """
+    moduleName = 'DIRAC.WorkloadManagementSystem.JobWrapper.JobWrapper'
+    if moduleName not in sys.modules:
+      __import__( moduleName )
+      self.mark( 'imports' )
+    module = sys.modules[moduleName]
+    for methodName, phaseName in jobWrapperPhases:
+      method = module.JobWrapper.__dict__.get( methodName )
+      if method:
+        setattr( module.JobWrapper, methodName, self.timed( phaseName, method ) )
+    for functionName in jobWrapperProxyFunctions:
+      if hasattr( module, functionName ):
+        setattr( module, functionName, self.timed( 'proxy', getattr( module, functionName ) ) )
+
+  def store( self ):
+    self.mark( 'other' )
+    fd = open( self.fileName, 'w' )
+    try:
+      json.dump( { 'Phases' : self.durations, 'Order' : self.order,
+                   'Total' : sum( self.durations.values() ) }, fd, sort_keys = True )
+    finally:
+      fd.close()
+
+gProcessTiming = ProcessTiming()
+
+def instrumentScript( scriptFile ):
+  """ insert the gProcessTiming calls in a job wrapper script: start at the top, imports up to
+      Script.parseCommandLine, configuration for it, then the JobWrapper methods
+
+  :return: True if the configuration step was found
+  """
+  lines = open( scriptFile ).read().split( '\n' )
+  # # after the shebang and the encoding lines
+  top = 0
+  while top < len( lines ) and top < 2 and lines[top].startswith( '#' ):
+    top += 1
+  rootDir = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+  prelude = ['import sys as _timingSys',
+             '_timingSys.path.insert( 0, %r )' % rootDir,
+             'from TestDIRAC.Utilities.StartupProfiler import gProcessTiming',
+             'gProcessTiming.start()']
+  instrumented = lines[:top] + prelude
+  found = False
+  for line in lines[top:]:
+    match = re.match( r'^(\s*)Script\.parseCommandLine\(', line )
+    if match and not found:
+      indent = match.group( 1 )
+      instrumented += [indent + "gProcessTiming.mark( 'imports' )", line,
+                       indent + "gProcessTiming.mark( 'configuration' )",
+                       indent + "gProcessTiming.timeJobWrapper()"]
+      found = True
+    else:
+      instrumented.append( line )
+  fd = open( scriptFile, 'w' )
+  try:
+    fd.write( '\n'.join( instrumented ) )
+  finally:
+    fd.close()
+  return found
+
+def loadProfiles( fileName, name = None ):
+  """ records stored in fileName, oldest first, only the ones called name if given
+  """
+  if not os.path.exists( fileName ):
+    return []
+  records = []
+  fd = open( fileName )
+  try:
+    for line in fd:
+      line = line.strip()
+      if not line:
+        continue
+      record = json.loads( line )
+      if name is None or record['Name'] == name:
+        records.append( record )
+  finally:
+    fd.close()
+  return records
+
+def median( values ):
+  values = sorted( values )
+  middle = len( values ) // 2
+  if len( values ) % 2:
+    return values[middle]
+  return ( values[middle - 1] + values[middle] ) / 2.
+
+def compareProfiles( baselines, current, tolerance = 0.2, minDelta = 0.05 ):
+  """ compare the current record with the median of the baseline records, phase by phase
+
+  :param list baselines: previous records
+  :param dict current: record to check
+  :param float tolerance: relative slowdown accepted
+  :param float minDelta: absolute slowdown (seconds) always accepted, to ignore noise on short phases
+  :return: list of ( phase, baseline, current ) for the phases that regressed
+  """
+  regressions = []
+  for phaseName in current['Order'] + ['Total']:
+    if phaseName == 'Total':
+      previous = [record['Total'] for record in baselines]
+      duration = current['Total']
+    else:
+      previous = [record['Phases'][phaseName] for record in baselines if phaseName in record['Phases']]
+      duration = current['Phases'][phaseName]
+    if not previous:
+      continue
+    reference = median( previous )
+    if duration > reference * ( 1. + tolerance ) and duration - reference > minDelta:
+      regressions.append( ( phaseName, reference, duration ) )
+  return regressions
+
+if __name__ == '__main__':
+  if len( sys.argv ) not in ( 2, 3 ):
+    print "Usage:\n python %s profileFile [tolerance]" % sys.argv[0]
+    sys.exit( -1 )
+  records = loadProfiles( sys.argv[1] )
+  if len( records ) < 2:
+    print "Nothing to compare in %s" % sys.argv[1]
+    sys.exit( 0 )
+  current = records[-1]
+  baselines = [record for record in records[:-1] if record['Name'] == current['Name']]
+  tolerance = float( sys.argv[2] ) if len( sys.argv ) == 3 else 0.2
+  regressions = compareProfiles( baselines, current, tolerance )
+  for phaseName, reference, duration in regressions:
+    print "%s: %.3f s, was %.3f s" % ( phaseName, duration, reference )
+  sys.exit( 1 if regressions else 0 )
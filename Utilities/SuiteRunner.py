@@ -0,0 +1,240 @@
+""" Runs the test modules in parallel, each one in a python process of its own
+
+    The modules are distributed over a number of workers. Each worker runs the modules it gets
+    one after the other with "python -m module", so that their __main__ suite is run, with:
+    - its own working directory, baseDir/worker<N>, where cleanTestDir and the jobs run
+      locally do their work
+    - TESTDIRAC_DB_PREFIX set to <dbPrefix><N>_ (see Bootstrap.setDBPrefix): the databases
+      with these prefixed names must exist, they are checked before starting (unless -D is
+      given). Only the configuration of the test process is changed: the DBs accessed
+      directly by the tests are isolated, the services keep using their own, unprefixed DBs
+    - TESTDIRAC_NAMESPACE set to <dbPrefix><N>, used by the tests for the names of their
+      requests, jobs and transformations (see Bootstrap.namespaced)
+    - TESTDIRAC_RESOURCE_ROOT set to the TestDIRAC directory, for find_all
+
+    The modules mixing service calls with direct DB access, or checking the global state of a
+    service (e.g. DB summaries, record counts), are not safe in parallel: they are given as
+    serialModules and run alone, once the parallel ones are done, without any prefix nor
+    namespace, so that they use the same DBs as the services.
+    With the durations of a previous run, the longest modules are started first.
+
+      python SuiteRunner.py [-j workers] [-b baseDir] [-p dbPrefix] [-d durations.json] [-B] [-D] [module ...]
+
+    Without module names, all the test modules of the TestDIRAC tree are run, but for the
+    benchmarks (unless -B is given).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import Queue
+import getopt
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+
+from DIRAC import S_OK, S_ERROR
+
+from TestDIRAC.Utilities.Bootstrap import initializeDIRAC, missingDatabases
+from TestDIRAC.Utilities.ImportTimer import findTestModules
+
+# modules using a service and the same DB directly, or asserting on the global state of a service
+defaultSerialModules = ['TestDIRAC.Integration.RequestManagementSystem.TestClientReq',
+                        'TestDIRAC.Integration.WorkloadManagementSystem.TestClientWMS',
+                        'TestDIRAC.Integration.WorkloadManagementSystem.TestSandboxStoreClient',
+                        'TestDIRAC.Integration.WorkloadManagementSystem.BenchmarkJobMonitoring',
+                        'TestDIRAC.Integration.FrameworkSystem.BenchmarkLogging',
+                        'TestDIRAC.Integration.DataManagementSystem.BenchmarkFTSHistory']
+
+def runModule( moduleName, workDir, env, logFile ):
+  """ run the suite of a test module in a child process
+
+  :return: module summary dict
+  """
+  summary = { 'Module' : moduleName, 'WorkDir' : workDir, 'LogFile' : logFile,
+              'Status' : 'Error', 'Tests' : 0, 'WallTime' : 0. }
+  start = time.time()
+  fd = open( logFile, 'w' )
+  try:
+    returnCode = subprocess.call( [sys.executable, '-m', moduleName], cwd = workDir, env = env,
+                                  stdout = fd, stderr = subprocess.STDOUT )
+  finally:
+    fd.close()
+  summary['WallTime'] = time.time() - start
+
+  # the __main__ blocks do not set the exit code: the unittest summary is parsed
+  output = open( logFile ).read()
+  ran = re.findall( r'^Ran (\d+) tests? in ', output, re.M )
+  status = re.findall( r'^(OK|FAILED)\b.*$', output, re.M )
+  if ran:
+    summary['Tests'] = int( ran[-1] )
+  if returnCode:
+    summary['Status'] = 'Error'
+  elif status:
+    summary['Status'] = status[-1]
+  return summary
+
+class SuiteRunner( object ):
+  """ Pool of workers running test modules in isolated directories, DBs and namespaces
+  """
+
+  def __init__( self, workers = None, baseDir = None, dbPrefix = 'w', serialModules = None, durations = None,
+                checkDatabases = True ):
+    self.workers = workers if workers else multiprocessing.cpu_count()
+    self.baseDir = baseDir
+    self.dbPrefix = dbPrefix
+    self.checkDatabases = checkDatabases
+    self.serialModules = serialModules if serialModules is not None else defaultSerialModules
+    self.durations = durations if durations else {}
+    self.resourceRoot = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+  def workerEnvironment( self, worker = None ):
+    """ environment of a worker, not isolated when worker is None
+    """
+    env = dict( os.environ )
+    for name in ( 'TESTDIRAC_WORKER', 'TESTDIRAC_DB_PREFIX', 'TESTDIRAC_NAMESPACE' ):
+      env.pop( name, None )
+    if worker is not None:
+      env['TESTDIRAC_WORKER'] = str( worker )
+      env['TESTDIRAC_DB_PREFIX'] = '%s%d_' % ( self.dbPrefix, worker )
+      env['TESTDIRAC_NAMESPACE'] = '%s%d' % ( self.dbPrefix, worker )
+    env['TESTDIRAC_RESOURCE_ROOT'] = self.resourceRoot
+    return env
+
+  def missingDatabases( self ):
+    """ the prefixed databases of the workers that do not exist
+
+    :return: S_OK( [ DB names ] )
+    """
+    initializeDIRAC( ignoreErrors = True )
+    missing = []
+    for worker in range( 1, self.workers + 1 ):
+      result = missingDatabases( '%s%d_' % ( self.dbPrefix, worker ) )
+      if not result['OK']:
+        return result
+      missing += result['Value']
+    return S_OK( missing )
+
+  def run( self, moduleNames ):
+    """ run all the modules
+
+    :return: S_OK( { 'Modules' : [ module summaries ], 'WallTime' : seconds for the whole run,
+                     'SerialTime' : sum of the module wall times, 'Failed' : number of modules not OK,
+                     'BaseDir' : directory of the workers and logs } )
+    """
+    if not moduleNames:
+      return S_ERROR( 'No test module to run' )
+    baseDir = self.baseDir if self.baseDir else tempfile.mkdtemp( prefix = 'SuiteRunner_' )
+    baseDir = os.path.abspath( baseDir )
+    workDirs = []
+    for worker in range( 1, self.workers + 1 ):
+      workDir = os.path.join( baseDir, 'worker%d' % worker )
+      if not os.path.exists( workDir ):
+        os.makedirs( workDir )
+      workDirs.append( workDir )
+
+    parallel = [moduleName for moduleName in moduleNames if moduleName not in self.serialModules]
+    serial = [moduleName for moduleName in moduleNames if moduleName in self.serialModules]
+    # longest first, the unknown ones before the others
+    parallel.sort( key = lambda moduleName: -self.durations.get( moduleName, sys.maxint ) )
+    if parallel and self.checkDatabases:
+      result = self.missingDatabases()
+      if not result['OK']:
+        return result
+      if result['Value']:
+        return S_ERROR( 'Databases to create before running in parallel: %s' % ', '.join( result['Value'] ) )
+
+    queue = Queue.Queue()
+    for moduleName in parallel:
+      queue.put( moduleName )
+    summaries = []
+    lock = threading.Lock()
+
+    def workerLoop( worker ):
+      env = self.workerEnvironment( worker )
+      while True:
+        try:
+          moduleName = queue.get_nowait()
+        except Queue.Empty:
+          return
+        summary = runModule( moduleName, workDirs[worker - 1], env,
+                             os.path.join( baseDir, '%s.log' % moduleName ) )
+        summary['Worker'] = worker
+        lock.acquire()
+        try:
+          summaries.append( summary )
+        finally:
+          lock.release()
+
+    start = time.time()
+    threads = [threading.Thread( target = workerLoop, args = ( worker, ) ) for worker in range( 1, self.workers + 1 )]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    for moduleName in serial:
+      summary = runModule( moduleName, workDirs[0], self.workerEnvironment(),
+                           os.path.join( baseDir, '%s.log' % moduleName ) )
+      summary['Worker'] = 1
+      summaries.append( summary )
+
+    return S_OK( { 'Modules' : summaries,
+                   'WallTime' : time.time() - start,
+                   'SerialTime' : sum( [moduleSummary['WallTime'] for moduleSummary in summaries] ),
+                   'Failed' : len( [moduleSummary for moduleSummary in summaries if moduleSummary['Status'] != 'OK'] ),
+                   'BaseDir' : baseDir } )
+
+  def report( self, result ):
+    """ one line per module, then the totals
+    """
+    lines = []
+    for summary in result['Modules']:
+      lines.append( '%-70s %-6s %4d tests %8.2f s  worker %d  %s' % ( summary['Module'], summary['Status'],
+                                                                    summary['Tests'], summary['WallTime'],
+                                                                    summary['Worker'], summary['LogFile'] ) )
+    speedup = result['SerialTime'] / result['WallTime'] if result['WallTime'] else 0.
+    lines.append( '%d modules (%d not OK) with %d workers: %.2f s wall, %.2f s summed module time, speedup %.1f' %
+                  ( len( result['Modules'] ), result['Failed'], self.workers,
+                    result['WallTime'], result['SerialTime'], speedup ) )
+    return '\n'.join( lines )
+
+def main( argv ):
+  usage = "Usage:\n python %s [-j workers] [-b baseDir] [-p dbPrefix] [-d durations.json] [-B] [-D] [module ...]" % argv[0]
+  try:
+    options, moduleNames = getopt.getopt( argv[1:], 'j:b:p:d:BD' )
+  except getopt.GetoptError, error:
+    print "%s\n%s" % ( error, usage )
+    return -1
+  options = dict( options )
+  durationsFile = options.get( '-d' )
+  durations = {}
+  if durationsFile and os.path.exists( durationsFile ):
+    durations = json.load( open( durationsFile ) )
+
+  runner = SuiteRunner( workers = int( options['-j'] ) if '-j' in options else None,
+                        baseDir = options.get( '-b' ), dbPrefix = options.get( '-p', 'w' ),
+                        durations = durations, checkDatabases = '-D' not in options )
+  if not moduleNames:
+    moduleNames = [moduleName for moduleName in findTestModules( runner.resourceRoot )
+                   if '-B' in options or not moduleName.rpartition( '.' )[2].startswith( 'Benchmark' )]
+  result = runner.run( moduleNames )
+  if not result['OK']:
+    print result['Message']
+    return -1
+  print runner.report( result['Value'] )
+
+  if durationsFile:
+    for summary in result['Value']['Modules']:
+      durations[summary['Module']] = summary['WallTime']
+    fd = open( durationsFile, 'w' )
+    try:
+      json.dump( durations, fd, indent = 1, sort_keys = True )
+    finally:
+      fd.close()
+  return 1 if result['Value']['Failed'] else 0
+
+if __name__ == '__main__':
+  sys.exit( main( sys.argv ) )
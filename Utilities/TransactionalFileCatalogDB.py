@@ -0,0 +1,173 @@
+""" FileCatalogDB where the stored directory usage changes in the same transaction as the files
+
+    getDirectorySize( lfns, longOutput, False ) answers from FC_DirectoryUsage, the files and size
+    per directory and SE (SEID 0 for the logical ones) of the whole subtree. The file manager
+    updates it with _updateDirectoryUsage on addFile, addReplica, removeReplica and removeFile,
+    but on a connection of its own and only warning when it fails: an interrupted or failed update
+    leaves the stored usage different from the one recalculated from the files, for good.
+
+    TransactionalFileCatalogDB replaces the file manager configured by one where:
+    - each addFile, addReplica, removeReplica and removeFile runs in one transaction, on one
+      connection, with the change of the usage of the directory of each file and of all its ancestors
+    - the usage is changed by one INSERT ... ON DUPLICATE KEY UPDATE per directory of the files,
+      for the directory and its ancestors, so that reading it stays a lookup of the directory row
+    - when the usage update fails, the whole operation is rolled back and returns S_ERROR
+
+    The catalog tables have to be InnoDB for the rollback, getNonTransactionalTables lists the others.
+
+      db = TransactionalFileCatalogDB()
+      db.setConfig( catalogConfig() )
+      db.addFile( { lfn : { 'PFN' : pfn, 'SE' : 'CERN-USER', 'Size' : 123, 'GUID' : guid, 'Checksum' : '0' } },
+                  credDict )
+"""
+
+import threading
+
+from DIRAC import gConfig, gLogger, S_OK, S_ERROR
+from DIRAC.ConfigurationSystem.Client.PathFinder import getServiceSection
+from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+
+# the managers and options the FileCatalog service uses when not configured
+defaultManagers = { 'UserGroupManager' : 'UserAndGroupManagerDB',
+                    'SEManager' : 'SEManagerDB',
+                    'SecurityManager' : 'NoSecurityManager',
+                    'DirectoryManager' : 'DirectoryLevelTree',
+                    'FileManager' : 'FileManager',
+                    'DirectoryMetadata' : 'DirectoryMetadata',
+                    'FileMetadata' : 'FileMetadata' }
+defaultOptions = { 'UniqueGUID' : False,
+                   'GlobalReadAccess' : True,
+                   'LFNPFNConvention' : 'Strong',
+                   'ResolvePFN' : True,
+                   'DefaultUmask' : 0775,
+                   'ValidFileStatus' : ['AprioriGood', 'Trash', 'Removing', 'Probing'],
+                   'ValidReplicaStatus' : ['AprioriGood', 'Trash', 'Removing', 'Probing'],
+                   'VisibleFileStatus' : ['AprioriGood'],
+                   'VisibleReplicaStatus' : ['AprioriGood'] }
+
+def catalogConfig( service = 'DataManagement/FileCatalog' ):
+  """ the configuration of FileCatalogDB.setConfig, as the service builds it
+  """
+  section = getServiceSection( service )
+  config = {}
+  for option, default in defaultManagers.items() + defaultOptions.items():
+    config[option] = gConfig.getValue( '%s/%s' % ( section, option ), default )
+  return config
+
+# the transaction of the thread: [ connection, failed usage updates ]
+transactions = threading.local()
+
+class TransactionalUsage:
+  """ mixed in before the class of the file manager, held in usageBase
+  """
+
+  usageTable = 'FC_DirectoryUsage'
+
+  def addFile( self, *args, **kwargs ):
+    return self._inTransaction( 'addFile', args, kwargs )
+
+  def addReplica( self, *args, **kwargs ):
+    return self._inTransaction( 'addReplica', args, kwargs )
+
+  def removeReplica( self, *args, **kwargs ):
+    return self._inTransaction( 'removeReplica', args, kwargs )
+
+  def removeFile( self, *args, **kwargs ):
+    return self._inTransaction( 'removeFile', args, kwargs )
+
+  def _inTransaction( self, method, args, kwargs ):
+    """ call method of the file manager in a transaction, or in the one already open in this
+        thread when it calls another of the operations
+    """
+    method = getattr( self.usageBase, method )
+    current = getattr( transactions, 'current', None )
+    if current:
+      kwargs['connection'] = current[0]
+      return method( self, *args, **kwargs )
+
+    result = self.db._getConnection()
+    if not result['OK']:
+      return result
+    connection = result['Value']
+    result = self.db._update( 'START TRANSACTION', connection )
+    if not result['OK']:
+      return result
+
+    transactions.current = [connection, []]
+    try:
+      kwargs['connection'] = connection
+      result = method( self, *args, **kwargs )
+      failures = transactions.current[1]
+    except Exception:
+      self.db._update( 'ROLLBACK', connection )
+      raise
+    finally:
+      transactions.current = None
+
+    if not result['OK'] or failures:
+      self.db._update( 'ROLLBACK', connection )
+      if result['OK']:
+        return S_ERROR( 'Failed to update the directory usage, nothing changed: %s' % failures[0] )
+      return result
+    commit = self.db._update( 'COMMIT', connection )
+    if not commit['OK']:
+      return commit
+    return result
+
+  def _updateDirectoryUsage( self, directorySEDict, change, connection = False ):
+    """ change the usage of the directories and of all their ancestors
+
+    :param dict directorySEDict: { directory ID : { SE ID : { 'Files' : files, 'Size' : size } } }
+    :param str change: '+' or '-'
+    """
+    current = getattr( transactions, 'current', None )
+    if not connection and current:
+      connection = current[0]
+    sign = -1 if change == '-' else 1
+    for dirID, seDict in directorySEDict.items():
+      result = self.db.dtree.getPathIDsByID( dirID )
+      if result['OK']:
+        values = []
+        for pathID in result['Value']:
+          for seID, counters in seDict.items():
+            values.append( "( %d, %d, %d, %d, UTC_TIMESTAMP() )" % ( pathID, seID, sign * counters['Size'],
+                                                                     sign * counters['Files'] ) )
+        result = self.db._update( "INSERT INTO %s ( DirID, SEID, SESize, SEFiles, LastUpdate ) VALUES %s "
+                                  "ON DUPLICATE KEY UPDATE SESize = SESize + VALUES( SESize ), "
+                                  "SEFiles = SEFiles + VALUES( SEFiles ), LastUpdate = UTC_TIMESTAMP()"
+                                  % ( self.usageTable, ', '.join( values ) ), connection )
+      if not result['OK']:
+        gLogger.error( "Failed to update the directory usage", "%s: %s" % ( dirID, result['Message'] ) )
+        if current:
+          current[1].append( result['Message'] )
+        return result
+    return S_OK()
+
+class TransactionalFileCatalogDB( FileCatalogDB ):
+  """ FileCatalogDB with the file manager made transactional
+  """
+
+  def setConfig( self, databaseConfig ):
+    result = FileCatalogDB.setConfig( self, databaseConfig )
+    if not result['OK']:
+      return result
+    base = self.fileManager.__class__
+    fileManagerClass = type( base )( 'Transactional%s' % base.__name__, ( TransactionalUsage, base ),
+                                     { 'usageBase' : base } )
+    self.fileManager = fileManagerClass( self )
+
+    tables = self.getNonTransactionalTables()
+    if tables['OK'] and tables['Value']:
+      gLogger.warn( "The directory usage can not be rolled back with these tables",
+                    ', '.join( tables['Value'] ) )
+    return result
+
+  def getNonTransactionalTables( self ):
+    """ :return: S_OK( [ catalog tables not in InnoDB ] )
+    """
+    result = self._query( "SELECT `TABLE_NAME` FROM `information_schema`.`TABLES` "
+                          "WHERE `TABLE_SCHEMA` = DATABASE() AND `TABLE_NAME` LIKE 'FC\\_%' "
+                          "AND `ENGINE` != 'InnoDB'" )
+    if not result['OK']:
+      return result
+    return S_OK( [row[0] for row in result['Value']] )
@@ -1,5 +1,7 @@
 import os, shutil
 
+from TestDIRAC.Utilities.ResourceLocator import gResourceLocator
+
 def cleanTestDir():
   for fileIn in os.listdir( '.' ):
     if 'Local' in fileIn:
@@ -10,30 +12,26 @@ def cleanTestDir():
       except OSError:
         continue
 
+# prodConf files produced by the local runs, and the files with their expected content
+prodConfFiles = { 'MC' : [( 'prodConf_Boole_00012345_00006789_2.py', 'pConfBooleExpected.txt' ),
+                           ( 'prodConf_Moore_00012345_00006789_3.py', 'pConfMooreExpected.txt' ),
+                           ( 'prodConf_Brunel_00012345_00006789_4.py', 'pConfBrunelExpected.txt' ),
+                           ( 'prodConf_DaVinci_00012345_00006789_5.py', 'pConfDaVinciExpected.txt' )],
+                  'MC_new' : [( 'prodConf_Boole_00012345_00006789_2.py', 'pConfBooleExpected.txt' ),
+                               ( 'prodConf_Moore_00012345_00006789_3.py', 'pConfMooreExpected.txt' )],
+                  'Reco' : [( 'prodConf_Brunel_00012345_00006789_1.py', 'pConfBrunelRecoExpected.txt' ),
+                             ( 'prodConf_DaVinci_00012345_00006789_2.py', 'pConfDaVinciRecoExpected.txt' )],
+                  'Reco_old' : [( 'prodConf_Brunel_00020194_00106359_1.py', 'pConfBrunelRecoOldExpected.txt' ),
+                                 ( 'prodConf_DaVinci_00020194_00106359_2.py', 'pConfDaVinciRecoOldExpected.txt' )],
+                  'Stripp' : [( 'prodConf_DaVinci_00012345_00006789_1.py', 'pConfDaVinciStrippExpected.txt' )],
+                  'Merge' : [( 'prodConf_LHCb_00012345_00006789_1.py', 'pConfLHCbExpected.txt' )],
+                  'MergeM' : [( 'prodConf_DaVinci_00012345_00006789_1.py', 'pConfDaVinciMergeExpected.txt' )]}
+
 def getOutput( typeOut = 'MC' ):
   # Now checking for some outputs
   # prodConf files
 
-  if typeOut == 'MC':
-    filesCouples = [( 'prodConf_Boole_00012345_00006789_2.py', 'pConfBooleExpected.txt' ),
-                    ( 'prodConf_Moore_00012345_00006789_3.py', 'pConfMooreExpected.txt' ),
-                    ( 'prodConf_Brunel_00012345_00006789_4.py', 'pConfBrunelExpected.txt' ),
-                    ( 'prodConf_DaVinci_00012345_00006789_5.py', 'pConfDaVinciExpected.txt' )]
-  if typeOut == 'MC_new':
-    filesCouples = [( 'prodConf_Boole_00012345_00006789_2.py', 'pConfBooleExpected.txt' ),
-                    ( 'prodConf_Moore_00012345_00006789_3.py', 'pConfMooreExpected.txt' )]
-  elif typeOut == 'Reco':
-    filesCouples = [( 'prodConf_Brunel_00012345_00006789_1.py', 'pConfBrunelRecoExpected.txt' ),
-                    ( 'prodConf_DaVinci_00012345_00006789_2.py', 'pConfDaVinciRecoExpected.txt' )]
-  elif typeOut == 'Reco_old':
-    filesCouples = [( 'prodConf_Brunel_00020194_00106359_1.py', 'pConfBrunelRecoOldExpected.txt' ),
-                    ( 'prodConf_DaVinci_00020194_00106359_2.py', 'pConfDaVinciRecoOldExpected.txt' )]
-  elif typeOut == 'Stripp':
-    filesCouples = [( 'prodConf_DaVinci_00012345_00006789_1.py', 'pConfDaVinciStrippExpected.txt' )]
-  elif typeOut == 'Merge':
-    filesCouples = [( 'prodConf_LHCb_00012345_00006789_1.py', 'pConfLHCbExpected.txt' )]
-  elif typeOut == 'MergeM':
-    filesCouples = [( 'prodConf_DaVinci_00012345_00006789_1.py', 'pConfDaVinciMergeExpected.txt' )]
+  filesCouples = prodConfFiles[typeOut]
 
   retList = []
 
@@ -47,12 +45,14 @@ def getOutput( typeOut = 'MC' ):
 
   return retList
 
+def getResourceRoot():
+  """ where the test resources are looked for: TESTDIRAC_RESOURCE_ROOT if defined (the
+      SuiteRunner workers run in their own directory), the current directory otherwise
+  """
+  return os.environ.get( 'TESTDIRAC_RESOURCE_ROOT', '.' )
+
 def find_all( name, path, directory = None ):
-  result = []
-  for root, _dirs, files in os.walk( path ):
-    if name in files:
-      result.append( os.path.join( root, name ) )
-  if directory:
-    if directory not in os.getcwd():
-      return [x for x in result if directory in x]
-  return result
+  # looked up in the index of the tree, instead of walking it at each call
+  if directory and directory not in os.getcwd():
+    return gResourceLocator.find( name, path, directory )
+  return gResourceLocator.find( name, path )